@@ -0,0 +1,20 @@
+#FLM: SMuFLbuilder Family
+
+"""Top level script for building all open fonts with SMuFLbuilder.
+
+This script checks for open fonts and builds each of them with
+smuflbuilder.family, e.g. the masters of a font family. Settings of each
+font may be overridden in '<font>.smuflbuilder.ini' next to the font file.
+Outside FontLab, run 'python -m smuflbuilder.family' instead.
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from FL import *
+
+if not len(fl):
+    raise Exception('Please open one or more fonts!')
+
+from smuflbuilder import family
+
+family.build_open_fonts()
@@ -103,12 +103,14 @@ module_path="$HOME/Library/Application Support/FontLab/Studio 5/Macros/System/Mo
 config_path="$HOME/Documents"
 macro_parent="SMuFL"
 macro="smuflbuilder.py"
+family_macro="smuflbuilder_family.py"
 module_parent="smuflbuilder"
 config_parent="SMuFLbuilder Settings"
 config="smuflbuilder.ini"
 config_script="replace_settings.sh"
 
 install "$macro_path" "$macro_parent" "$macro"
+install "$macro_path" "$macro_parent" "$family_macro"
 install "$module_path" "$module_parent" ""
 install "$config_path" "$config_parent" "$config"
 install "$config_path" "$config_parent" "$config_script"
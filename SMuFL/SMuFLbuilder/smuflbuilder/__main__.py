@@ -0,0 +1,76 @@
+"""Command line entry point for SMuFLbuilder.
+
+Runs the builder outside FontLab, using the in-memory font backend:
+
+python -m smuflbuilder font.json [-o output.json] [-s settings.ini] [--plan]
+                                  [-j jobs] [--rebuild] [--report report.json]
+                                  [-q | -v] [--log build.log]
+
+The font is read from and written to the JSON format of .memfont. With
+--plan, the glyphs to build, skip and draw are printed, and the font is left
+untouched. Independent ranges are built in up to jobs processes (defaults to
+one per CPU, see .scheduler). With --rebuild, glyphs unchanged since last
+build are replaced as well (see .cache). With --report, timings and
+counters of the build are written as JSON (see .stats). -q and -v override
+[Global][messages], and --log overrides [Global][log file] (see .log).
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+import argparse
+import os
+
+from smuflbuilder import context
+from smuflbuilder import filepaths
+from smuflbuilder import log
+from smuflbuilder import runner
+from smuflbuilder.backend import *
+
+
+def parse_args():
+    """Returns parsed command line arguments."""
+    parser = argparse.ArgumentParser(prog='smuflbuilder')
+    parser.add_argument('font', help='font file (.json) to build')
+    parser.add_argument('-o', '--output',
+                        help='output file (defaults to overwriting font)')
+    parser.add_argument('-s', '--settings', default=filepaths.user,
+                        help='user settings file (smuflbuilder.ini)')
+    parser.add_argument('--plan', action='store_true',
+                        help='print build plan without building')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='number of processes (defaults to CPU count)')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='ignore build cache and replace all glyphs')
+    parser.add_argument('--report',
+                        help='write timings and counters to file (.json)')
+    level = parser.add_mutually_exclusive_group()
+    level.add_argument('-q', '--quiet', action='store_const', dest='level',
+                       const=log.QUIET, help='print errors only')
+    level.add_argument('-v', '--verbose', action='store_const', dest='level',
+                       const=log.VERBOSE, help='print every glyph built')
+    parser.add_argument('--log', help='write all messages to file')
+    return parser.parse_args()
+
+
+def main():
+    """Opens font, executes runner and saves font unless planning."""
+    args = parse_args()
+    if not HEADLESS:
+        raise Exception('Please run SMuFLbuilder from the Macro panel!')
+    # Read defaults from package.
+    defaults = os.path.join(os.path.dirname(filepaths.__file__),
+                            'defaults.ini')
+    fl.Open(args.font)
+    ctx = context.create(
+        fl.font, [defaults, os.path.expanduser(args.settings)])
+    if args.level is not None:
+        ctx.log.level = args.level
+    if args.log:
+        ctx.log.filename = args.log
+    runner.main(ctx, dry_run=args.plan, processes=args.jobs,
+                rebuild=args.rebuild, report=args.report)
+    if not args.plan:
+        fl.Save(args.output or args.font)
+
+
+main()
@@ -0,0 +1,20 @@
+"""Font backend module for SMuFLbuilder.
+
+Provides the FontLab objects used throughout SMuFLbuilder (fl, Glyph,
+Component, Node, Point etc.). Inside FontLab Studio 5 these come from the FL
+module. Elsewhere, the pure-Python stand-ins in .memfont are used instead,
+and HEADLESS is set to True.
+
+Modules import everything from here in place of the FL module:
+
+from smuflbuilder.backend import *
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+try:
+    from FL import *
+    HEADLESS = False
+except ImportError:
+    from smuflbuilder.memfont import *
+    HEADLESS = True
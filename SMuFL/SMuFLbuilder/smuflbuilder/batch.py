@@ -0,0 +1,159 @@
+"""Batch module for SMuFLbuilder.
+
+A Batch collects the changes made to the font while a range is built: new
+glyphs, renamed or overwritten (replaced) glyphs and decomposed parents.
+Nothing is written to the font until commit(), which applies all changes in
+one step. rollback() discards them, leaving the font as it was before the
+range.
+
+Staged glyphs are given the index they will have once appended, so that
+composites may refer to parents drawn earlier in the same range. The glyph
+name index in the build context is kept up to date with staged changes, and
+restored on rollback.
+
+Classes:
+
+Batch -- staged glyph changes for one range
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from smuflbuilder import helpers
+
+
+class Batch(object):
+    """Staged glyph appends, renames, overwrites and decompositions."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.begin()
+
+    def begin(self):
+        """Starts empty batch at end of font."""
+        ctx = self.ctx
+        self.base = len(ctx.font.glyphs)  # Index of first staged glyph.
+        self.appended = []  # Staged (glyph, name) pairs, in index order.
+        self.flushed = 0  # Number of staged glyphs already in font.
+        self.renamed = []  # Staged (index, glyph, name, unicode) tuples.
+        self.overwritten = []  # Staged (index, glyph) pairs.
+        self.decomposed = []  # Staged indexes of glyphs to decompose.
+        self.messages = []  # Staged (message, glyphname) pairs.
+        # Glyphnames to be built since check_replaced(), not yet appended.
+        self.pending = set()
+        # Snapshot of per-build state, restored on rollback.
+        self.state = (set(ctx.checked), set(ctx.flattened),
+                      set(ctx.decomposed))
+
+    def __len__(self):
+        return len(self.appended)
+
+    def is_staged(self, index):
+        """Returns True if index refers to a glyph not yet in font."""
+        return index >= self.base + self.flushed
+
+    def append(self, glyph, name):
+        """Stages glyph for appending and returns its future index."""
+        index = self.base + len(self.appended)
+        self.appended.append((glyph, name))
+        self.messages.append(('Appending: {}', name))
+        return index
+
+    def rename(self, index, glyph, name, unicode=0):
+        """Stages new name and unicode for preexisting glyph."""
+        self.renamed.append((index, glyph, name, unicode))
+
+    def overwrite(self, index, glyph, name):
+        """Stages glyph to be assigned to preexisting glyph at index."""
+        if self.is_staged(index):
+            self.appended[index - self.base] = (glyph, name)
+        else:
+            self.overwritten.append((index, glyph))
+        self.messages.append(('Overwriting: {}', name))
+
+    def decompose(self, index, name):
+        """Stages decomposition of glyph at index.
+
+        Staged composites are appended to font first (see flush()), since
+        their components can only be resolved within the font.
+        """
+        if self.is_staged(index):
+            self.flush()
+        self.decomposed.append(index)
+        self.messages.append(('Decomposing: {}', name))
+
+    def flush(self):
+        """Appends staged glyphs to font ahead of commit.
+
+        Flushed glyphs are removed from font again on rollback.
+        """
+        glyphs = self.ctx.font.glyphs
+        for glyph, name in self.appended[self.flushed:]:
+            glyphs.append(glyph)
+        self.flushed = len(self.appended)
+        self._reindex_appended()
+
+    def commit(self):
+        """Applies all staged changes to font and logs messages."""
+        glyphs = self.ctx.font.glyphs
+        for index, glyph, name, unicode in self.renamed:
+            glyph.name = name
+            glyph.unicode = unicode
+        for index, glyph in self.overwritten:
+            glyphs[index].Assign(glyph)
+            glyphs[index].name = glyph.name
+            glyphs[index].unicode = glyph.unicode
+            glyphs[index].mark = glyph.mark
+            if self.ctx.glyph_index is not None:
+                self.ctx.glyph_index[glyph.name] = (index, glyphs[index])
+            self.ctx.kerning_index = None  # Kerning replaced by glyph.
+        self.flush()
+        for index in self.decomposed:
+            glyphs[index].Decompose()
+            helpers.forget_geometry(self.ctx, glyphs[index].name)
+        self.ctx.touched.update(index for index, glyph, name, unicode
+                                in self.renamed)
+        self.ctx.touched.update(index for index, glyph in self.overwritten)
+        self.ctx.touched.update(self.decomposed)
+        stats = self.ctx.stats
+        stats.count('appended', len(self.appended))
+        stats.count('renamed', len(self.renamed))
+        stats.count('overwritten', len(self.overwritten))
+        stats.count('decomposed', len(self.decomposed))
+        for message, name in self.messages:
+            self.ctx.log.detail(message, name)
+        self._forget_pending()
+        self.begin()
+
+    def rollback(self):
+        """Discards staged changes and restores glyph name index.
+
+        Replace actions of glyphs appended or pending in batch are decided
+        again if the glyphs are built later.
+        """
+        glyphs = self.ctx.font.glyphs
+        for index in reversed(range(self.base, self.base + self.flushed)):
+            del glyphs[index]
+        ctx = self.ctx
+        ctx.checked, ctx.flattened, ctx.decomposed = self.state
+        self._forget_pending()
+        ctx.geometry.clear()
+        ctx.glyph_index = None  # Rebuilt from font on next lookup.
+        ctx.kerning_index = None
+        self.begin()
+
+    def _forget_pending(self):
+        """Removes replace actions of glyphs not appended (incomplete)."""
+        for name in self.pending:
+            self.ctx.replacing.pop(name, None)
+        self.pending.clear()
+
+    def _reindex_appended(self):
+        """Points glyph name index at font's copies of flushed glyphs."""
+        index = self.ctx.glyph_index
+        if index is None:
+            return
+        glyphs = self.ctx.font.glyphs
+        for offset, (glyph, name) in enumerate(self.appended[:self.flushed]):
+            position = self.base + offset
+            if index.get(name, (None, None))[0] == position:
+                index[name] = (position, glyphs[position])
@@ -0,0 +1,278 @@
+"""Benchmark module for SMuFLbuilder.
+
+Builds every range in data.ranges, including alternates, ligatures and
+stylistic sets, in synthetic fonts of increasing size with the in-memory
+font backend (.memfont). From the folder containing the smuflbuilder module
+folder:
+
+python -m smuflbuilder.benchmark [-s 500 3000 10000] [-r repeats]
+                                 [-j processes] [-o results.json]
+
+Each synthetic font holds the parents of all ranges as rectangles, except
+for those drawn by .makers, and is filled up to size with unencoded glyphs
+kerned against each other. Each size is built in a separate process, repeats
+times, keeping the fastest time of each range. Ranges are executed as by
+runner.main(), in up to processes processes (see .scheduler), by default
+one. Per range, wall time and glyphs built per second are reported, as well
+as time of planning, wall time of the whole build and peak memory per size,
+and written as JSON for comparison between commits. Memory is not reported
+per range, as the peak of a process never decreases and thereby covers all
+ranges built before.
+
+Functions:
+
+synthetic_font() -- returns in-memory font of size with parents of ranges
+bench_size() -- builds all ranges in fonts of size and returns results
+main() -- runs benchmark from command line
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from ConfigParser import SafeConfigParser
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+from smuflbuilder import builders
+from smuflbuilder import context
+from smuflbuilder import data
+from smuflbuilder import filepaths
+from smuflbuilder import log
+from smuflbuilder import planner
+from smuflbuilder import runner
+from smuflbuilder import scheduler
+from smuflbuilder import settings
+from smuflbuilder import tools
+from smuflbuilder.backend import *
+
+# Increased when results change format.
+VERSION = 3
+
+SIZES = (500, 3000, 10000)
+UPM = 1000
+# Stroke component of cut time signatures, left unset in defaults.ini.
+CUT_TIME_STROKE = 'timeSigVerticalStroke'
+
+
+def _config():
+    """Returns Settings from defaults.ini with everything included.
+
+    Builds are quiet and not incremental, preexisting glyphs are overwritten
+    and cut time signatures have a stroke.
+    """
+    defaults = os.path.join(os.path.dirname(filepaths.__file__),
+                            'defaults.ini')
+    parser = SafeConfigParser()
+    parser.read([defaults])
+    sections = {section: dict(parser.items(section))
+                for section in parser.sections()}
+    for option in sections['Include']:
+        sections['Include'][option] = '1'
+    sections['Global'].update({'incremental build': '0', 'messages': '0',
+                               'log file': '', 'handle replaced': '2'})
+    sections['Time Signatures']['cut time stroke'] = CUT_TIME_STROKE
+    return settings.Settings(sections, UPM / 4, defaults)
+
+
+def _parents(ctx):
+    """Returns (boxed, drawn) sets of parent glyphnames of all ranges.
+
+    drawn holds parents drawn by .makers when missing.
+    """
+    boxed, drawn = set(), set()
+    for key in data.ranges:
+        main, alternates = planner.range_jobs(ctx, key)
+        for job in main + alternates:
+            drawable = builders.DRAWN.get(job.builder, set())
+            for child, parents in builders.targets(ctx, job.builder,
+                                                   job.glyphdata):
+                for parent in parents:
+                    if not parent:
+                        continue
+                    if drawable is None or parent in drawable:
+                        drawn.add(parent)
+                    else:
+                        boxed.add(parent)
+    return boxed - drawn, drawn
+
+
+def _box(name, width, height):
+    """Returns glyph of name with rectangle of width and height."""
+    glyph = Glyph()
+    glyph.name = name
+    try:
+        glyph.unicode = int(name[3:], 16)
+    except ValueError:
+        glyph.unicode = 0
+    tools.draw_rectangle(glyph, Point(0, height / 2), width, height / 2)
+    glyph.width = width + UPM / 50
+    return glyph
+
+
+def synthetic_font(size, config=None):
+    """Returns in-memory font of size glyphs, with parents of all ranges.
+
+    Parents drawn by .makers are left out. Remaining glyphs are unencoded
+    fillers, each kerned against the next.
+    """
+    config = config or _config()
+    font = Font('Benchmark {}'.format(size), UPM)
+    boxed, drawn = _parents(context.Context(font, config))
+    for i, name in enumerate(sorted(boxed)):
+        font.glyphs.append(_box(name, UPM / 5 + i % 7 * 10, UPM / 4))
+    for i in range(len(font.glyphs), size):
+        glyph = _box('bench{:05d}'.format(i), UPM / 4, UPM / 2)
+        glyph.kerning.append(KerningPair(i + 1 if i + 1 < size else 0, -10))
+        font.glyphs.append(glyph)
+    return font
+
+
+def _peak_memory():
+    """Returns peak memory of process and its workers in kB, or None if
+    unknown."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / 1024 if sys.platform == 'darwin' else peak
+
+
+def _build(font, config, processes=1):
+    """Builds all ranges in font in up to processes processes, as
+    runner.main() does, and returns (Context, planning time, wall time)."""
+    ctx = context.Context(font, config)
+    ctx.log.level = log.QUIET
+    start = time.time()
+    dependencies = scheduler.graph(ctx)
+    keys = scheduler.order(ctx, dependencies)
+    ctx.plan = planner.create(ctx, keys)
+    planned = time.time()
+    scheduler.run(ctx, scheduler.groups(ctx, keys, dependencies),
+                  runner.exe_builder, processes)
+    return ctx, planned - start, time.time() - planned
+
+
+def bench_size(size, repeats=1, processes=1):
+    """Builds all ranges in synthetic fonts of size and returns results.
+
+    Keeps fastest of repeats builds for each range, and for planning and the
+    whole build.
+    """
+    config = _config()
+    ranges = {}
+    plan_time = wall_time = None
+    for repeat in range(repeats):
+        font = synthetic_font(size, config)
+        ctx, plan, wall = _build(font, config, processes)
+        plan_time = min(plan, plan_time or plan)
+        wall_time = min(wall, wall_time or wall)
+        for key in ctx.stats.order:
+            record = ctx.stats.ranges[key]
+            counters = record['counters']
+            built = sum(counters.get(counter, 0) for counter
+                        in ('appended', 'renamed', 'overwritten'))
+            result = ranges.get(key)
+            if result is None or record['time'] < result['time']:
+                ranges[key] = {
+                    'time': record['time'],
+                    'glyphs': built,
+                    'glyphs per second': (built / record['time']
+                                          if record['time'] else None),
+                }
+    return {
+        'glyphs': size,
+        'order': ctx.stats.order,
+        'ranges': ranges,
+        'time': sum(result['time'] for result in ranges.values()),
+        'plan time': plan_time,
+        'wall time': wall_time,
+        'processes': processes,
+        'peak memory': _peak_memory(),
+    }
+
+
+def _bench_process(queue, args):
+    """Runs bench_size() in process of its own and puts results in queue."""
+    queue.put(bench_size(*args))
+
+
+def _summary(results):
+    """Returns results as printable text, one line per size and range, and
+    planning time, wall time and peak memory per size."""
+    lines = ['{:<16}{:>8}{:>10}{:>8}{:>12}'.format(
+        'range', 'size', 'time', 'glyphs', 'glyphs/s')]
+    for size in sorted(results['sizes'], key=int):
+        result = results['sizes'][size]
+        for key in result['order'] + ['total']:
+            if key == 'total':
+                record = {'time': result['time'], 'glyphs': sum(
+                    r['glyphs'] for r in result['ranges'].values())}
+                record['glyphs per second'] = (
+                    record['glyphs'] / record['time']
+                    if record['time'] else None)
+            else:
+                record = result['ranges'][key]
+            lines.append('{:<16}{:>8}{:>10.4f}{:>8}{:>12}'.format(
+                key, size, record['time'], record['glyphs'],
+                '{:.0f}'.format(record['glyphs per second'])
+                if record['glyphs per second'] else '-'))
+    for size in sorted(results['sizes'], key=int):
+        result = results['sizes'][size]
+        lines.extend(['', 'Planning of {} glyphs: {:.4f} s'.format(
+            size, result['plan time']),
+            'Wall time of {} glyphs in {} process(es): {:.4f} s'.format(
+                size, result['processes'], result['wall time']),
+            'Peak memory of {} glyphs: {} kB'.format(
+                size, result['peak memory'] or '-')])
+    return '\n'.join(lines)
+
+
+def parse_args():
+    """Returns parsed command line arguments."""
+    parser = argparse.ArgumentParser(prog='smuflbuilder.benchmark')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+',
+                        default=list(SIZES),
+                        help='numbers of glyphs in synthetic fonts')
+    parser.add_argument('-r', '--repeats', type=int, default=3,
+                        help='builds per size, fastest is kept')
+    parser.add_argument('-j', '--processes', type=int, default=1,
+                        help='processes building independent ranges')
+    parser.add_argument('-o', '--output', help='results file (.json)')
+    return parser.parse_args()
+
+
+def main():
+    """Benchmarks sizes, prints summary and writes results."""
+    args = parse_args()
+    if not HEADLESS:
+        raise Exception('Please run the benchmark outside FontLab!')
+    results = {'version': VERSION, 'python': sys.version.split()[0],
+               'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'sizes': {}}
+    for size in args.sizes:
+        # One process per size, so that peak memory is of that size only.
+        # Not of a pool, whose daemonic processes cannot start workers.
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_bench_process,
+            args=(queue, (size, args.repeats, args.processes)))
+        process.start()
+        results['sizes'][str(size)] = queue.get()
+        process.join()
+    print(_summary(results))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, sort_keys=True, indent=1,
+                      separators=(',', ': '))
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,8 +6,8 @@ involved in drawing and appending glyphs to font.
 
 The functions herein are grouped by SMuFL range or glyph type, depending on
 practicality. Getting their external functionality from modules .makers and
-.helpers and user defined values from config, they all follow more or less
-the same process:
+.helpers and user defined values from the build context (.context) passed as
+first argument, they all follow more or less the same process:
 
 1. Check .data in argument against font for missing parents.
 2. Call applicable function in .makers if not.
@@ -36,79 +36,91 @@ flags() -- builds flag composites
 octaves() -- builds octave composites
 dynamics() -- builds dynamics composites
 accordion_reg() -- builds accordion registration composites
+targets() -- returns (child, parents) pairs of builder and dataset
 """
 
 # (c) 2021 by Knut Nergaard.
 
 
-from ConfigParser import SafeConfigParser
-from FL import *
-
 from smuflbuilder import data
 from smuflbuilder import helpers
+from smuflbuilder import layout
 from smuflbuilder import makers
-from smuflbuilder import filepaths
+from smuflbuilder.backend import *
+
+# Parents drawn by .makers when missing, by builder (see DRAWN).
+STEMS_DRAWN = {'uniE210'}
+NOTES_DRAWN = {'uniE210', 'uniE1E7'}
+BEAMED_NOTES_DRAWN = {'uniE204', 'uniE205', 'uniE1E7', 'uniE1F7', 'uniE1FE'}
+DYNAMICS_DRAWN = {'uniE53E', 'uniE541'}
+
+# Unencoded octave letters, named according to config.
+OCTAVE_LETTERS = {'octaveC': 'c', 'octaveL': 'l', 'octaveO': 'o',
+                  'octaveS': 's'}
 
-f = fl.font
-config = SafeConfigParser()
-config.read(filepaths.defaults)
-config.read(filepaths.user)
 
-SPACE = f.upm / 4
+def _cut_time_stroke(ctx, parent):
+    """Returns name of cut time stroke, with set suffix of parent."""
+    stroke = helpers.configvalue(ctx, 'Time Signatures', 'cut time stroke')
+    l_suffix = helpers.configvalue(
+        ctx, 'Set Suffixes', 'large time signatures')
+    n_suffix = helpers.configvalue(
+        ctx, 'Set Suffixes', 'large narrow time signatures')
+    if parent.endswith(l_suffix):
+        stroke += l_suffix
+    elif parent.endswith(n_suffix):
+        stroke += n_suffix
+    return stroke
 
 
-def staves(glyphdata):
+def _octave_letter(ctx, parent):
+    """Returns name of parent, or of unencoded letter according to config."""
+    if parent in OCTAVE_LETTERS:
+        return helpers.configvalue(ctx, 'Octaves', OCTAVE_LETTERS[parent])
+    return parent
+
+
+def staves(ctx, glyphdata):
     """builds composites in Staves range.
 
     Determines baseline from number of components required.
     """
     for parent, children in glyphdata.iteritems():
-        complete = helpers.check_complete(parent)
-        if not complete and config.getboolean('Global', 'draw missing'):
-            makers.staves(parent, children)
+        complete = helpers.check_complete(ctx, parent)
+        if not complete and ctx.config.draw_missing:
+            makers.staves(ctx, parent, children)
             complete = True
-        helpers.decompose(parent)
+        helpers.decompose(ctx, parent)
 
         if not children:
             continue
         for child in children:
-            if helpers.check_excluded(child) or not complete:
-                helpers.print_incomplete(child)
+            if helpers.check_excluded(ctx, child) or not complete:
+                helpers.print_incomplete(ctx, child)
+                continue
+            if helpers.check_replaced(ctx, child):
                 continue
 
-            # Determine base y values for initial components
-            # in glyphs with odd vs. even number of lines.
-            num_of_lines = children.index(child) + 2
-            baseline = SPACE / 2 if num_of_lines % 2 == 0 else 0
-            glyph_height = SPACE * num_of_lines / 2
-
-            # Generate shift values for subsequent components.
-            shifts = range(baseline, glyph_height, SPACE)
+            # Append lines above and below baseline to new glyph.
+            num_of_lines = ctx.tables['order'][child] + 2
             new_glyph = Glyph()
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
+            new_glyph.components.extend(layout.components(
+                parent_index, layout.staff_lines(ctx.space, num_of_lines)))
 
-            # Append components with + and - shift values to new glyph.
-            dx, dy = 0, 0
-            for dy in shifts:
-                new_glyph.components.append(Component(
-                    parent_index, Point(dx, dy)))
-                if dy > 0:
-                    new_glyph.components.append(Component(
-                        parent_index, Point(dx, -dy)))
+            metrics = helpers.get_metrics(ctx, parent)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
-            metrics = parent_glyph.GetMetrics()
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
 
-
-def barlines(glyphdata):
+def barlines(ctx, glyphdata):
     """builds composites in Barlines and Repeats ranges.
 
     Special spacing parameters are required to build composites involving
     repeat dots."""
     for child, parents in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         bbox_widths = []
@@ -116,25 +128,25 @@ def barlines(glyphdata):
         components = []
 
         for i, parent in enumerate(parents):
-            complete = helpers.check_complete(parent)
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
-                if not config.getboolean('Global', 'draw missing'):
-                    helpers.print_incomplete(child)
+                if not ctx.config.draw_missing:
+                    helpers.print_incomplete(ctx, child)
                     break
-                makers.barlines(parent)
+                makers.barlines(ctx, parent)
                 complete = True
 
             # Get bounding boxes.
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
-            bbox_width = parent_glyph.GetBoundingRect().width
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
+            bbox_width = helpers.get_bbox(ctx, parent).width
             bbox_widths.append(bbox_width)
 
             # Set separation parameters.
-            separation = helpers.configvalue('Barlines', 'barline separation')
+            separation = helpers.configvalue(
+                ctx, 'Barlines', 'barline separation')
             if parents[i] == 'uniE044' or parents[i - 1] == 'uniE044':
                 separation = helpers.configvalue(
-                    'Repeats', 'repeat barline dot separation')
+                    ctx, 'Repeats', 'repeat barline dot separation')
 
             if parent == 'uniE044':
                 if i in {1, 3, 6} or i == len(parents) - 1:
@@ -147,7 +159,7 @@ def barlines(glyphdata):
             # Set shifts for repeat dots.
             dx, dy = sum(bbox_widths[:-1] + separations), 0
             if parent == 'uniE044':
-                dy = SPACE * 1.5 if i % 2 == 1 else SPACE * 2.5
+                dy = ctx.space * 1.5 if i % 2 == 1 else ctx.space * 2.5
 
             # Append components.
             components.append(Component(parent_index, Point(dx, dy)))
@@ -159,59 +171,48 @@ def barlines(glyphdata):
         if child and complete:
             new_width = sum(bbox_widths + separations)
             metrics = Point(new_width, 0)
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def cut_time(glyphdata):
+def cut_time(ctx, glyphdata):
     """Builds cut time composites in Time signature related ranges.
 
     Covers both Time signature and Time signatures supplement ranges.
     Requires unencoded timeSigVerticalStroke component.
     """
     for parent, child in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
-        stroke = helpers.configvalue(
-            'Time Signatures', 'cut time stroke')
-        l_suffix = helpers.configvalue(
-            'Set Suffixes', 'large time signatures')
-        n_suffix = helpers.configvalue(
-            'Set Suffixes', 'large narrow time signatures')
-        if parent.endswith(l_suffix):
-            stroke += l_suffix
-        elif parent.endswith(n_suffix):
-            stroke += n_suffix
-
-        complete = helpers.check_complete(parent)
+        stroke = _cut_time_stroke(ctx, parent)
+        complete = helpers.check_complete(ctx, parent)
         if complete:
-            complete = helpers.check_complete(stroke)
+            complete = helpers.check_complete(ctx, stroke)
 
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
         else:
             new_glyph = Glyph()
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
             dx, dy = 0, 0
             new_glyph.components.append(Component(parent_index, Point(dx, dy)))
 
             # Get index of cut time stroke glyph,
             # and center in main parent glyph.
-            stroke_index = f.FindGlyph(stroke)
-            parent_width = parent_glyph.GetBoundingRect().width
+            stroke_index = helpers.lookup(ctx, stroke)[0]
+            parent_width = helpers.get_bbox(ctx, parent).width
             parent_center = parent_width / 2
             dx, dy = parent_center, 0
             new_glyph.components.append(Component(
                 stroke_index, Point(dx, dy)))
 
-            metrics = parent_glyph.GetMetrics()
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            metrics = helpers.get_metrics(ctx, parent)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def fraction_time(glyphdata):
+def fraction_time(ctx, glyphdata):
     """Builds Time signature fraction composites.
 
     Scales regular numerals to 50%.
@@ -219,30 +220,31 @@ def fraction_time(glyphdata):
     Option to build from dedicated numerals should perhaps be implemented.
     """
     for child, parents in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         parent_widths = []
 
         new_glyph = Glyph()
         for i, parent in enumerate(parents):
-            complete = helpers.check_complete(parent)
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
                 break
-            helpers.decompose(parent)
+            helpers.decompose(ctx, parent)
 
             # Define scale, shift, spacing and
             # kerning for fraction glyphs acc. to spec.
             sidebearings = helpers.configvalue(
-                'Time Signatures', 'fraction sidebearings')
+                ctx, 'Time Signatures', 'fraction sidebearings')
             spacing = helpers.configvalue(
-                'Time Signatures', 'fraction spacing')
+                ctx, 'Time Signatures', 'fraction spacing')
             one_kern = helpers.configvalue(
-                'Time Signatures', 'fraction one kern')
+                ctx, 'Time Signatures', 'fraction one kern')
             four_kern = helpers.configvalue(
-                'Time Signatures', 'fraction four kern')
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+                ctx, 'Time Signatures', 'fraction four kern')
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
             parent_width = parent_glyph.width
             sx = sy = 1  # 1 = 100% (x, y)
             dx = dy = 0
@@ -255,11 +257,11 @@ def fraction_time(glyphdata):
                 parent_width = parent_glyph.width * num_factor + sidebearings
                 sx, sy = sx * num_factor, sy * num_factor
                 if i == 0:
-                    dx, dy = sidebearings, SPACE / 2
+                    dx, dy = sidebearings, ctx.space / 2
                     if parent == 'uniE081':
                         parent_width += one_kern
                 else:
-                    dx, dy = parent_widths[0] + spacing * 2, -SPACE / 2
+                    dx, dy = parent_widths[0] + spacing * 2, -ctx.space / 2
                     if parent == 'uniE084':
                         dx += four_kern
                         parent_width += four_kern
@@ -268,36 +270,36 @@ def fraction_time(glyphdata):
             new_glyph.components.append(Component(
                 parent_index, Point(dx, dy), Point(sx, sy)))
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
         else:
             new_width = parent_widths[0] + parent_widths[2] + spacing * 2
             metrics = Point(new_width, 0)
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def mirror_time(glyphdata):
+def mirror_time(ctx, glyphdata):
     """Builds composites in Turned and Reversed time signatures ranges.
 
     Requires unencoded timeSigVerticalStroke component to retain cutTimeCommon
     as composite.
     """
     for parent, child in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
-        stroke = helpers.configvalue('Time Signatures', 'cut time stroke')
-        complete = helpers.check_complete(parent)
+        stroke = _cut_time_stroke(ctx, parent)
+        complete = helpers.check_complete(ctx, parent)
         if complete and parent == 'uniE08B':
-            complete = helpers.check_complete(stroke)
-        helpers.decompose(parent)
+            complete = helpers.check_complete(ctx, stroke)
+        helpers.decompose(ctx, parent)
 
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
         else:
             new_glyph = Glyph()
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
             # Turn.
             dx, dy, sx, sy = parent_glyph.width, parent_glyph.height, -1, -1
             if glyphdata == data.reversed_time:
@@ -308,8 +310,7 @@ def mirror_time(glyphdata):
 
             # Append component if cut time is component.
             if parent == 'uniE08B' and parent_glyph.components:
-                stroke_index = f.FindGlyph(stroke)
-                stroke_glyph = f.glyphs[stroke_index]
+                stroke_index, stroke_glyph = helpers.lookup(ctx, stroke)
 
                 for c in parent_glyph.components:
                     if c.index == stroke_index:
@@ -317,39 +318,40 @@ def mirror_time(glyphdata):
                     new_glyph.components.append(Component(
                         c.index, Point(dx, dy), Point(sx, sy)))
 
-            metrics = parent_glyph.GetMetrics()
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            metrics = helpers.get_metrics(ctx, parent)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def time_ligatures(glyphdata):
+def time_ligatures(ctx, glyphdata):
     """Builds recommended ligatures in Time Signatures range.
 
     Target name and numerator/denominator is determined by ligature name
     (underscore and ctrl character).
     """
     for child in glyphdata:
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         components = []
         shifts = []
 
-        parents = child.split('_')
+        parts = ctx.tables['ligatures'][child]
+        parents = [parent for parent, role in parts]
         complete = True
-        for i, parent in enumerate(parents):
-            complete = helpers.check_complete(parent)
+        for i, (parent, role) in enumerate(parts):
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
                 break
-            helpers.decompose(parent)
+            helpers.decompose(ctx, parent)
 
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
             dx, dy = 0, 0
-            if parent in data.ctrl_char:
+            if role == 'ctrl':
                 continue
             # Set vertical shift values for denominator and numerator.
-            dy = SPACE if parents[i - 1] == 'uniE09F' else SPACE * 3
+            dy = ctx.space if role == 'denominator' else ctx.space * 3
             if len(parents) <= 4:
                 continue
             # Set horizontal shifts and spacing for ligatures
@@ -365,66 +367,66 @@ def time_ligatures(glyphdata):
                 components.append(Component(parent_index, Point(dx, dy)))
 
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
         else:
             new_glyph = Glyph()
             for item in components:
                 new_glyph.components.append(item)
 
-            metrics = parent_glyph.GetMetrics()
+            metrics = helpers.get_metrics(ctx, parent)
             if len(parents) > 4:
                 metrics = Point(glyph_width, 0)
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def indv_notes(glyphdata):
+def indv_notes(ctx, glyphdata):
     """Builds composites in Individual notes range.
 
     Duplicates functionality of flags() which is not ideal, but difficult to
     avoid when parameters are different.
     """
     for child, parents in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         components = []
 
         complete = True
         for i, parent in enumerate(parents):
-            long_stem_length = helpers.configvalue('Stems', 'long stem length')
-            complete = helpers.check_complete(parent)
+            long_stem_length = helpers.configvalue(
+                ctx, 'Stems', 'long stem length')
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
-                if not config.getboolean('Global', 'draw missing'):
+                if not ctx.config.draw_missing:
                     break
-                if parent not in {'uniE210', 'uniE1E7'}:
+                if parent not in NOTES_DRAWN:
                     continue
                 # Draw/append stem according to spec.
                 elif parent == 'uniE210':
-                    makers.stems(parent)
+                    makers.stems(ctx, parent)
                 # Draw/append augmentation dot according to spec.
                 else:
-                    makers.augmentation_dot(parent)
+                    makers.augmentation_dot(ctx, parent)
                 complete = True
 
             if not complete:
                 continue
-            helpers.decompose(parent)
+            helpers.decompose(ctx, parent)
 
-            # Define parameters for notehead and append to list.
-            if parent in {'uniE0A0', 'uniE0A1', 'uniE0A2', 'uniE0A3', 'uniE0A4'}:
-                note_index = f.FindGlyph(parent)
-                note_glyph = f.glyphs[note_index]
+            # Define parameters for notehead (or its alternate) and append
+            # to list.
+            if parent.split('.')[0] in {'uniE0A0', 'uniE0A1', 'uniE0A2',
+                                        'uniE0A3', 'uniE0A4'}:
+                note_index, note_glyph = helpers.lookup(ctx, parent)
                 metrics = Point(note_glyph.width, 0)
                 dx, dy = 0, 0
                 components.append(Component(note_index, Point(dx, dy)))
 
             # Define parameters for stem.
             elif parent == 'uniE210':
-                note_bbox = note_glyph.GetBoundingRect()
-                stem_index = f.FindGlyph('uniE210')
-                stem_glyph = f.glyphs[stem_index]
-                stem_bbox = stem_glyph.GetBoundingRect()
+                stem_index, stem_glyph = helpers.lookup(ctx, 'uniE210')
                 dx, dy = note_glyph.width - stem_glyph.width, 0
 
                 # Handle downstem notes and append to list.
@@ -437,9 +439,8 @@ def indv_notes(glyphdata):
             elif parent in {'uniE240', 'uniE241', 'uniE250',
                             'uniE242', 'uniE243', 'uniE251'}:
                 flag_spacing = helpers.configvalue(
-                    'Flags', 'internal flag spacing')
-                flag_index = f.FindGlyph(parent)
-                flag_glyph = f.glyphs[flag_index]
+                    ctx, 'Flags', 'internal flag spacing')
+                flag_index, flag_glyph = helpers.lookup(ctx, parent)
                 glyph_width = (note_glyph.width + flag_glyph.width -
                                stem_glyph.width * 2)
                 metrics = Point(glyph_width, 0)
@@ -456,23 +457,24 @@ def indv_notes(glyphdata):
                         components.append(Component(flag_index, Point(dx, dy)))
 
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
         elif child:
             new_glyph = Glyph()
             for item in components:
                 new_glyph.components.append(item)
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def beamed_notes(glyphdata):
+def beamed_notes(ctx, glyphdata):
     """Builds composites in Beamed groups of notes range.
 
     Scales number in Tuplets range to 70%.
     Mirrors tuplet bracket.
     """
     for child, parents in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         components = []
@@ -481,37 +483,39 @@ def beamed_notes(glyphdata):
         for i, parent in enumerate(parents):
             if not parent:
                 continue
-            complete = helpers.check_complete(parent)
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
-                if not config.getboolean('Global', 'draw missing'):
+                if not ctx.config.draw_missing:
                     break
-                elif parent in {'uniE204', 'uniE205', 'uniE1E7', 'uniE1F7', 'uniE1FE'}:
+                elif parent in BEAMED_NOTES_DRAWN:
                     # Draw/append stem according to spec.
                     if parent in {'uniE204', 'uniE205'}:
-                        makers.stems(parent)
+                        makers.stems(ctx, parent)
                     elif parent == 'uniE1E7':
-                        makers.augmentation_dot(parent)
+                        makers.augmentation_dot(ctx, parent)
                     elif parent == 'uniE1F7':
-                        makers.note_beam(parent)
+                        makers.note_beam(ctx, parent)
                     elif parent == 'uniE1FE':
-                        makers.tuplet_bracket(parent)
+                        makers.tuplet_bracket(ctx, parent)
                     complete = True
 
             if not complete:
                 continue
-            helpers.decompose(parent)
+            helpers.decompose(ctx, parent)
             # Initialize components at origin and 100% scale.
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
-            parent_bbox = parent_glyph.GetBoundingRect()
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
+            parent_bbox = helpers.get_bbox(ctx, parent)
             dx, dy, sx, sy = 0, 0, 1, 1
 
             # Scale tuplet nums to 72% and move in line
             # with parent bracket and move tall version up.
-            long_stem_length = helpers.configvalue('Stems', 'long stem length')
-            short_stem_length = helpers.configvalue('Stems', 'short stem length')
-            tuplet_height = helpers.configvalue('Beams', 'tuplet height')
-            hook_length = helpers.configvalue('Beams', 'tuplet bracket hook length')
+            long_stem_length = helpers.configvalue(
+                ctx, 'Stems', 'long stem length')
+            short_stem_length = helpers.configvalue(
+                ctx, 'Stems', 'short stem length')
+            tuplet_height = helpers.configvalue(ctx, 'Beams', 'tuplet height')
+            hook_length = helpers.configvalue(
+                ctx, 'Beams', 'tuplet bracket hook length')
             diff = long_stem_length - short_stem_length
             if child in {'uniE1FF', 'uniE202'}:
                 bbox_center = parent_bbox.height / 2
@@ -529,25 +533,27 @@ def beamed_notes(glyphdata):
 
             # Define parameters for beams.
             if parent == 'uniE1F7':
-                beam_index = f.FindGlyph(parent)
-                beam_glyph = f.glyphs[beam_index]
-                beam_thickness = helpers.configvalue('Beams', 'beam thickness')
-                beam_spacing = helpers.configvalue('Beams', 'beam spacing')
+                beam_index, beam_glyph = helpers.lookup(ctx, parent)
+                beam_thickness = helpers.configvalue(
+                    ctx, 'Beams', 'beam thickness')
+                beam_spacing = helpers.configvalue(
+                    ctx, 'Beams', 'beam spacing')
                 separation = beam_thickness + beam_spacing
 
                 # Set vertical shift for long short stem
                 # and different number of beams.
+                number_of_beams = ctx.tables['counts'][child][parent]
                 if 'uniE205' in parents or child in {'uniE1F8', 'uniE1FA', 'uniE1FB'}:
-                    if parents.count('uniE1F7') == 1:
+                    if number_of_beams == 1:
                         dy = separation
-                    elif parents.count('uniE1F7') == 3:
+                    elif number_of_beams == 3:
                         dy = -separation
-                elif parents.count('uniE1F7') == 2:
+                elif number_of_beams == 2:
                     dy = -separation
 
                 # Generate shifts and append to list.
-                number_of_beams = parents.count('uniE1F7')
-                shifts = range(dy, dy + separation * number_of_beams, separation)
+                shifts = range(
+                    dy, dy + separation * number_of_beams, separation)
                 for n, dy in enumerate(shifts):
                     if i - 2 == n:
                         components.append(Component(beam_index, Point(dx, dy)))
@@ -555,8 +561,11 @@ def beamed_notes(glyphdata):
             # Define parameters for beamed notes and append to list.
             elif ('uniE1F7' in parents and 'uniE204' in parents or
                   'uniE1F7' in parents and 'uniE205' in parents):
-                diff = beam_glyph.width - parent_glyph.width
-                dx = diff
+                # Beam may not be reached yet in parents.
+                beam_glyph = helpers.lookup(ctx, 'uniE1F7')[1]
+                if beam_glyph is not None:
+                    diff = beam_glyph.width - parent_glyph.width
+                    dx = diff
                 components.append(Component(parent_index, Point(dx, dy)))
 
             # Append the rest.
@@ -565,65 +574,68 @@ def beamed_notes(glyphdata):
                                             Point(dx, dy), Point(sx, sy)))
 
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
         else:
             new_glyph = Glyph()
             for item in components:
                 new_glyph.components.append(item)
-            helpers.handle_replaced(child)
-            metrics = parent_glyph.GetMetrics()
+            metrics = helpers.get_metrics(ctx, parent)
             if 'uniE883' in parents:
                 metrics = Point(parent_bbox.width * 0.72, 0)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def stems(glyphdata):
+def stems(ctx, glyphdata):
     """Builds composites in Stems range.
 
     Dedicated technique components are found in Tremolos and various
     instrument-specific ranges.
     """
     for child, parent in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
-        complete = helpers.check_complete(parent)
+        complete = helpers.check_complete(ctx, parent)
         if not complete:
-            if (config.getboolean('Global', 'draw missing')
-                    and parent == 'uniE210'):
-                makers.stems(parent)
+            if ctx.config.draw_missing and parent in STEMS_DRAWN:
+                makers.stems(ctx, parent)
                 complete = True
             elif child:
-                helpers.print_incomplete(child)
+                helpers.print_incomplete(ctx, child)
             else:
-                helpers.print_incomplete(parent)
+                helpers.print_incomplete(ctx, parent)
             break
         else:
-            helpers.decompose(parent)
-            stem_index = f.FindGlyph(glyphdata[None])
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+            # Draw stem if missing and not yet reached in glyphdata.
+            if not helpers.check_complete(ctx, glyphdata[None]):
+                if not ctx.config.draw_missing:
+                    helpers.print_incomplete(ctx, child)
+                    continue
+                makers.stems(ctx, glyphdata[None])
+            helpers.decompose(ctx, parent)
+            stem_index, stem_glyph = helpers.lookup(ctx, glyphdata[None])
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
             new_glyph = Glyph()
             dx, dy = 0, 0
             # append stem component.
             new_glyph.components.append(Component(stem_index, Point(dx, dy)))
 
             # Set parameters for symbols and append.
-            dx = helpers.configvalue('Stems', 'stem thickness') / 2
-            dy = SPACE * 2
+            dx = helpers.configvalue(ctx, 'Stems', 'stem thickness') / 2
+            dy = ctx.space * 2
             # Centre double sharp on left sidebearing.
             if parent == 'uniE263':
                 dx -= parent_glyph.width / 2
             new_glyph.components.append(Component(parent_index, Point(dx, dy)))
 
-            stem_glyph = f.glyphs[stem_index]
-            metrics = stem_glyph.GetMetrics()
+            metrics = helpers.get_metrics(ctx, glyphdata[None])
             if child:
-                helpers.handle_replaced(child)
-                helpers.append_glyph(new_glyph, child, metrics)
+                helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def tremolos(glyphdata):
+def tremolos(ctx, glyphdata):
     """Builds slash and separation dot composites in Tremolos range.
 
     Determines baseline of slash composites based on number of components
@@ -634,132 +646,110 @@ def tremolos(glyphdata):
     Drawing of parents is not yet implemented in [makers].
     """
     for parent, children in glyphdata.iteritems():
-        complete = helpers.check_complete(parent)
-        helpers.decompose(parent)
+        complete = helpers.check_complete(ctx, parent)
+        helpers.decompose(ctx, parent)
         if not children:
             continue
 
         for child in children:
-            if helpers.check_excluded(child):
+            if helpers.check_excluded(ctx, child):
+                continue
+            if helpers.check_replaced(ctx, child):
                 continue
 
             if not complete:
-                helpers.print_incomplete(child)
+                helpers.print_incomplete(ctx, child)
                 continue
 
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
-            bbox = parent_glyph.GetBoundingRect()
-            dot_spacing = helpers.configvalue('Tremolos', 'divisi dot spacing')
-            num_of_comps = children.index(child) + 2
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
+            bbox = helpers.get_bbox(ctx, parent)
+            dot_spacing = helpers.configvalue(
+                ctx, 'Tremolos', 'divisi dot spacing')
+            num_of_comps = ctx.tables['order'][child] + 2
 
-            # Define base values for divisi dots.
+            # Lay out divisi dots, with 2x3 for tremoloDivisiDots6.
             if parent == 'uniE4A2':
-                baseline = 0
-                separation = bbox.height + dot_spacing
-                glyph_span = separation * num_of_comps
-                # Set up tremoloDivisiDots6 for double two rows of 3 dots.
-                if child == 'uniE231':
-                    num_of_comps += -2
-
-            # Define base y values for initial comps with
-            # odd/even number of trem slashes.
+                rows = 2 if child == 'uniE231' else 1
+                placement, width = layout.divisi_dots(
+                    bbox.height, num_of_comps, dot_spacing, rows)
+                metrics = Point(width, 0)
+
+            # Lay out trem slashes with + and - shift values, with odd/even
+            # number of slashes centered on baseline.
             else:
-                baseline = bbox.height / 2 if num_of_comps % 2 == 0 else 0
-                spacing = helpers.configvalue('Tremolos',
+                spacing = helpers.configvalue(ctx, 'Tremolos',
                                               'tremolo slash spacing')
-                separation = bbox.height + spacing
-                glyph_span = separation * num_of_comps / 2
-
+                fingered_spacing = None
                 if parent == 'uniE225':
-                    spacing = helpers.configvalue('Tremolos',
-                                                  'fingered tremolo spacing')
-                    separation = bbox.height + spacing
+                    fingered_spacing = helpers.configvalue(
+                        ctx, 'Tremolos', 'fingered tremolo spacing')
+                placement = layout.tremolo_slashes(
+                    bbox.height, num_of_comps, spacing, fingered_spacing)
+                metrics = helpers.get_metrics(ctx, parent)
 
-            shifts = range(baseline, glyph_span, separation)
             new_glyph = Glyph()
-            for shift in shifts:
-
-                # Append trem slash comps with + and - shift values.
-                if parent != 'uniE4A2':
-                    dx, dy = 0, shift
-                    new_glyph.components.append(Component(parent_index,
-                                                          Point(dx, dy)))
-                    if shift > 0:
-                        new_glyph.components.append(Component(parent_index,
-                                                              Point(dx, -dy)))
-                    metrics = parent_glyph.GetMetrics()
-
-                # Append divisi dot components with 2x3 for 'uniE231'.
-                else:
-                    dx, dy = shift, 0
-                    if child != 'uniE231':
-                        new_glyph.components.append(Component(parent_index,
-                                                              Point(dx, dy)))
-                    else:
-                        new_glyph.components.append(Component(parent_index,
-                                                              Point(dx, dy)))
-                        dy = dot_spacing + bbox.height
-                        new_glyph.components.append(Component(parent_index,
-                                                              Point(dx, dy)))
-                    metrics = Point(glyph_span - dot_spacing, 0)
-
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
-
-
-def flags(glyphdata):
+            new_glyph.components.extend(layout.components(
+                parent_index, placement))
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
+
+
+def flags(ctx, glyphdata):
     """Builds composite glyphs in Flags range.
 
     Additionally builds straight flags, as well as short flag and small flags
     (for small staff) stylistic sets.
     """
     for child, parents in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         components = []
 
+        # Lay out flags by spacing of each parent, mirrored for downstem.
+        # Parents may be None in straight flags sets (see planner).
+        spacing = helpers.configvalue(ctx, 'Flags', 'internal flag spacing')
+        suffix = helpers.configvalue(ctx, 'Set Suffixes', 'straight flags')
+        names = [parent or '' for parent in parents]
+        spacings = [spacing] * len(names)
+        if helpers.configvalue(ctx, 'Include', 'straight flags'):
+            spacings = [
+                helpers.configvalue(ctx, 'Flags', 'straight flag spacing')
+                if name.endswith(suffix) else spacing for name in names]
+        downs = ['uniE251' in name or name == 'uniE241' + '.' + suffix
+                 for name in names]
+        placement = layout.flag_stack(spacings, downs)
+
         complete = True
         for i, parent in enumerate(parents):
-            complete = helpers.check_complete(parent)
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
                 continue
-            helpers.decompose(parent)
-
-            spacing = helpers.configvalue('Flags', 'internal flag spacing')
-            suffix = helpers.configvalue('Set Suffixes', 'straight flags')
-            if helpers.configvalue('Include', 'straight flags'):
-                if parent.endswith(suffix):
-                    spacing = helpers.configvalue('Flags', 'straight flag spacing')
-            shifts = range(-spacing, spacing * len(parents), spacing)
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
-            dx, dy = 0, 0
-            for n, dy in enumerate(shifts):
-                if 'uniE251' in parent or parent == 'uniE241' + '.' + suffix:
-                    dy = -dy
-                if i == n:
-                    components.append(Component(parent_index, Point(dx, dy)))
+            helpers.decompose(ctx, parent)
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
+            components.extend(
+                layout.components(parent_index, placement[i:i + 1]))
 
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
         else:
             new_glyph = Glyph()
             for item in components:
                 new_glyph.components.append(item)
-            metrics = parent_glyph.GetMetrics()
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            metrics = helpers.get_metrics(ctx, parent)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def octaves(glyphdata):
+def octaves(ctx, glyphdata):
     """Builds composite glyphs in Octaves and Octaves supplement ranges.
 
     Requires additional (unencoded) letters to build 'loco' and 'bassa' glyphs.
     """
     for child, parents in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         complete = True
@@ -768,24 +758,15 @@ def octaves(glyphdata):
 
         for i, parent in enumerate(parents):
             # Define names of unencoded letters according to spec.
-            if parent == 'octaveC':
-                parent = helpers.configvalue('Octaves', 'c')
-            elif parent == 'octaveL':
-                parent = helpers.configvalue('Octaves', 'l')
-            elif parent == 'octaveO':
-                parent = helpers.configvalue('Octaves', 'o')
-            elif parent == 'octaveS':
-                parent = helpers.configvalue('Octaves', 's')
-
-            complete = helpers.check_complete(parent)
+            parent = _octave_letter(ctx, parent)
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
                 break
-            helpers.decompose(parent)
+            helpers.decompose(ctx, parent)
 
             # Define shift, spacing and kerning for fraction glyphs acc. to spec.
-            spacing = helpers.configvalue('Octaves', 'component spacing')
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+            spacing = helpers.configvalue(ctx, 'Octaves', 'component spacing')
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
 
             # Define horizontal shifts.
             dx = dy = 0
@@ -794,12 +775,13 @@ def octaves(glyphdata):
             new_width = sum(parent_widths)
 
             # Define vertical shift for superscript.
-            number_bbox = helpers.get_bbox('uniE510')
-            letter_bbox = helpers.get_bbox('uniEC91')
+            number_bbox = helpers.get_bbox(ctx, 'uniE510')
+            letter_bbox = helpers.get_bbox(ctx, 'uniEC91')
             super_height = (number_bbox.ur.y - letter_bbox.ur.y +
                             number_bbox.ll.y + helpers.configvalue(
-                                'Octaves', 'superscript height adjustment'))
-            super_kern = helpers.configvalue('Octaves', 'superscript kern')
+                                ctx, 'Octaves', 'superscript height adjustment'))
+            super_kern = helpers.configvalue(
+                ctx, 'Octaves', 'superscript kern')
 
             if child in {'uniE511', 'uniE515', 'uniE518', 'uniEC92',
                          'uniEC94', 'uniEC96', 'uniEC98'}:
@@ -816,13 +798,12 @@ def octaves(glyphdata):
                 new_glyph.components.append(item)
 
             metrics = Point(new_width, 0)
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
         else:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
 
 
-def dynamics(glyphdata):
+def dynamics(ctx, glyphdata):
     """Builds composites in Dynamics range.
 
     Uses sidebearings and any kerning pairs to space components.
@@ -830,7 +811,9 @@ def dynamics(glyphdata):
     """
 
     for child, parents in glyphdata.iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
         complete = True
@@ -838,31 +821,32 @@ def dynamics(glyphdata):
         components = []
 
         for i, parent in enumerate(parents):
-            complete = helpers.check_complete(parent)
+            complete = helpers.check_complete(ctx, parent)
             if not complete:
-                if not config.getboolean('Global', 'draw missing'):
-                    helpers.print_incomplete(parent)
+                if not ctx.config.draw_missing:
+                    helpers.print_incomplete(ctx, parent)
                     break
-                elif parent in {'uniE53E', 'uniE541'}:
-                    makers.dynamics(parent)
+                elif parent in DYNAMICS_DRAWN:
+                    makers.dynamics(ctx, parent)
                     complete = True
                 else:
-                    helpers.print_incomplete(child)
+                    helpers.print_incomplete(ctx, child)
                     break
 
-            helpers.decompose(parent)
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
+            helpers.decompose(ctx, parent)
+            parent_index, parent_glyph = helpers.lookup(ctx, parent)
             width = parent_glyph.width
             dx = dy = 0
 
             # Define shifts for letters based on width, spacing and kerning.
             if 'uniE53E' not in parents:
-                spacing = helpers.configvalue('Dynamics', 'component spacing')
+                spacing = helpers.configvalue(
+                    ctx, 'Dynamics', 'component spacing')
                 left = parents[i - 1]
                 right = parents[i]
                 # Exclude kerning for leftmost component
-                kerning = 0 if i == 0 else helpers.get_kerning(left, right)
+                kerning = 0 if i == 0 else helpers.get_kerning(
+                    ctx, left, right)
                 parent_widths.append(width + spacing + kerning)
 
                 dx = sum(parent_widths[:-1]) + kerning
@@ -877,7 +861,8 @@ def dynamics(glyphdata):
             elif i == 0:
                 components.append(Component(parent_index, Point(dx, dy)))
             else:
-                spacing = helpers.configvalue('Dynamics', 'hairpin spacing')
+                spacing = helpers.configvalue(
+                    ctx, 'Dynamics', 'hairpin spacing')
                 width = width * 2 + spacing
                 dx, sx, sy = width, -1, 1
                 components.append(Component(parent_index, Point(dx, dy),
@@ -888,11 +873,10 @@ def dynamics(glyphdata):
             for item in components:
                 new_glyph.components.append(item)
             metrics = Point(width, 0)
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
 
 
-def accordion_reg(glyphdata):
+def accordion_reg(ctx, glyphdata):
     """Builds registration composites in Accordion range.
 
     Placement schemes are defined by 'codes' derived from descriptions in
@@ -901,101 +885,123 @@ def accordion_reg(glyphdata):
 
     # for parent_data, child_data in glyphdata:
     for parent, value in glyphdata[0].iteritems():
-        complete = helpers.check_complete(parent)
+        complete = helpers.check_complete(ctx, parent)
         if not complete:
-            if not config.getboolean('Global', 'draw missing'):
+            if not ctx.config.draw_missing:
                 continue
             if parent == 'uniE8CA':
-                makers.coupler_dot(parent)
+                makers.coupler_dot(ctx, parent)
             else:
-                makers.ranks(parent)
+                makers.ranks(ctx, parent)
             complete = True
-        helpers.decompose(parent)
+        helpers.decompose(ctx, parent)
 
     for child, values in glyphdata[1].iteritems():
-        if helpers.check_excluded(child):
+        if helpers.check_excluded(ctx, child):
+            continue
+        if helpers.check_replaced(ctx, child):
             continue
 
-        components = []
         parent = values[0]
         placement = values[1:]
 
         if not complete:
-            helpers.print_incomplete(child)
+            helpers.print_incomplete(ctx, child)
             continue
 
-        for i, value in enumerate(placement):
-            # Calculates offsets for dot placement from reference values.
-            # Reference values provided in comments.
-            parent_index = f.FindGlyph(parent)
-            parent_glyph = f.glyphs[parent_index]
-            parent_bbox = parent_glyph.GetBoundingRect()
-
-            dot_index = f.FindGlyph('uniE8CA')
-            dot_glyph = f.glyphs[dot_index]
-            dot_bbox = dot_glyph.GetBoundingRect()
-
-            x, y = parent_bbox.width / 2, parent_bbox.height / 2
-            if value == 'stop4':
-                y = parent_bbox.height / 1.219
-                # 'stop4' = top of round ranks 3 (780/640)
-            elif value in {'upper8', 'master'}:
-                x = parent_bbox.width / 1.3
-                # 'upper8'/'master' = mid right of round ranks 2/3/4 (780/600)
-            elif value == 'lower8':
-                x = parent_bbox.width / 4.333
-                # 'lower8' = mid left of round ranks 3 (780/180)
-            elif value == 'stop16':
-                y = parent_bbox.height / 5.571
-                # 'stop16' = bottom of round ranks 3 (780/140)
-            elif value == 'soprano':
-                y = parent_bbox.height / 1.1624
-                # 'soprano' = top of ranks 4 (780/671)
-            elif value == 'alto':
-                y = parent_bbox.height / 1.612
-                # 'alto' = upper mid of ranks 4 (780/484)
-            elif value == 'tenor':
-                y = parent_bbox.height / 2.635
-                # 'tenor' = lower mid of ranks 4 (780/296)
-            elif value == 'bass':
-                y = parent_bbox.height / 7.156
-                # 'bass' = bottom of ranks 4 (780/109)
-            elif value == 'stop8b':
-                y = parent_bbox.height / 1.352
-                # 'stop8b' = top of ranks 2 (780/577)
-            elif value == 'stop16b':
-                y = parent_bbox.height / 3.842
-                # 'stop16b' = bottom of ranks 2 (780/203)
-            elif value in {'stop8c', 'left8stop', 'right8stop'}:
-                y = parent_bbox.height / 5.555
-                # 'stop8c' = bottom of square ranks 3 (750/135)
-            elif value == 'stop2':
-                y = parent_bbox.height / 1.22
-                # 'stop2' = top of square ranks 3 (750/615)
-            elif value == 'left8stop':
-                x = parent_bbox.width / 3.079
-                # 'left8stop' = bottom left half of square ranks 3 (625/203)
-                # (x = parent_bbox.width / 3 with 3% compensation <--> for
-                # 'left8stop' and 'right8stop')
-            elif value == 'right8stop':
-                x = parent_bbox.width / 1.481
-                # 'right8stop' = bottom right half of square ranks 3 (625/422)
-
-            # Adjust to dot center base and overshoot of round ranks glyphs.
-            x -= dot_bbox.width / 2
-            y -= dot_bbox.height / 2
-            if parent != 'uniE8C9':
-                y += helpers.configvalue('Accordion', 'round ranks overshoot')
-
-            components.append(Component(dot_index, Point(x, y)))
-            if i == 0:
-                components.append(Component(parent_index, Point(0, 0)))
+        # Place dots from reference values (see layout.REGISTRATION_DIVISORS),
+        # adjusted to overshoot of round ranks glyphs.
+        parent_index, parent_glyph = helpers.lookup(ctx, parent)
+        parent_bbox = helpers.get_bbox(ctx, parent)
+        dot_index, dot_glyph = helpers.lookup(ctx, 'uniE8CA')
+        dot_bbox = helpers.get_bbox(ctx, 'uniE8CA')
+        overshoot = 0
+        if parent != 'uniE8C9':
+            overshoot = helpers.configvalue(
+                ctx, 'Accordion', 'round ranks overshoot')
+        components = layout.components(dot_index, layout.registration_dots(
+            placement, parent_bbox, dot_bbox, overshoot))
+        components.insert(1, Component(parent_index, Point(0, 0)))
 
         new_glyph = Glyph()
         for item in components:
             new_glyph.components.append(item)
 
-        metrics = parent_glyph.GetMetrics()
+        metrics = helpers.get_metrics(ctx, parent)
         if child:
-            helpers.handle_replaced(child)
-            helpers.append_glyph(new_glyph, child, metrics)
+            helpers.append_glyph(ctx, new_glyph, child, metrics)
+
+
+# Parents drawn by .makers when missing, by builder. None means all parents.
+DRAWN = {
+    staves: None,
+    barlines: None,
+    stems: STEMS_DRAWN,
+    indv_notes: NOTES_DRAWN,
+    beamed_notes: BEAMED_NOTES_DRAWN,
+    dynamics: DYNAMICS_DRAWN,
+    accordion_reg: None,
+}
+
+# Builders that build composites from the parents present, as long as the
+# last parent is. Notes builders only do so when drawing missing parents.
+PARTIAL = {flags}
+PARTIAL_DRAWING = {indv_notes, beamed_notes}
+
+# Builders that stop at the first parent of a pair missing, drawn or not.
+STOPPING = {stems}
+
+
+def targets(ctx, builder, glyphdata):
+    """Returns (child, parents) pairs of builder and dataset, in order of
+    execution.
+
+    child is None for parents drawn or checked without building a composite.
+    Parents are checked in order, but only for children not excluded or
+    skipped. Parents may be None in straight flags sets, which are never
+    present.
+    """
+    if builder in {staves, tremolos}:
+        pairs = []
+        for parent, children in glyphdata.iteritems():
+            pairs.append((None, (parent,)))
+            pairs.extend((child, (parent,)) for child in children or ())
+        return pairs
+
+    if builder in {cut_time, mirror_time}:
+        pairs = []
+        for parent, child in glyphdata.iteritems():
+            if builder is cut_time or parent == 'uniE08B':
+                pairs.append((child, (parent, _cut_time_stroke(ctx, parent))))
+            else:
+                pairs.append((child, (parent,)))
+        return pairs
+
+    if builder is octaves:
+        return [(child, tuple(_octave_letter(ctx, parent)
+                              for parent in parents))
+                for child, parents in glyphdata.iteritems()]
+
+    if builder is time_ligatures:
+        ligatures = ctx.tables['ligatures']
+        return [(child, tuple(part for part, role in ligatures[child]))
+                for child in glyphdata]
+
+    if builder is stems:
+        stem = glyphdata[None]
+        return [(child, (parent, stem) if child else (parent,))
+                for child, parent in glyphdata.iteritems()]
+
+    if builder is accordion_reg:
+        ranks, registrations = glyphdata
+        pairs = [(None, (parent,)) for parent in ranks]
+        pairs.extend((child, (values[0], 'uniE8CA'))
+                     for child, values in registrations.iteritems())
+        return pairs
+
+    if builder is flags:
+        return [(child, tuple(parents))
+                for child, parents in glyphdata.iteritems()]
+
+    return [(child, tuple(parent for parent in parents if parent))
+            for child, parents in glyphdata.iteritems()]
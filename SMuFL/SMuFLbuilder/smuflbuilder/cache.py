@@ -0,0 +1,199 @@
+"""Build cache module for SMuFLbuilder.
+
+This module keeps a record of the composites built in a font, together with
+the inputs each composite consumed: the parent glyphs looked up and the config
+options read while building it (see helpers.lookup() and
+helpers.configvalue()). Inputs are recorded as fingerprints of glyph outlines
+and metrics, and as config values.
+
+On the next build, a preexisting composite that would be renamed or
+overwritten (see [Global][handle replaced]) is skipped if neither the
+composite itself nor any of its inputs has changed since. The cache is stored
+next to the font file, and is enabled by [Global][incremental build].
+
+Classes:
+
+Cache -- records of composites built and their inputs
+
+Functions:
+
+fingerprint() -- returns hash of glyph outline and metrics
+filename() -- returns cache filename of font, or None if unsaved
+load() -- reads cache of context font and returns Cache
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from ConfigParser import NoOptionError, NoSectionError
+import hashlib
+import json
+import os
+
+from smuflbuilder import helpers
+
+# Increased when fingerprints or records change format.
+VERSION = 1
+
+
+class Cache(object):
+    """Records of composites built in font, and their inputs.
+
+    Tracks inputs of one target glyph at a time, from begin() until the glyph
+    is staged (see record()).
+    """
+
+    def __init__(self, path, version=None, records=None):
+        self.path = path
+        self.version = version
+        self.records = records or {}  # glyphname: record of last build.
+        self.built = {}  # glyphname: (parents, options) built in this run.
+        self.target = None  # glyphname tracked, or None.
+        self.parents = set()
+        self.options = {}
+
+    def begin(self, name):
+        """Starts tracking inputs of target glyphname."""
+        self.target = name
+        self.parents = set()
+        self.options = {}
+
+    def use_glyph(self, name):
+        """Adds glyphname to inputs of tracked glyph."""
+        if self.target is not None:
+            self.parents.add(name)
+
+    def use_option(self, section, option, value):
+        """Adds config option and value to inputs of tracked glyph."""
+        if self.target is not None:
+            self.options[(section, option)] = value
+
+    def record(self, name):
+        """Stops tracking and stores inputs, if name is tracked glyph."""
+        if name != self.target:
+            return
+        self.parents.discard(name)
+        self.built[name] = (sorted(self.parents),
+                            sorted(self.options.items()))
+        self.target = None
+
+    def inputs(self, name):
+        """Returns glyphnames of parents recorded for glyphname."""
+        record = self.records.get(name)
+        return record['parents'].keys() if record else []
+
+    def is_current(self, ctx, name):
+        """Returns True if glyph and its inputs are unchanged since built."""
+        record = self.records.get(name)
+        if record is None:
+            return False
+        glyph = helpers.lookup(ctx, name)[1]
+        if glyph is None or fingerprint(ctx, glyph) != record['glyph']:
+            return False
+        for parent, value in record['parents'].iteritems():
+            glyph = helpers.lookup(ctx, parent)[1]
+            if glyph is None or fingerprint(ctx, glyph) != value:
+                return False
+        for section, option, value in record['options']:
+            try:
+                if ctx.config.value(section, option) != value:
+                    return False
+            except (NoSectionError, NoOptionError):
+                return False
+        return True
+
+    def update(self, ctx):
+        """Replaces records of glyphs built in this run.
+
+        Fingerprints glyphs as they are in font after build, so that
+        decomposed parents compare equal on next build.
+        """
+        for name, (parents, options) in self.built.iteritems():
+            glyph = helpers.lookup(ctx, name)[1]
+            if glyph is None:
+                self.records.pop(name, None)
+                continue
+            fingerprints = {}
+            for parent in parents:
+                parent_glyph = helpers.lookup(ctx, parent)[1]
+                if parent_glyph is not None:
+                    fingerprints[parent] = fingerprint(ctx, parent_glyph)
+            self.records[name] = {
+                'glyph': fingerprint(ctx, glyph),
+                'parents': fingerprints,
+                'options': [[section, option, value]
+                            for (section, option), value in options],
+            }
+        self.built = {}
+
+    def save(self):
+        """Writes cache to file, unless font has no file."""
+        if self.path is None:
+            return
+        with open(self.path, 'w') as f:
+            json.dump({'version': self.version, 'records': self.records}, f,
+                      sort_keys=True, separators=(',', ':'))
+
+
+def _version(ctx):
+    """Returns cache version of build, including settings and kerning
+    classes that apply to every glyph."""
+    config = ctx.config
+    classes = hashlib.md5(repr(list(ctx.font.classes))).hexdigest()
+    return [VERSION, ctx.space, config.mark_colour, config.draw_missing,
+            classes]
+
+
+def fingerprint(ctx, glyph):
+    """Returns hash of glyph outline, components, anchors and metrics.
+
+    Components and kerning pairs are identified by glyphname rather than
+    index.
+    """
+    glyphs = ctx.font.glyphs
+
+    def name(index):
+        if 0 <= index < len(glyphs):
+            return glyphs[index].name
+        staged = index - ctx.batch.base
+        if 0 <= staged < len(ctx.batch.appended):
+            return ctx.batch.appended[staged][1]
+        return None
+
+    data = (
+        glyph.width, glyph.height,
+        [(node.type, [(point.x, point.y) for point in node.points])
+         for node in glyph.nodes],
+        [(name(component.index), component.delta.x, component.delta.y,
+          component.scale.x, component.scale.y)
+         for component in glyph.components],
+        [(anchor.name, anchor.x, anchor.y) for anchor in glyph.anchors],
+        [(name(pair.key), pair.value) for pair in glyph.kerning],
+    )
+    return hashlib.md5(repr(data)).hexdigest()
+
+
+def filename(font):
+    """Returns cache filename next to font file, or None if unsaved."""
+    if not font.file_name:
+        return None
+    return os.path.splitext(font.file_name)[0] + '.smuflbuilder.json'
+
+
+def load(ctx, rebuild=False):
+    """Reads cache of context font and returns Cache.
+
+    Returns empty cache if rebuild, or if file is missing, unreadable or
+    written with other settings or kerning classes.
+    """
+    path = filename(ctx.font)
+    version = _version(ctx)
+    if rebuild or path is None or not os.path.exists(path):
+        return Cache(path, version)
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except ValueError:
+        return Cache(path, version)
+    if raw.get('version') != version:
+        return Cache(path, version)
+    return Cache(path, version, raw.get('records'))
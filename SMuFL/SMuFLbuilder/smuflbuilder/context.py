@@ -0,0 +1,65 @@
+"""Build context module for SMuFLbuilder.
+
+A Context carries the font, the settings and the derived constants of a
+single build, as well as the per-build state kept by .helpers, the build
+cache (see .cache), timings and counters (see .stats), messages (see .log)
+and the batch of changes staged for the font (see .batch). It is created
+once per font and passed explicitly to runner, builders, makers and
+helpers, so that one process may build several fonts one after another.
+
+Classes:
+
+Context -- font, settings and state of a single build
+
+Functions:
+
+create() -- reads settings and returns Context for font
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from smuflbuilder import batch
+from smuflbuilder import filepaths
+from smuflbuilder import log
+from smuflbuilder import settings
+from smuflbuilder import stats
+from smuflbuilder import tables
+
+
+class Context(object):
+    """Font, settings and state of a single build.
+
+    space is one staff space in font units (upm/4), according to the SMuFL
+    specification.
+    """
+
+    def __init__(self, font, config):
+        self.font = font
+        self.config = config
+        self.space = config.space
+        self.tables = tables.load()  # Lookup tables of .data (see .tables).
+
+        # Per-build state maintained by .helpers.
+        self.glyph_index = None  # dict of glyphname: (index, glyph) pairs.
+        self.kerning_index = None  # dict of (index, index): kerning value.
+        self.checked = set()  # glyphnames reported missing.
+        self.flattened = set()  # glyphnames checked by decompose().
+        self.decomposed = set()  # glyphnames decomposed by decompose().
+        self.geometry = {}  # (glyphname, kind): bounding box or metrics.
+        self.replacing = {}  # glyphname: action decided by .planner.
+        self.plan = None  # Plan of build (see .planner).
+        self.touched = set()  # indexes of preexisting glyphs changed.
+        self.cache = None  # Build cache of font (see .cache), if enabled.
+        self.stats = stats.Stats()  # Timings and counters (see .stats).
+        self.log = log.create(config, font)  # Messages (see .log).
+        self.batch = batch.Batch(self)  # Staged changes of current range.
+
+
+def create(font, filenames=None):
+    """Reads settings and returns Context for font.
+
+    Reads default and user settings in filepaths, unless filenames is given.
+    """
+    if filenames is None:
+        filenames = [filepaths.defaults, filepaths.user]
+    return Context(font, settings.load(font.upm / 4, filenames))
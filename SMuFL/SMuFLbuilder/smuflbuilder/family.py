@@ -0,0 +1,211 @@
+"""Family module for SMuFLbuilder.
+
+Builds several fonts in one go, e.g. the masters of a font family or its
+optical sizes. Each font is built with the default and user settings, and
+with settings of its own on top, overriding them. Settings of a font are
+read from '<font>.smuflbuilder.ini' next to the font file if it exists, or
+from the file given after the font name on the command line:
+
+python -m smuflbuilder.family main.json text.json=text.ini ...
+                              [-s settings.ini] [-o folder] [-j jobs]
+                              [--rebuild] [--report report.json]
+
+Outside FontLab, fonts are built in up to jobs processes, one font per
+process (defaults to one per CPU), and ranges of each font one after
+another. Messages of each font are printed together once the font is done,
+followed by a table of all fonts. With --report, timings and counters of
+every font (see .stats) are written as JSON. Fonts failing to build are
+reported without stopping the others.
+
+Inside FontLab, build_open_fonts() builds all open fonts one after another
+(see the SMuFLbuilder Family macro).
+
+Functions:
+
+font_settings() -- returns settings filenames of font
+build_font() -- builds font file and returns result
+build_open_fonts() -- builds all fonts open in FontLab
+summary() -- returns results of fonts as printable text
+main() -- builds fonts from command line
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from cStringIO import StringIO
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+from smuflbuilder import context
+from smuflbuilder import filepaths
+from smuflbuilder import runner
+from smuflbuilder.backend import *
+
+# Counters of summary table (see .stats).
+SUMMARIZED = ('appended', 'renamed', 'overwritten', 'skipped', 'incomplete')
+
+
+def font_settings(font_file, settings_file=None, user=None):
+    """Returns settings filenames of font, in order of precedence.
+
+    Default and user settings are followed by settings_file, or by
+    '<font>.smuflbuilder.ini' next to font file if it exists.
+    """
+    defaults = os.path.join(os.path.dirname(filepaths.__file__),
+                            'defaults.ini')
+    filenames = [defaults, os.path.expanduser(user or filepaths.user)]
+    if settings_file is None and font_file:
+        own = os.path.splitext(font_file)[0] + '.smuflbuilder.ini'
+        if os.path.exists(own):
+            settings_file = own
+    if settings_file:
+        filenames.append(os.path.expanduser(settings_file))
+    return filenames
+
+
+def build_font(font_file, filenames, output=None, rebuild=False):
+    """Builds font file with settings filenames and saves it to output.
+
+    Returns dict of font, output, settings, time, stats report, printed
+    output and any error. Output defaults to overwriting font file.
+    """
+    start = time.time()
+    stdout, sys.stdout = sys.stdout, StringIO()
+    report, error = None, None
+    try:
+        font = load_font(font_file)
+        ctx = context.create(font, filenames)
+        runner.main(ctx, processes=1, rebuild=rebuild)
+        report = ctx.stats.report()
+        save_font(font, output or font_file)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        printed, sys.stdout = sys.stdout.getvalue(), stdout
+    return {
+        'font': font_file,
+        'output': output or font_file,
+        'settings': filenames,
+        'time': time.time() - start,
+        'report': report,
+        'printed': printed,
+        'error': error,
+    }
+
+
+def _build_job(args):
+    """Runs build_font() in worker process."""
+    return build_font(*args)
+
+
+def build_open_fonts():
+    """Builds all fonts open in FontLab, one after another.
+
+    Settings of each font are read as in font_settings().
+    """
+    for index in range(len(fl)):
+        fl.ifont = index
+        font = fl[index]
+        print('\n{} ...'.format(font.font_name))
+        runner.main(context.create(font, font_settings(font.file_name)))
+
+
+def summary(results):
+    """Returns table of results, one line per font and totals."""
+    header = ['font', 'time'] + list(SUMMARIZED) + ['status']
+    rows = []
+    totals = dict.fromkeys(SUMMARIZED, 0)
+    for result in results:
+        counters = result['report']['counters'] if result['report'] else {}
+        for counter in SUMMARIZED:
+            totals[counter] += counters.get(counter, 0)
+        rows.append([os.path.basename(result['font']),
+                     '{:.3f}'.format(result['time'])] +
+                    [str(counters.get(counter, 0)) for counter in SUMMARIZED] +
+                    ['failed' if result['error'] else 'done'])
+    failed = sum(1 for result in results if result['error'])
+    rows.append(['total', '{:.3f}'.format(sum(result['time']
+                                              for result in results))] +
+                [str(totals[counter]) for counter in SUMMARIZED] +
+                ['{} failed'.format(failed) if failed else 'done'])
+    widths = [max(len(row[i]) for row in rows + [header])
+              for i in range(len(header))]
+    lines = []
+    for row in [header] + rows:
+        cells = [row[0].ljust(widths[0])]
+        cells.extend(cell.rjust(width)
+                     for cell, width in zip(row[1:-1], widths[1:-1]))
+        cells.append(row[-1].ljust(widths[-1]))
+        lines.append('  '.join(cells).rstrip())
+    return '\n'.join(lines)
+
+
+def parse_args():
+    """Returns parsed command line arguments."""
+    parser = argparse.ArgumentParser(prog='smuflbuilder.family')
+    parser.add_argument('fonts', nargs='+', metavar='font[=settings]',
+                        help='font file (.json), optionally followed by '
+                             'settings file (.ini) of font')
+    parser.add_argument('-s', '--settings', default=filepaths.user,
+                        help='user settings file (smuflbuilder.ini)')
+    parser.add_argument('-o', '--output',
+                        help='output folder (defaults to overwriting fonts)')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='number of processes (defaults to CPU count)')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='ignore build caches and replace all glyphs')
+    parser.add_argument('--report',
+                        help='write results of all fonts to file (.json)')
+    return parser.parse_args()
+
+
+def main():
+    """Builds fonts in process pool, prints and reports results.
+
+    Exits with status 1 if any font failed.
+    """
+    args = parse_args()
+    if not HEADLESS:
+        raise Exception('Please run the SMuFLbuilder Family macro!')
+    jobs = []
+    for item in args.fonts:
+        font_file, _, settings_file = item.partition('=')
+        output = None
+        if args.output:
+            output = os.path.join(args.output, os.path.basename(font_file))
+        jobs.append((font_file, font_settings(
+            font_file, settings_file or None, args.settings), output,
+            args.rebuild))
+
+    processes = min(args.jobs or multiprocessing.cpu_count(), len(jobs))
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_build_job, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_build_job(job) for job in jobs]
+
+    for result in results:
+        print('\n=== {} ==='.format(result['font']))
+        sys.stdout.write(result['printed'])
+        if result['error']:
+            print(result['error'])
+    print('\n' + summary(results))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'fonts': results}, f, sort_keys=True, indent=1,
+                      separators=(',', ': '))
+            f.write('\n')
+    if any(result['error'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,143 +2,250 @@
 
 This module contains various helper functions for SMuFL builder.
 They are mainly called by the various type-/range-specific funtions in
-.builders and .makers. Many functions rely on user-defined values from
-config, and some imports data from .data. Additionally, strftime() and
+.builders and .makers. Most functions take the build context (see .context)
+as first argument, relying on its font, user-defined values from config and
+per-build state. Some import data from .data. Additionally, strftime() and
 .math are imported to aid particular functions.
 
 Functions:
 
+index_glyphs() -- builds glyph name index from font
+lookup() -- returns index and glyph object from glyphname
+has_glyph() -- checks glyph name index for glyphname
 configvalue() -- returns config value format, depending on cofig. setting
 check_excluded() -- checks config [Excluded] for name and returns boolean
 check_complete() -- checks glyph presence in font. Informs and returns boolean
-def decompose() -- decomposes preexisting components used in building
+decompose() -- stages decomposition of components used in building
+print_decomposed() -- logs summary of decomposed glyphs
 get_bbox() -- gets glyph bounding box from glyphname
+get_metrics() -- gets glyph metrics from glyphname
+forget_geometry() -- discards measured bounding box and metrics of glyphname
+index_kerning() -- builds kerning pair index from font, expanding classes
 get_kerning() -- gets kerning value from glyph pair
 compile_part_data() -- 'data compiler' for drawing accordion ranks correctly
 timestamp() -- creates strftime-friendly timestamp from config
-handle_replaced() -- applies timestamp + unicode 0 and/or returns boolean
-append_glyph() -- applies name, unicode and mark before appending glyph to font
-print_incomplete(name) -- returns print statement for incomplete composites
+replace_action() -- decides action for target glyph from config
+check_replaced() -- checks if preexisting glyph is skipped and returns boolean
+append_glyph() -- applies name, unicode, mark and action before staging glyph
+print_incomplete() -- logs and counts incomplete composites
 """
 
 # (c) 2021 by Knut Nergaard.
 
-from ConfigParser import SafeConfigParser
 from time import localtime, strftime
 import math
-import re
-
-from FL import *
 
 from smuflbuilder import data
-from smuflbuilder import filepaths
 
-f = fl.font
-config = SafeConfigParser()
-config.read(filepaths.defaults)
-config.read(filepaths.user)
-checked = set()  # global set to check execution of local processes.
+# Actions for target glyphs, decided by replace_action().
+NEW, SKIP, RENAME, OVERWRITE = 'new', 'skip', 'rename', 'overwrite'
+# Actions for preexisting glyphs by [Global][handle replaced] value.
+REPLACE_ACTIONS = (SKIP, RENAME, OVERWRITE)
 
-SPACE = f.upm / 4
 
+def index_glyphs(ctx):
+    """Builds glyph_index of glyphnames in context font.
+
+    Maps each glyphname to its index and glyph object. The first glyph of any
+    duplicate name is indexed, as returned by FindGlyph().
+    """
+    ctx.glyph_index = {}
+    for index, glyph in enumerate(ctx.font.glyphs):
+        ctx.glyph_index.setdefault(glyph.name, (index, glyph))
 
-def configvalue(section, option):
-    """Returns config option value as 'staff spaces', font units or str().
 
-    Determines numerical type from [Global][values in staff spaces].
-    String is returned if float/int is False.
-    Exceptions enclosed in parenthesis are stripped and converted to numbers.
+def lookup(ctx, name):
+    """Returns (index, glyph) of glyphname, or (-1, None) if not in font.
 
-    'staff spaces' is defined as font upm/4', according to SMuFL specification,
-    in constant SPACE.
+    Builds glyph_index on first call. Adds glyphname to inputs tracked by
+    build cache (see .cache).
     """
-    try:
-        if config.getboolean('Global', 'values in staff spaces'):
-            return int(config.getfloat(section, option) * SPACE)
-        return (config.getint(section, option))
-    except ValueError:
-        string = config.get(section, option)
-        # Regex to earch for numbers or period in parenthesis.
-        if not re.search(r'\([0-9]|[0-9][.]\)', string):
-            return string
-        if config.getboolean('Global', 'values in staff spaces'):
-            return int(float(string.strip('()')))
-        return int(float(string.strip('()')) * SPACE)
+    if ctx.glyph_index is None:
+        index_glyphs(ctx)
+    ctx.stats.count('lookups')
+    if ctx.cache is not None:
+        ctx.cache.use_glyph(name)
+    return ctx.glyph_index.get(name, (-1, None))
+
+
+def has_glyph(ctx, name):
+    """Returns True if glyphname is in font."""
+    return lookup(ctx, name)[1] is not None
+
+
+def configvalue(ctx, section, option):
+    """Returns config option value as 'staff spaces', font units or str().
+
+    Values are converted once, when settings are loaded (see .settings).
+    Adds option to inputs tracked by build cache (see .cache).
+    """
+    value = ctx.config.value(section, option)
+    if ctx.cache is not None:
+        ctx.cache.use_option(section, option, value)
+    return value
 
 
-def check_excluded(name):
+def check_excluded(ctx, name):
     """Checks input against list of excluded glyphs in config file.
 
-    Prints message if matched and returns boolean to skip/proceed.
+    Logs message if matched and returns boolean to skip/proceed.
     """
     try:
-        if not config.has_option('Exclude', name):
+        if name.lower() not in ctx.config.excluded:
             return False
-        elif not config.getboolean('Exclude', name):
-            return False
-        else:
-            print('Skipping excluded glyph: {}'.format(name))
-            return True
+        ctx.stats.count('excluded')
+        ctx.log.detail('Skipping excluded glyph: {}', name)
+        return True
     except AttributeError:
         return False
 
 
-def check_complete(name):
+def check_complete(ctx, name):
     """Checks if glyph in font, informs and returns boolean to skip/proceed.
 
-    Avoids repeated messaging by adding glyphaname to global set checked and
+    Avoids repeated messaging by adding glyphaname to context set checked and
     checking set for name on further iterations.
     """
-    global checked
-    if f.has_key(name):
+    if has_glyph(ctx, name):
         return True
-    elif name not in checked:
-        print('\nParent glyph {} is missing!'.format(name))
-        checked.add(name)
+    elif name not in ctx.checked:
+        ctx.log.detail('\nParent glyph {} is missing!', name)
+        ctx.checked.add(name)
     return False
 
 
-def decompose(name):
-    """Decomposes preexisting components."""
-    for g in f.glyphs:
-        num_of_comps = len(g.components)
-        if g.name in data.do_not_decompose:
-            return
-        elif g.name == name and num_of_comps > 0:
-            g.Decompose()
-            print('Decomposing: {}'.format(g.name))
+def decompose(ctx, name):
+    """Decomposes preexisting components when batch is committed.
+
+    Skips glyphs in data.do_not_decompose and glyphs already checked during
+    build, by adding glyphname to context set flattened.
+    """
+    if name in ctx.flattened or name in data.do_not_decompose:
+        return
+    ctx.flattened.add(name)
+    index, glyph = lookup(ctx, name)
+    if glyph is not None and len(glyph.components) > 0:
+        ctx.batch.decompose(index, name)
+        ctx.decomposed.add(name)
+
+
+def print_decomposed(ctx):
+    """Logs number of decomposed vs. checked parent glyphs."""
+    ctx.log.info('\nDecomposed {} of {} parent glyphs.', len(ctx.decomposed),
+                 len(ctx.flattened))
 
 
-def get_bbox(name):
-    """Returns bounding box of specified glyph."""
-    if f.has_key(name):
-        index = f.FindGlyph(name)
-        glyph = f.glyphs[index]
-        return glyph.GetBoundingRect()
-    return None
+def get_bbox(ctx, name):
+    """Returns bounding box of specified glyph, or None if not in font.
+
+    Measured once per build (see _measure()). Must not be modified.
+    """
+    return _measure(ctx, name, 'bbox')
 
 
-def get_kerning(left, right):
-    """gets kerning value from left and right (parent and key) names."""
-    left_index = f.FindGlyph(left)
-    right_index = f.FindGlyph(right)
-    kerning = f.glyphs[left_index].kerning
-    for pair in kerning:
-        if kerning and pair.value and right_index == pair.key:
-            return pair.value
-    return 0
+def get_metrics(ctx, name):
+    """Returns metrics of specified glyph, or None if not in font.
 
+    Measured once per build (see _measure()). Must not be modified.
+    """
+    return _measure(ctx, name, 'metrics')
 
-def compile_part_data(name):
+
+def _measure(ctx, name, kind):
+    """Returns bounding box or metrics of glyphname from context geometry.
+
+    Measures glyph on first call, and again after forget_geometry().
+    """
+    glyph = lookup(ctx, name)[1]
+    if glyph is None:
+        return None
+    key = (name, kind)
+    if key not in ctx.geometry:
+        if kind == 'bbox':
+            ctx.geometry[key] = glyph.GetBoundingRect()
+        else:
+            ctx.geometry[key] = glyph.GetMetrics()
+    return ctx.geometry[key]
+
+
+def forget_geometry(ctx, name):
+    """Discards measurements of glyphname, when glyph is rewritten."""
+    ctx.geometry.pop((name, 'bbox'), None)
+    ctx.geometry.pop((name, 'metrics'), None)
+
+
+def index_kerning(ctx):
+    """Builds kerning_index of (left index, right index): value pairs.
+
+    Pairs between key glyphs of kerning classes (named '_...' in
+    font.classes, key glyph marked with an apostrophe or first) are expanded
+    to all members of the classes. Pairs of the glyphs themselves take
+    precedence over expanded pairs, and the first pair of each glyph over
+    later ones. Pairs with value 0 are ignored.
+    """
+    pairs = {}
+    for index, glyph in enumerate(ctx.font.glyphs):
+        for pair in glyph.kerning:
+            if pair.value:
+                pairs.setdefault((index, pair.key), pair.value)
+    left_members, right_members = _kerning_classes(ctx)
+    ctx.kerning_index = {}
+    for (left, right), value in pairs.iteritems():
+        for member in left_members.get(left, ()):
+            for other in right_members.get(right, (right,)):
+                ctx.kerning_index.setdefault((member, other), value)
+        for other in right_members.get(right, ()):
+            ctx.kerning_index.setdefault((left, other), value)
+    ctx.kerning_index.update(pairs)
+
+
+def _kerning_classes(ctx):
+    """Returns dicts of key glyph index: member indexes of kerning classes.
+
+    Returns (left, right) classes. Classes apply to both sides, unless the
+    font tells otherwise (FontLab's GetClassLeft() and GetClassRight()).
+    """
+    font = ctx.font
+    left, right = {}, {}
+    for i, text in enumerate(font.classes):
+        name, separator, names = text.partition(':')
+        names = names.split()
+        if not separator or not name.strip().startswith('_') or not names:
+            continue
+        key = next((n for n in names if n.endswith("'")), names[0])
+        members = [lookup(ctx, n.rstrip("'"))[0] for n in names]
+        members = [index for index in members if index >= 0]
+        key_index = lookup(ctx, key.rstrip("'"))[0]
+        if key_index < 0:
+            continue
+        if not hasattr(font, 'GetClassLeft') or font.GetClassLeft(i):
+            left[key_index] = members
+        if not hasattr(font, 'GetClassRight') or font.GetClassRight(i):
+            right[key_index] = members
+    return left, right
+
+
+def get_kerning(ctx, left, right):
+    """Gets kerning value from left and right (parent and key) names.
+
+    Builds kerning_index on first call.
+    """
+    if ctx.kerning_index is None:
+        index_kerning(ctx)
+    pair = lookup(ctx, left)[0], lookup(ctx, right)[0]
+    return ctx.kerning_index.get(pair, 0)
+
+
+def compile_part_data(ctx, name):
     """Compiles data to correctly draw rank partitions.
 
     Calculates correct length of partition lines (tangents) and determines
     their vertical position based on frame diameter/width and height.
     """
-    radius = configvalue('Accordion', 'round ranks radius')
-    overshoot = configvalue('Accordion', 'round ranks overshoot')
-    thickness = configvalue('Accordion', 'ranks line thickness')
-    width = configvalue('Accordion', 'square ranks width')
+    radius = configvalue(ctx, 'Accordion', 'round ranks radius')
+    overshoot = configvalue(ctx, 'Accordion', 'round ranks overshoot')
+    thickness = configvalue(ctx, 'Accordion', 'ranks line thickness')
+    width = configvalue(ctx, 'Accordion', 'square ranks width')
 
     def calculate_tangent(radius, position):
         """Calculates tangent length at given position accross diameter."""
@@ -150,7 +257,7 @@ def compile_part_data(name):
         """Determines vertical positions to draw rank partitions."""
         height = (radius + overshoot) * 2
         if name == 'uniE8C9':
-            height = configvalue('Accordion', 'square ranks height')
+            height = configvalue(ctx, 'Accordion', 'square ranks height')
         increment = (height / data.accordion_ranks[name])
         start = increment + thickness / 2
         end = start * data.accordion_ranks[name] - thickness * 2
@@ -166,57 +273,70 @@ def compile_part_data(name):
     return zip(compile_positions(name), compile_lengths(name))
 
 
-def timestamp():
-    """Creates strftime-friendly user-specified timestamp.
+def timestamp(ctx):
+    """Creates user-specified timestamp.
 
-    Restricts character usage to ensure correct formatting and informs if
-    invalid. prepends each character in raw stamp with modulus (%) to make
-    readable by strftime.
+    Format is validated and made strftime-friendly when settings are loaded.
     """
-    raw = config.get('Global', 'timestamp')
-    allowed = {'Y', 'm', 'd', 'H', 'M', 'S', '.', ':', '-', '_'}
-    stamp_set = {item for item in raw}
-    # Raise error if timestamp in config contains invalid characters.
-    if not allowed.issuperset(stamp_set):
-        raise ValueError('Please choose a valid setting for [Global]'
-                         '[timestamp] in file:\n{}!'.format(filepaths.user))
-    # Prepend each character with % to make strftime-friendly.
-    stampform = '%' + '%'.join(raw)
-    return strftime(stampform, localtime())
+    return strftime(ctx.config.stampform, localtime())
 
 
-def handle_replaced(name):
-    """Checks for preexisting glyphs and validity of [Global][handle replaced].
+def replace_action(ctx, name, exists=None):
+    """Returns action for glyphname according to [Global][handle replaced].
 
-    Appends timestamp to name and/or returns boolean to skip or append glyph,
-    depending on setting in config.
+    Returns NEW if glyph is not in font (or not exists), otherwise SKIP,
+    RENAME or OVERWRITE.
     """
-    option = config.getint('Global', 'handle replaced')
-    if option > 2:
-        raise ValueError('Please choose a valid setting for [Global]'
-                         '[handle replaced] in file:\n{}!'.format(filepaths.user))
-    if not f.has_key(name):
-        return
-    elif option == 0:
+    if exists is None:
+        exists = has_glyph(ctx, name)
+    if not exists:
+        return NEW
+    return REPLACE_ACTIONS[ctx.config.handle_replaced]
+
+
+def check_replaced(ctx, name):
+    """Checks if preexisting glyph is to be skipped.
+
+    Uses action decided up front by .planner, or decides it now. Glyphs to be
+    replaced are skipped as well if unchanged since last build (see .cache).
+    Logs message if skipped and returns boolean to skip/proceed. Actions of
+    glyphs not appended by the end of the range are removed by the batch.
+    """
+    if name is None:
         return False
-    elif option == 1:
-        from time import localtime, strftime
-        index = f.FindGlyph(name)
-        old_glyph = f.glyphs[index]
-        old_glyph.name = '{}_{}'.format(old_glyph.name, timestamp())
-        old_glyph.unicode = 0
+    if name not in ctx.replacing:
+        ctx.replacing[name] = replace_action(ctx, name)
+    if ctx.replacing[name] == SKIP:
+        del ctx.replacing[name]
+        ctx.stats.count('skipped')
+        ctx.log.detail('Skipping preexisting: {}', name)
         return True
-    return True
+    if ctx.cache is not None:
+        if ctx.replacing[name] != NEW and ctx.cache.is_current(ctx, name):
+            del ctx.replacing[name]
+            ctx.stats.count('skipped')
+            ctx.log.detail('Skipping unchanged: {}', name)
+            return True
+        ctx.cache.begin(name)
+    ctx.batch.pending.add(name)
+    return False
 
 
-def append_glyph(glyph, name, metrics):
-    """Appends new glyphs with mark colour if handle_replaced() is True.
+def append_glyph(ctx, glyph, name, metrics):
+    """Stages new glyph with mark colour, replacing any preexisting glyph.
 
-    Prints message if False and sets unicode to 0 for stylistic alternates and
-    non-conventional glyphnames.
+    Applies action decided by .planner, or decides it now: appends
+    timestamp and sets unicode 0 on preexisting glyph (RENAME), or assigns
+    new glyph to it (OVERWRITE). Sets unicode to 0 for stylistic alternates
+    and non-conventional glyphnames.
     """
-    if handle_replaced(name) is False:
-        print('Skipping preexisting: {}'.format(name))
+    action = ctx.replacing.pop(name, None)
+    ctx.batch.pending.discard(name)
+    if action is None or action == NEW and has_glyph(ctx, name):
+        action = replace_action(ctx, name)
+    if action == SKIP:
+        ctx.stats.count('skipped')
+        ctx.log.detail('Skipping preexisting: {}', name)
         return
 
     glyph.name = name
@@ -225,12 +345,33 @@ def append_glyph(glyph, name, metrics):
     # exception to handle names with alt. suffixes
     except ValueError:
         glyph.unicode = 0
-    glyph.mark = config.getint('Global', 'mark colour')
+    glyph.mark = ctx.config.mark_colour
     glyph.SetMetrics(metrics)
-    f.glyphs.append(glyph)
-    print('Appending: {}'.format(name))
-
-
-def print_incomplete(name):
-    """Print statement for incomplete composites in builders."""
-    print('Skipping incomplete composite: {}'.format(name))
+    ctx.flattened.discard(name)
+    forget_geometry(ctx, name)
+    if ctx.cache is not None:
+        ctx.cache.record(name)
+
+    if action == OVERWRITE:
+        index = lookup(ctx, name)[0]
+        ctx.batch.overwrite(index, glyph, name)
+        ctx.glyph_index[name] = (index, glyph)
+        return
+    if action == RENAME:
+        index, old_glyph = lookup(ctx, name)
+        new_name = '{}_{}'.format(name, timestamp(ctx))
+        forget_geometry(ctx, new_name)
+        ctx.batch.rename(index, old_glyph, new_name)
+        # Move index entry to new name.
+        del ctx.glyph_index[name]
+        ctx.glyph_index.setdefault(new_name, (index, old_glyph))
+    index = ctx.batch.append(glyph, name)
+    # Index staged glyph by its future index.
+    if ctx.glyph_index is not None:
+        ctx.glyph_index.setdefault(name, (index, glyph))
+
+
+def print_incomplete(ctx, name):
+    """Logs message of incomplete composites in builders."""
+    ctx.stats.count('incomplete')
+    ctx.log.detail('Skipping incomplete composite: {}', name)
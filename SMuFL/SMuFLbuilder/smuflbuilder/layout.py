@@ -0,0 +1,124 @@
+"""Layout module for SMuFLbuilder.
+
+This module computes the placement of components in composites, without
+reference to a font. A layout is a list of (dx, dy, sx, sy) tuples, one per
+component, which builders turn into Component objects with components().
+Layouts may thus be computed, compared and timed from dimensions and config
+values alone. Builders compute them per composite, as dimensions are taken
+from the parents of each.
+
+Functions:
+
+mirrored() -- returns layout of shifts mirrored around baseline
+staff_lines() -- returns layout of staff lines
+tremolo_slashes() -- returns layout of tremolo slashes
+divisi_dots() -- returns layout and width of divisi dots
+flag_stack() -- returns layout of stacked flags
+registration_dots() -- returns layout of accordion registration dots
+components() -- returns components of layout referring to glyph index
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from smuflbuilder.backend import *
+
+# Accordion registration value: (x, y) divisors of parent bounding box.
+# None is the center of the parent (width or height / 2).
+REGISTRATION_DIVISORS = {
+    'stop4': (None, 1.219),  # top of round ranks 3 (780/640)
+    'upper8': (1.3, None),  # mid right of round ranks 2/3/4 (780/600)
+    'master': (1.3, None),
+    'lower8': (4.333, None),  # mid left of round ranks 3 (780/180)
+    'stop16': (None, 5.571),  # bottom of round ranks 3 (780/140)
+    'soprano': (None, 1.1624),  # top of ranks 4 (780/671)
+    'alto': (None, 1.612),  # upper mid of ranks 4 (780/484)
+    'tenor': (None, 2.635),  # lower mid of ranks 4 (780/296)
+    'bass': (None, 7.156),  # bottom of ranks 4 (780/109)
+    'stop8b': (None, 1.352),  # top of ranks 2 (780/577)
+    'stop16b': (None, 3.842),  # bottom of ranks 2 (780/203)
+    'stop8c': (None, 5.555),  # bottom of square ranks 3 (750/135)
+    # 'left8stop'/'right8stop' = bottom left/right half of square ranks 3
+    # (625/203, 625/422) would be x = width / 3.079 and / 1.481, but have
+    # always been placed as 'stop8c'.
+    'left8stop': (None, 5.555),
+    'right8stop': (None, 5.555),
+    'stop2': (None, 1.22),  # top of square ranks 3 (750/615)
+}
+
+
+def mirrored(offsets, dx=0):
+    """Returns layout of vertical offsets, each above 0 mirrored below."""
+    result = []
+    for dy in offsets:
+        result.append((dx, dy, 1, 1))
+        if dy > 0:
+            result.append((dx, -dy, 1, 1))
+    return result
+
+
+def staff_lines(space, num_of_lines):
+    """Returns layout of staff lines, centered on baseline.
+
+    Lines with an even number are placed half a space off baseline.
+    """
+    baseline = space / 2 if num_of_lines % 2 == 0 else 0
+    glyph_height = space * num_of_lines / 2
+    return mirrored(range(baseline, glyph_height, space))
+
+
+def tremolo_slashes(height, num_of_comps, spacing, fingered_spacing=None):
+    """Returns layout of tremolo slashes of height, centered on baseline.
+
+    Slashes are separated by spacing, or fingered_spacing if given. The
+    span of the glyph is given by spacing regardless.
+    """
+    baseline = height / 2 if num_of_comps % 2 == 0 else 0
+    separation = height + spacing
+    glyph_span = separation * num_of_comps / 2
+    if fingered_spacing is not None:
+        separation = height + fingered_spacing
+    return mirrored(range(baseline, glyph_span, separation))
+
+
+def divisi_dots(height, num_of_comps, spacing, rows=1):
+    """Returns (layout, width) of divisi dots of height in rows."""
+    separation = height + spacing
+    glyph_span = separation * num_of_comps
+    result = []
+    for dx in range(0, glyph_span, separation):
+        result.append((dx, 0, 1, 1))
+        if rows > 1:
+            result.append((dx, spacing + height, 1, 1))
+    return result, glyph_span - spacing
+
+
+def flag_stack(spacings, downs):
+    """Returns layout of flags stacked by spacings, mirrored where downs.
+
+    The first flag is placed one spacing below baseline.
+    """
+    return [(0, spacing * (i - 1) * (-1 if down else 1), 1, 1)
+            for i, (spacing, down) in enumerate(zip(spacings, downs))]
+
+
+def registration_dots(values, parent_bbox, dot_bbox, overshoot=0):
+    """Returns layout of dots centered on registration values in parent.
+
+    Positions are given relative to bounding boxes of parent and dot (see
+    REGISTRATION_DIVISORS). overshoot is added vertically.
+    """
+    result = []
+    for value in values:
+        x_divisor, y_divisor = REGISTRATION_DIVISORS.get(value, (None, None))
+        x = parent_bbox.width / (x_divisor or 2)
+        y = parent_bbox.height / (y_divisor or 2)
+        x -= dot_bbox.width / 2
+        y -= dot_bbox.height / 2
+        result.append((x, y + overshoot, 1, 1))
+    return result
+
+
+def components(index, layout):
+    """Returns list of components of layout, referring to glyph index."""
+    return [Component(index, Point(dx, dy), Point(sx, sy))
+            for dx, dy, sx, sy in layout]
@@ -0,0 +1,109 @@
+"""Log module for SMuFLbuilder.
+
+Messages of a build are collected by the Log of the build context (ctx.log)
+and printed in one go at the end of each range, rather than one by one, as
+printing is slow in FontLab's output panel. Each message has a level:
+
+QUIET -- errors, always printed
+SUMMARY -- progress and one line per range, e.g.
+'Appended 214 glyphs, skipped 12, 3 incomplete.' (see .stats)
+VERBOSE -- one line per glyph appended, skipped, drawn etc.
+
+Messages above the level set by [Global][messages] are dropped without being
+formatted. If [Global][log file] is given, all messages are written to it
+at the end of the build, regardless of level.
+
+Classes:
+
+Log -- buffered messages of build
+
+Functions:
+
+create() -- returns Log according to settings
+range_summary() -- returns summary line of range from its counters
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+import os
+
+QUIET, SUMMARY, VERBOSE = 0, 1, 2
+
+# Counters of range summary (see .stats), in order.
+SUMMARIZED = (('appended', 'Appended {} glyphs'), ('renamed', 'renamed {}'),
+              ('overwritten', 'overwrote {}'), ('skipped', 'skipped {}'),
+              ('excluded', 'excluded {}'), ('incomplete', '{} incomplete'),
+              ('decomposed', 'decomposed {}'))
+
+
+class Log(object):
+    """Buffered messages of build, printed up to level."""
+
+    def __init__(self, level=SUMMARY, filename=None):
+        self.level = level
+        self.filename = filename
+        self.lines = []  # Messages up to level, not yet printed.
+        self.records = []  # All messages, if filename.
+
+    def write(self, level, message, *args):
+        """Adds message of level, formatted with args if any."""
+        if level > self.level and not self.filename:
+            return
+        if args:
+            message = message.format(*args)
+        if level <= self.level:
+            self.lines.append(message)
+        if self.filename:
+            self.records.append(message)
+
+    def error(self, message, *args):
+        """Adds message printed at any level."""
+        self.write(QUIET, message, *args)
+
+    def info(self, message, *args):
+        """Adds message printed at SUMMARY and VERBOSE levels."""
+        self.write(SUMMARY, message, *args)
+
+    def detail(self, message, *args):
+        """Adds message printed at VERBOSE level."""
+        self.write(VERBOSE, message, *args)
+
+    def flush(self):
+        """Prints messages collected since last flush."""
+        if self.lines:
+            print('\n'.join(self.lines))
+        self.lines = []
+
+    def save(self):
+        """Writes all messages to log file, if any."""
+        if not self.filename:
+            return
+        with open(self.filename, 'w') as f:
+            f.write('\n'.join(self.records) + '\n')
+
+
+def create(config, font=None):
+    """Returns Log according to [Global][messages] and [Global][log file].
+
+    Relative log file paths are taken from folder of font file.
+    """
+    level = SUMMARY
+    if config.has_option('Global', 'messages'):
+        level = config.getint('Global', 'messages')
+    filename = None
+    if config.has_option('Global', 'log file'):
+        filename = os.path.expanduser(config.get('Global', 'log file'))
+    if filename and not os.path.isabs(filename) and font is not None:
+        if font.file_name:
+            filename = os.path.join(os.path.dirname(font.file_name), filename)
+    return Log(level, filename or None)
+
+
+def range_summary(counters):
+    """Returns summary line of range from counters (see .stats)."""
+    parts = [text.format(counters[counter]) for counter, text in SUMMARIZED
+             if counters.get(counter)]
+    if not parts:
+        return 'Nothing to build.'
+    parts[0] = parts[0][0].upper() + parts[0][1:]
+    return ', '.join(parts) + '.'
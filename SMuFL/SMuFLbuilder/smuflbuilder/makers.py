@@ -2,9 +2,9 @@
 
 This module contains all functions to draw rudimentary (parent) glyphs.
 It is built upon functions in .tools and relies heavily on user defined
-values in config to produce particular glyph types, most of which are required
-for composite builds. Functions in .helpers are used to append glyphs to
-font.
+values in the build context's config to produce particular glyph types, most
+of which are required for composite builds. Functions in .helpers are used to
+append glyphs to font.
 
 Functions:
 
@@ -22,41 +22,35 @@ coupler_dot() -- draws coupler dot for accordion registration
 # (c) 2021 by Knut Nergaard.
 
 
-from ConfigParser import SafeConfigParser
-from FL import *
-
 from smuflbuilder import data
 from smuflbuilder import tools
 from smuflbuilder import helpers
-from smuflbuilder import filepaths
-
-f = fl.font
-config = SafeConfigParser()
-config.read(filepaths.defaults)
-config.read(filepaths.user)
+from smuflbuilder import stats
+from smuflbuilder.backend import *
 
-SPACE = f.upm / 4
 
-
-def barlines(name):
+@stats.maker
+def barlines(ctx, name):
     """Draws parent barline glyphs for Barlines and Repeats ranges."""
     def dashed_barline(glyph, registration, height):
         """Draws dashed barline.
 
         Superimposes reversed gap sized squares, separated by dash length,
-        over full-length barline and removes overlap.
+        over full-length barline and removes overlap once all gaps are drawn.
 
         Indexes in loop are understood as 1/4 increments, since square's
         origin point is midpoint.
         """
-        width = helpers.configvalue('Barlines', 'dashed barline thickness')
-        dash = helpers.configvalue('Barlines', 'dashed barline dash length')
-        gap = helpers.configvalue('Barlines', 'dashed barline gap length')
+        width = helpers.configvalue(
+            ctx, 'Barlines', 'dashed barline thickness')
+        dash = helpers.configvalue(
+            ctx, 'Barlines', 'dashed barline dash length')
+        gap = helpers.configvalue(ctx, 'Barlines', 'dashed barline gap length')
 
         # Draw normal barline for dashes.
         tools.draw_rectangle(glyph, registration, width, height)
 
-        # Draw gaps and remove overlap.
+        # Draw gaps.
         unit, stop = dash + gap, height * 2 - dash
         for quarter, _ in enumerate(range(0, stop, unit)):
             diff = dash - gap
@@ -67,7 +61,10 @@ def barlines(name):
             registration = Point(x, y)
             tools.draw_rectangle(glyph, registration, width, -gap_height)
             # -gap_height == rev. contour.
-            glyph.RemoveOverlap()
+
+        # Remove overlap in a single pass.
+        glyph.RemoveOverlap()
+        ctx.stats.count('overlaps removed')
 
     def dotted_barline(glyph, registration, height):
         """Draws dotted barline.
@@ -75,10 +72,10 @@ def barlines(name):
         Draws dots and spaces according to user specifications.
         Rounds gap values to fit staff hight (4 spaces).
         """
-        radius = x = y = helpers.configvalue('Barlines',
+        radius = x = y = helpers.configvalue(ctx, 'Barlines',
                                              'dotted barline dot radius')
         dot = width = radius * 2
-        gap = dot + helpers.configvalue('Barlines',
+        gap = dot + helpers.configvalue(ctx, 'Barlines',
                                         'dotted barline gap length')
         unit, height = dot + gap, height * 2
         for num, _ in enumerate(range(0, height, unit)):
@@ -91,68 +88,71 @@ def barlines(name):
             tools.draw_circle(glyph, registration, radius)
 
     # Define and draw barline and dot elements acc. to spec.
-    print 'drawing ...'
-    x, y = 0, SPACE * 2
+    ctx.log.detail('drawing ...')
+    x, y = 0, ctx.space * 2
     height = y
-    width = helpers.configvalue('Barlines', 'thin barline thickness')
+    width = helpers.configvalue(ctx, 'Barlines', 'thin barline thickness')
     if name == 'uniE034':  # barlineHeavy
-        width = helpers.configvalue('Barlines', 'thick barline thickness')
+        width = helpers.configvalue(ctx, 'Barlines', 'thick barline thickness')
     elif name == 'uniE038':  # barlineShort
-        y = SPACE * 3
-        height = SPACE
+        y = ctx.space * 3
+        height = ctx.space
     elif name == 'uniE039':  # barlineTick
-        y = SPACE * 4
-        height = SPACE * 0.5
+        y = ctx.space * 4
+        height = ctx.space * 0.5
     elif name == 'uniE044':  # repeatDot
-        x, y = helpers.configvalue('Repeats', 'repeat dot radius'), 0
+        x, y = helpers.configvalue(ctx, 'Repeats', 'repeat dot radius'), 0
         width = x * 2
     parent_glyph = Glyph()
     registration = Point(x, y)
 
     if name == 'uniE036':  # barlineDashed
         dashed_barline(parent_glyph, registration, height)
-        width = helpers.configvalue('Barlines', 'dashed barline thickness')
+        width = helpers.configvalue(
+            ctx, 'Barlines', 'dashed barline thickness')
     elif name == 'uniE037':  # barlineDotted
         dotted_barline(parent_glyph, registration, height)
-        width = helpers.configvalue('Barlines',
+        width = helpers.configvalue(ctx, 'Barlines',
                                     'dotted barline dot radius') * 2
     elif name == 'uniE044':  # repeat dot
         tools.draw_circle(parent_glyph, registration,
-                          helpers.configvalue('Repeats',
+                          helpers.configvalue(ctx, 'Repeats',
                                               'repeat dot radius'))
     else:  # everything else
         tools.draw_rectangle(parent_glyph, registration, width, height)
     metrics = Point(width, 0)
-    helpers.append_glyph(parent_glyph, name, metrics)
+    helpers.append_glyph(ctx, parent_glyph, name, metrics)
 
 
-def staves(name, value):
+@stats.maker
+def staves(ctx, name, value):
     """Draws staff parents and leger line glyphs for Staves range."""
     # Define staffline dimensions.
-    print 'drawing ...'
+    ctx.log.detail('drawing ...')
     x = 0
-    y = width = helpers.configvalue('Staves', 'medium staff line width')
-    height = helpers.configvalue('Staves', 'staff line thickness') / 2
+    y = width = helpers.configvalue(ctx, 'Staves', 'medium staff line width')
+    height = helpers.configvalue(ctx, 'Staves', 'staff line thickness') / 2
     if name == 'uniE016':
-        width = helpers.configvalue('Staves', 'wide staff line width')
+        width = helpers.configvalue(ctx, 'Staves', 'wide staff line width')
     elif name == 'uniE01C':
-        width = helpers.configvalue('Staves', 'narrow staff line width')
+        width = helpers.configvalue(ctx, 'Staves', 'narrow staff line width')
     metrics = Point(width, 0)
 
     # Define leger line dimensions.
     if not value:
-        leger_extension = helpers.configvalue('Staves', 'leger line extension')
+        leger_extension = helpers.configvalue(
+            ctx, 'Staves', 'leger line extension')
         x, y = -leger_extension, 0
         ext = leger_extension * 2
-        height = helpers.configvalue('Staves', 'leger line thickness') / 2
+        height = helpers.configvalue(ctx, 'Staves', 'leger line thickness') / 2
         if name == 'uniE022':
-            sidebearing = helpers.configvalue('Staves',
+            sidebearing = helpers.configvalue(ctx, 'Staves',
                                               'narrow leger line width')
         elif name == 'uniE023':
-            sidebearing = helpers.configvalue('Staves',
+            sidebearing = helpers.configvalue(ctx, 'Staves',
                                               'medium leger line width')
         else:
-            sidebearing = helpers.configvalue('Staves',
+            sidebearing = helpers.configvalue(ctx, 'Staves',
                                               'wide leger line width')
         width = sidebearing + ext
         metrics = Point(sidebearing, 0)
@@ -161,33 +161,35 @@ def staves(name, value):
     parent_glyph = Glyph()
     registration = Point(x, y)
     tools.draw_rectangle(parent_glyph, registration, width, height)
-    helpers.append_glyph(parent_glyph, name, metrics)
+    helpers.append_glyph(ctx, parent_glyph, name, metrics)
 
 
-def stems(name):
+@stats.maker
+def stems(ctx, name):
     """Draws note stem primitives for stem and note composites."""
-    print 'drawing ...'
-    long_stem_length = helpers.configvalue('Stems', 'long stem length')
+    ctx.log.detail('drawing ...')
+    long_stem_length = helpers.configvalue(ctx, 'Stems', 'long stem length')
     x, y = 0, long_stem_length / 2
-    stem_width = helpers.configvalue('Stems', 'stem thickness')
+    stem_width = helpers.configvalue(ctx, 'Stems', 'stem thickness')
     stem_height = long_stem_length / 2
     metrics = Point(stem_width / 2, 0)
 
     # Handle long stem in Beamed groups of notes.
     if name in {'uniE204', 'uniE205'}:
         # Get metrics based on noteheadBlack.
-        note_index = f.FindGlyph(data.beamed_notes['uniE1F0'][1])
-        note_glyph = f.glyphs[note_index]
+        note_index, note_glyph = helpers.lookup(
+            ctx, data.beamed_notes['uniE1F0'][1])
         glyph_width = note_glyph.width
         x = glyph_width - stem_width
-        retraction = helpers.configvalue('Stems', 'stem retraction')
+        retraction = helpers.configvalue(ctx, 'Stems', 'stem retraction')
         y += retraction / 2
         stem_height -= retraction / 2
         metrics = Point(glyph_width, 0)
 
         # Handle short stem in Beamed groups of notes.
         if name == 'uniE204':
-            short_stem_length = helpers.configvalue('Stems', 'short stem length')
+            short_stem_length = helpers.configvalue(
+                ctx, 'Stems', 'short stem length')
             diff = (long_stem_length - short_stem_length) / 2
             y -= diff
             stem_height -= diff
@@ -196,28 +198,30 @@ def stems(name):
     parent_glyph = Glyph()
     registration = Point(x, y)
     tools.draw_rectangle(parent_glyph, registration, stem_width, stem_height)
-    helpers.append_glyph(parent_glyph, name, metrics)
+    helpers.append_glyph(ctx, parent_glyph, name, metrics)
 
 
-def augmentation_dot(name):
+@stats.maker
+def augmentation_dot(ctx, name):
     """Draws augmentation dot for Individual Notes range."""
-    print 'drawing ...'
-    radius = helpers.configvalue('Notes', 'augmentation dot radius')
+    ctx.log.detail('drawing ...')
+    radius = helpers.configvalue(ctx, 'Notes', 'augmentation dot radius')
     x, y = radius, 0
     width = radius * 2
     registration = Point(x, y)
     glyph = Glyph()
     tools.draw_circle(glyph, registration, radius)
     metrics = Point(width, 0)
-    helpers.append_glyph(glyph, name, metrics)
+    helpers.append_glyph(ctx, glyph, name, metrics)
 
 
-def note_beam(name):
+@stats.maker
+def note_beam(ctx, name):
     """Draws beam for Beamed group of notes range."""
-    print 'drawing ...'
-    short_stem_length = helpers.configvalue('Stems', 'short stem length')
-    beam_thickness = helpers.configvalue('Beams', 'beam thickness')
-    beam_length = helpers.configvalue('Beams', 'beam length')
+    ctx.log.detail('drawing ...')
+    short_stem_length = helpers.configvalue(ctx, 'Stems', 'short stem length')
+    beam_thickness = helpers.configvalue(ctx, 'Beams', 'beam thickness')
+    beam_length = helpers.configvalue(ctx, 'Beams', 'beam length')
 
     x, y = 0, short_stem_length - beam_thickness / 2
     height, width = beam_thickness / 2, beam_length
@@ -227,17 +231,20 @@ def note_beam(name):
     glyph = Glyph()
     registration = Point(x, y)
     tools.draw_rectangle(glyph, registration, width, height)
-    helpers.append_glyph(glyph, name, metrics)
+    helpers.append_glyph(ctx, glyph, name, metrics)
 
 
-def tuplet_bracket(name):
+@stats.maker
+def tuplet_bracket(ctx, name):
     """Draws tuplet bracket for Beamed group of notes range."""
-    print 'drawing ...'
+    ctx.log.detail('drawing ...')
     # Horizontal stroke
-    bracket_height = helpers.configvalue('Beams', 'tuplet height')
-    hook_length = helpers.configvalue('Beams', 'tuplet bracket hook length')
-    bracket_thickness = helpers.configvalue('Beams', 'tuplet bracket thickness')
-    beam_length = helpers.configvalue('Beams', 'beam length')
+    bracket_height = helpers.configvalue(ctx, 'Beams', 'tuplet height')
+    hook_length = helpers.configvalue(
+        ctx, 'Beams', 'tuplet bracket hook length')
+    bracket_thickness = helpers.configvalue(
+        ctx, 'Beams', 'tuplet bracket thickness')
+    beam_length = helpers.configvalue(ctx, 'Beams', 'beam length')
 
     x, y = 0, bracket_height + hook_length
     horizontal_width = beam_length - bracket_thickness
@@ -252,11 +259,13 @@ def tuplet_bracket(name):
     registration = Point(x, y)
     tools.draw_rectangle(glyph, registration, vertical_width, height)
     glyph.RemoveOverlap()
+    ctx.stats.count('overlaps removed')
     metrics = Point(horizontal_width, 0)
-    helpers.append_glyph(glyph, name, metrics)
+    helpers.append_glyph(ctx, glyph, name, metrics)
 
 
-def dynamics(name):
+@stats.maker
+def dynamics(ctx, name):
     """Draws dynamic hairpin and niente circle
 
     Determines vertical registration of hairpin from range x-height,
@@ -264,19 +273,21 @@ def dynamics(name):
     """
     glyph = Glyph()
     if name == 'uniE53E':
-        width = helpers.configvalue('Dynamics', 'hairpin length')
-        aperture = helpers.configvalue('Dynamics', 'hairpin aperture')
-        thickness = helpers.configvalue('Dynamics', 'hairpin line thickness')
-        offset = helpers.configvalue('Dynamics', 'hairpin height adjustment')
+        width = helpers.configvalue(ctx, 'Dynamics', 'hairpin length')
+        aperture = helpers.configvalue(ctx, 'Dynamics', 'hairpin aperture')
+        thickness = helpers.configvalue(
+            ctx, 'Dynamics', 'hairpin line thickness')
+        offset = helpers.configvalue(
+            ctx, 'Dynamics', 'hairpin height adjustment')
 
         # Base x-height/hairpin height on n, m, r, z or s (in that order).
         x_heights = ('uniE526', 'uniE521', 'uniE523', 'uniE525', 'uniE524')
         for item in x_heights:
-            if f.has_key(item):
-                l_height = helpers.get_bbox(item).height / 2 + offset
+            if helpers.has_glyph(ctx, item):
+                l_height = helpers.get_bbox(ctx, item).height / 2 + offset
                 break
             else:
-                l_height = SPACE / 2 + offset
+                l_height = ctx.space / 2 + offset
         r_height = aperture / 2
         x, y = 0, l_height + offset
         registration = Point(x, y)
@@ -286,19 +297,22 @@ def dynamics(name):
 
     else:
         # Draw niente circle.
-        radius = helpers.configvalue('Dynamics', 'niente radius')
-        thickness = helpers.configvalue('Dynamics', 'niente line thickness')
+        radius = helpers.configvalue(ctx, 'Dynamics', 'niente radius')
+        thickness = helpers.configvalue(
+            ctx, 'Dynamics', 'niente line thickness')
         width = radius * 2
         x, y = radius + thickness / 2, 0
         registration = Point(x, y)
         tools.draw_circle_frame(glyph, registration, radius, thickness)
 
     glyph.RemoveOverlap()
+    ctx.stats.count('overlaps removed')
     metrics = Point(width, 0)
-    helpers.append_glyph(glyph, name, metrics)
+    helpers.append_glyph(ctx, glyph, name, metrics)
 
 
-def ranks(name):
+@stats.maker
+def ranks(ctx, name):
     """Draws empty ranks for accordion registration."""
     def partition(glyph, radius, width, position, thickness):
         """Draws partition lines for ranks."""
@@ -307,43 +321,47 @@ def ranks(name):
         height = thickness / 2
         registration = Point(x, y)
         tools.draw_rectangle(glyph, registration, width, height)
-        glyph.RemoveOverlap()
 
-    print 'drawing ...'
+    ctx.log.detail('drawing ...')
     glyph = Glyph()
     width = 0
-    thickness = helpers.configvalue('Accordion', 'ranks line thickness')
+    thickness = helpers.configvalue(ctx, 'Accordion', 'ranks line thickness')
     if name != 'uniE8C9':
-        radius = helpers.configvalue('Accordion', 'round ranks radius')
+        radius = helpers.configvalue(ctx, 'Accordion', 'round ranks radius')
         width = radius * 2
-        overshoot = helpers.configvalue('Accordion', 'round ranks overshoot')
+        overshoot = helpers.configvalue(
+            ctx, 'Accordion', 'round ranks overshoot')
         x = radius + thickness / 2
         y = x + overshoot
         registration = Point(x, y)
         tools.draw_circle_frame(glyph, registration, radius, thickness)
     else:
-        width = helpers.configvalue('Accordion', 'square ranks width')
-        height = helpers.configvalue('Accordion', 'square ranks height')
+        width = helpers.configvalue(ctx, 'Accordion', 'square ranks width')
+        height = helpers.configvalue(ctx, 'Accordion', 'square ranks height')
         x, y = 0, (height + thickness) / 2
         registration = Point(x, y)
         radius = width / 2
         tools.draw_rect_frame(glyph, registration, width, height, thickness)
 
-    for position, length in helpers.compile_part_data(name):
+    for position, length in helpers.compile_part_data(ctx, name):
         partition(glyph, radius, length, position, thickness)
+    # Merge partitions with frame in a single pass.
+    glyph.RemoveOverlap()
+    ctx.stats.count('overlaps removed')
 
     metrics = Point(width + thickness, 0)
-    helpers.append_glyph(glyph, name, metrics)
+    helpers.append_glyph(ctx, glyph, name, metrics)
 
 
-def coupler_dot(name):
+@stats.maker
+def coupler_dot(ctx, name):
     """Draws coupler dot for accordion registrations."""
-    print 'drawing ...'
+    ctx.log.detail('drawing ...')
     glyph = Glyph()
-    radius = helpers.configvalue('Accordion', 'coupler dot radius')
+    radius = helpers.configvalue(ctx, 'Accordion', 'coupler dot radius')
     x = y = radius
     width = radius * 2
     registration = Point(x, y)
     tools.draw_circle(glyph, registration, radius)
     metrics = Point(width, 0)
-    helpers.append_glyph(glyph, name, metrics)
+    helpers.append_glyph(ctx, glyph, name, metrics)
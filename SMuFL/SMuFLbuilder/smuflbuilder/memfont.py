@@ -0,0 +1,473 @@
+"""In-memory font backend for SMuFLbuilder.
+
+This module is a pure-Python stand-in for the subset of the FontLab Studio 5
+API used by SMuFLbuilder. It allows composites to be built, timed and profiled
+outside FontLab, e.g. on Linux build machines. Fonts are read from and written
+to a simple JSON format with load_font() and save_font().
+
+Behaviour follows FontLab wherever practical: appending a glyph to a font
+stores a copy, components refer to glyphs by index and node points are
+ordered (point, bcp_in, bcp_out) for curves. RemoveOverlap() leaves
+overlapping contours in place, which renders identically under the non-zero
+winding rule used by PostScript and TrueType outlines.
+
+Classes:
+
+Point -- 2D coordinate
+Rect -- bounding rectangle
+Node -- outline node (move, line or curve)
+Component -- reference to another glyph in font
+Anchor -- named attachment point
+KerningPair -- kerning value against right glyph index
+Glyph -- outline, components, metrics and kerning of a single glyph
+Font -- container of glyphs
+Application -- stand-in for FontLab's fl object
+
+Functions:
+
+load_font() -- reads font from JSON file
+save_font() -- writes font to JSON file
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+import json
+import math
+
+__all__ = ['Point', 'Rect', 'Node', 'Component', 'Anchor', 'KerningPair',
+           'Glyph', 'Font', 'Application', 'fl', 'load_font', 'save_font',
+           'nMOVE', 'nLINE', 'nCURVE', 'nOFF']
+
+nMOVE = 17
+nLINE = 1
+nCURVE = 35
+nOFF = 65
+
+
+class Point(object):
+    """2D coordinate. Accepts (x, y) or another Point."""
+
+    def __init__(self, x=0, y=0):
+        if isinstance(x, Point):
+            x, y = x.x, x.y
+        self.x = x
+        self.y = y
+
+    def __add__(self, other):
+        return Point(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return Point(self.x - other.x, self.y - other.y)
+
+    def __eq__(self, other):
+        return (isinstance(other, Point) and
+                self.x == other.x and self.y == other.y)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<Point: {}, {}>'.format(self.x, self.y)
+
+
+class Rect(object):
+    """Bounding rectangle defined by lower left and upper right points."""
+
+    def __init__(self, ll=None, ur=None):
+        self.ll = Point(ll) if ll is not None else Point()
+        self.ur = Point(ur) if ur is not None else Point(self.ll)
+
+    @property
+    def x(self):
+        return self.ll.x
+
+    @property
+    def y(self):
+        return self.ll.y
+
+    @property
+    def width(self):
+        return self.ur.x - self.ll.x
+
+    @property
+    def height(self):
+        return self.ur.y - self.ll.y
+
+    def Include(self, other):
+        """Extends rectangle to include Point or Rect."""
+        points = (other.ll, other.ur) if isinstance(other, Rect) else (other,)
+        for p in points:
+            self.ll.x, self.ll.y = min(self.ll.x, p.x), min(self.ll.y, p.y)
+            self.ur.x, self.ur.y = max(self.ur.x, p.x), max(self.ur.y, p.y)
+
+    def __repr__(self):
+        return '<Rect: ({}, {}), ({}, {})>'.format(
+            self.ll.x, self.ll.y, self.ur.x, self.ur.y)
+
+
+class Node(object):
+    """Outline node. Accepts (type, Point) or another Node.
+
+    points[0] is the on-curve point. Curve nodes additionally hold the
+    incoming and outgoing control points in points[1] and points[2].
+    """
+
+    def __init__(self, type=nLINE, point=None):
+        if isinstance(type, Node):
+            other = type
+            self.type = other.type
+            self.alignment = other.alignment
+            self.points = [Point(p) for p in other.points]
+            return
+        self.type = type
+        self.alignment = 0
+        self.points = [Point(point) if point is not None else Point()]
+
+    @property
+    def point(self):
+        return self.points[0]
+
+    @property
+    def x(self):
+        return self.points[0].x
+
+    @property
+    def y(self):
+        return self.points[0].y
+
+    def __repr__(self):
+        return '<Node: {}, {}>'.format(self.type, self.points)
+
+
+class Component(object):
+    """Reference to glyph at index in font, with shift and scale."""
+
+    def __init__(self, index, delta=None, scale=None):
+        if isinstance(index, Component):
+            other = index
+            index, delta, scale = other.index, other.delta, other.scale
+        self.index = index
+        self.delta = Point(delta) if delta is not None else Point()
+        self.scale = Point(scale) if scale is not None else Point(1, 1)
+
+    def transform(self, point):
+        """Returns point transformed by component scale and shift."""
+        return Point(point.x * self.scale.x + self.delta.x,
+                     point.y * self.scale.y + self.delta.y)
+
+    def __repr__(self):
+        return '<Component: {}, {}, {}>'.format(
+            self.index, self.delta, self.scale)
+
+
+class Anchor(object):
+    """Named attachment point."""
+
+    def __init__(self, name='', x=0, y=0):
+        self.name = name
+        self.x = x
+        self.y = y
+
+
+class KerningPair(object):
+    """Kerning value against glyph at index key."""
+
+    def __init__(self, key=0, value=0):
+        self.key = key
+        self.value = value
+
+
+class Glyph(object):
+    """Single glyph. Accepts another Glyph to create a copy."""
+
+    def __init__(self, other=None):
+        self.parent = None
+        self.name = ''
+        self.unicode = 0
+        self.mark = 0
+        self.note = None
+        self.width = 0
+        self.height = 0
+        self.nodes = []
+        self.components = []
+        self.anchors = []
+        self.kerning = []
+        if isinstance(other, Glyph):
+            self.Assign(other)
+
+    def Assign(self, other):
+        """Copies all glyph data from other glyph."""
+        self.name = other.name
+        self.unicode = other.unicode
+        self.mark = other.mark
+        self.note = other.note
+        self.width = other.width
+        self.height = other.height
+        self.nodes = [Node(n) for n in other.nodes]
+        self.components = [Component(c) for c in other.components]
+        self.anchors = [Anchor(a.name, a.x, a.y) for a in other.anchors]
+        self.kerning = [KerningPair(k.key, k.value) for k in other.kerning]
+
+    @property
+    def unicodes(self):
+        return [self.unicode] if self.unicode else []
+
+    @property
+    def nodes_number(self):
+        return len(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def Add(self, item):
+        """Appends copy of Node, list of Nodes or nodes of Glyph."""
+        if isinstance(item, Glyph):
+            item = item.nodes
+        elif isinstance(item, Node):
+            item = (item,)
+        self.nodes.extend(Node(n) for n in item)
+
+    def GetMetrics(self):
+        return Point(self.width, self.height)
+
+    def SetMetrics(self, metrics):
+        self.width, self.height = metrics.x, metrics.y
+
+    def Shift(self, delta):
+        """Moves all nodes by delta."""
+        for node in self.nodes:
+            for p in node.points:
+                p.x += delta.x
+                p.y += delta.y
+
+    def GetContoursNumber(self):
+        return sum(1 for n in self.nodes if n.type == nMOVE)
+
+    def _contour_ranges(self):
+        """Returns list of (start, end) node indexes of each contour."""
+        starts = [i for i, n in enumerate(self.nodes) if n.type == nMOVE]
+        return zip(starts, starts[1:] + [len(self.nodes)])
+
+    def ReverseContour(self, index):
+        """Reverses direction of contour at index."""
+        start, end = list(self._contour_ranges())[index]
+        contour = self.nodes[start:end]
+        origin = contour[0].points[0]
+        last = contour[-1].points[0]
+        reverse = [Node(nMOVE, origin)]
+        if last != origin:
+            reverse.append(Node(nLINE, last))
+        for i in range(len(contour) - 1, 0, -1):
+            node = contour[i]
+            target = contour[i - 1].points[0]
+            if node.type == nCURVE:
+                new = Node(nCURVE, target)
+                new.points.extend([Point(node.points[2]),
+                                   Point(node.points[1])])
+            else:
+                new = Node(node.type, target)
+            new.alignment = node.alignment
+            reverse.append(new)
+        if reverse[-1].type == nLINE and reverse[-1].points[0] == origin:
+            reverse.pop()
+        reverse[0].alignment = contour[0].alignment
+        self.nodes[start:end] = reverse
+
+    def _font_glyph(self, index):
+        if self.parent is None:
+            raise RuntimeError('Glyph {} is not in a font.'.format(self.name))
+        return self.parent.glyphs[index]
+
+    def _outline(self):
+        """Returns copies of all nodes, including decomposed components."""
+        nodes = [Node(n) for n in self.nodes]
+        for c in self.components:
+            for node in self._font_glyph(c.index)._outline():
+                node.points = [c.transform(p) for p in node.points]
+                nodes.append(node)
+        return nodes
+
+    def Decompose(self):
+        """Replaces components with their outlines."""
+        if self.components:
+            self.nodes = self._outline()
+            self.components = []
+
+    def RemoveOverlap(self):
+        """Leaves overlapping contours in place (see module docstring)."""
+        pass
+
+    def GetBoundingRect(self):
+        """Returns bounding rectangle of outline, including components."""
+        rect = None
+        current = None
+        for node in self._outline():
+            p = node.points[0]
+            if node.type == nCURVE and current is not None:
+                points = _curve_extrema(current, node.points[1],
+                                        node.points[2], p)
+            else:
+                points = (p,)
+            for point in points:
+                if rect is None:
+                    rect = Rect(point, point)
+                else:
+                    rect.Include(point)
+            current = p
+        return rect if rect is not None else Rect()
+
+    def __repr__(self):
+        return '<Glyph: {}>'.format(self.name)
+
+
+def _curve_extrema(p0, p1, p2, p3):
+    """Returns end points and extrema of cubic bezier segment."""
+    points = [p0, p3]
+    for axis in ('x', 'y'):
+        a0, a1, a2, a3 = [getattr(p, axis) for p in (p0, p1, p2, p3)]
+        # Coefficients of derivative a*t^2 + b*t + c.
+        a = -a0 + 3 * a1 - 3 * a2 + a3
+        b = 2 * (a0 - 2 * a1 + a2)
+        c = a1 - a0
+        if abs(a) < 1e-12:
+            roots = [-c / float(b)] if abs(b) > 1e-12 else []
+        else:
+            disc = b * b - 4 * a * c
+            if disc < 0:
+                continue
+            root = math.sqrt(disc)
+            roots = [(-b + root) / (2.0 * a), (-b - root) / (2.0 * a)]
+        for t in roots:
+            if 0 < t < 1:
+                mt = 1 - t
+                points.append(Point(
+                    *[mt ** 3 * getattr(p0, k) +
+                      3 * mt ** 2 * t * getattr(p1, k) +
+                      3 * mt * t ** 2 * getattr(p2, k) +
+                      t ** 3 * getattr(p3, k) for k in ('x', 'y')]))
+    return points
+
+
+class GlyphList(object):
+    """List of glyphs in font. Appended glyphs are stored as copies."""
+
+    def __init__(self, font):
+        self._font = font
+        self._glyphs = []
+
+    def append(self, glyph):
+        new = Glyph(glyph)
+        new.parent = self._font
+        self._glyphs.append(new)
+
+    def __getitem__(self, index):
+        return self._glyphs[index]
+
+    def __delitem__(self, index):
+        del self._glyphs[index]
+
+    def __len__(self):
+        return len(self._glyphs)
+
+    def __iter__(self):
+        return iter(self._glyphs)
+
+
+class Font(object):
+    """Container of glyphs and font wide information."""
+
+    def __init__(self, font_name='Untitled', upm=1000):
+        self.font_name = font_name
+        self.file_name = None
+        self.upm = upm
+        self.classes = []
+        self.glyphs = GlyphList(self)
+
+    def __len__(self):
+        return len(self.glyphs)
+
+    def FindGlyph(self, name):
+        """Returns index of first glyph named name, or -1."""
+        for i, glyph in enumerate(self.glyphs):
+            if glyph.name == name:
+                return i
+        return -1
+
+    def has_key(self, name):
+        return self.FindGlyph(name) > -1
+
+
+class Application(object):
+    """Stand-in for FontLab's fl object, holding the current font."""
+
+    def __init__(self):
+        self.font = None
+        self.ifont = -1
+
+    def Open(self, path):
+        self.font = load_font(path)
+        self.ifont = 0
+
+    def Save(self, path=None):
+        save_font(self.font, path or self.font.file_name)
+
+    def UpdateFont(self, index=None):
+        pass
+
+
+fl = Application()
+
+
+def load_font(path):
+    """Reads font from JSON file."""
+    with open(path) as infile:
+        raw = json.load(infile)
+    font = Font(raw.get('font_name', 'Untitled'), raw.get('upm', 1000))
+    font.file_name = path
+    font.classes = list(raw.get('classes', []))
+    for item in raw.get('glyphs', []):
+        glyph = Glyph()
+        glyph.name = str(item['name'])
+        glyph.unicode = item.get('unicode', 0)
+        glyph.mark = item.get('mark', 0)
+        glyph.note = item.get('note')
+        glyph.width = item.get('width', 0)
+        glyph.height = item.get('height', 0)
+        for node_type, alignment, points in item.get('nodes', []):
+            node = Node(node_type)
+            node.alignment = alignment
+            node.points = [Point(x, y) for x, y in points]
+            glyph.nodes.append(node)
+        glyph.components = [Component(index, Point(dx, dy), Point(sx, sy))
+                            for index, dx, dy, sx, sy
+                            in item.get('components', [])]
+        glyph.anchors = [Anchor(name, x, y)
+                         for name, x, y in item.get('anchors', [])]
+        glyph.kerning = [KerningPair(key, value)
+                         for key, value in item.get('kerning', [])]
+        font.glyphs.append(glyph)
+    return font
+
+
+def save_font(font, path):
+    """Writes font to JSON file."""
+    glyphs = []
+    for glyph in font.glyphs:
+        glyphs.append({
+            'name': glyph.name,
+            'unicode': glyph.unicode,
+            'mark': glyph.mark,
+            'note': glyph.note,
+            'width': glyph.width,
+            'height': glyph.height,
+            'nodes': [[n.type, n.alignment, [[p.x, p.y] for p in n.points]]
+                      for n in glyph.nodes],
+            'components': [[c.index, c.delta.x, c.delta.y,
+                            c.scale.x, c.scale.y] for c in glyph.components],
+            'anchors': [[a.name, a.x, a.y] for a in glyph.anchors],
+            'kerning': [[k.key, k.value] for k in glyph.kerning],
+        })
+    raw = {'font_name': font.font_name, 'upm': font.upm,
+           'classes': font.classes, 'glyphs': glyphs}
+    with open(path, 'w') as outfile:
+        json.dump(raw, outfile, indent=1, sort_keys=True)
@@ -0,0 +1,306 @@
+"""Planning module for SMuFLbuilder.
+
+This module walks the tables in .data for all included ranges, the [Exclude]
+section of config and the font once, before anything is drawn, and plans
+what to do with each target glyph:
+
+build -- glyph is appended, renamed or overwritten (see helpers.append_glyph)
+skip -- glyph is excluded, preexisting with [Global][handle replaced] = 0
+or unchanged since last build (see .cache)
+draw -- missing parent is drawn by .makers
+missing -- missing parent cannot be drawn
+incomplete -- glyph has missing parents. Builders check completeness
+themselves, as some composites are built without optional parents.
+
+Targets and the parents drawn, optional or stopping a job are taken from
+.builders (see builders.targets()), so that the plan follows the builders.
+
+Replace decisions of glyphs to build are handed to the build context, so
+that builders apply the actions planned. The runner executes the jobs of the
+plan, whose builders still walk their datasets glyph by glyph, as groups such
+as staves and beamed notes are laid out from the whole dataset. The plan
+itself may be printed without touching the font
+(python -m smuflbuilder font.json --plan).
+
+Range jobs, i.e. the builders and datasets executed for each range including
+alternates and stylistic sets, are defined here as well.
+
+Classes:
+
+Job -- builder and dataset executed for range
+Plan -- glyphs to build, skip and draw per range
+
+Functions:
+
+compile_dataset() -- adds suffixes etc. to compile dataset for alts
+main_jobs() -- returns jobs for recommended characters of range
+alternate_jobs() -- returns jobs for alternates, ligatures and sets of range
+range_jobs() -- returns main and alternate jobs of range according to config
+create() -- plans all included ranges and returns Plan
+report() -- returns plan as printable text
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from collections import namedtuple
+
+from smuflbuilder import data
+from smuflbuilder import builders
+from smuflbuilder import helpers
+
+# Job -- builder(ctx, glyphdata) executed for range.
+Job = namedtuple('Job', 'glyphrange builder glyphdata')
+
+# Main builder and dataset for range keys in data.ranges, in build order.
+RANGES = (
+    ('staves', builders.staves, data.staves),
+    ('barlines', builders.barlines, data.barlines),
+    ('repeats', builders.barlines, data.repeat_barlines),
+    ('time', builders.cut_time, data.cut_time_common),
+    ('time sup', builders.cut_time, data.cut_time_sup),
+    ('turned time', builders.mirror_time, data.turned_time),
+    ('reversed time', builders.mirror_time, data.reversed_time),
+    ('stems', builders.stems, data.stems),
+    ('tremolos', builders.tremolos, data.tremolos),
+    ('indv notes', builders.indv_notes, data.indv_notes),
+    ('beamed notes', builders.beamed_notes, data.beamed_notes),
+    ('flags', builders.flags, data.flags),
+    ('octaves', builders.octaves, data.octaves),
+    ('octaves sup', builders.octaves, data.octaves_sup),
+    ('dynamics', builders.dynamics, data.dynamics),
+    ('accordion', builders.accordion_reg,
+     (data.accordion_ranks, data.accordion_reg)),
+)
+
+# Statuses of planned glyphs.
+BUILD, SKIP, DRAW, MISSING = 'build', 'skip', 'draw', 'missing'
+INCOMPLETE = 'incomplete'
+
+# Ranges with supported alternates, ligatures or sets.
+HAS_ALTERNATES = {'repeats', 'time', 'flags', 'indv notes', 'octaves'}
+ALTERNATE_TYPES = ('alternates', 'ligatures', 'small staff', 'short flags',
+                   'straight flags')
+
+
+class Plan(object):
+    """Glyphs to build, skip and draw per range.
+
+    ranges is a list of (glyphrange, entries) pairs in build order, where
+    entries is a list of (glyphname, status, detail) tuples. status is one of
+    BUILD, SKIP, DRAW, MISSING or INCOMPLETE. detail is the replace action
+    for BUILD, the reason for SKIP, the child for DRAW and MISSING, or a
+    missing parent for INCOMPLETE.
+
+    jobs maps range keys to the (main, alternates) jobs planned for them.
+    """
+
+    def __init__(self):
+        self.ranges = []
+        self.jobs = {}
+
+    def entries(self, status=None):
+        """Returns (glyphrange, glyphname, detail) of all or status entries."""
+        return [(glyphrange, name, detail)
+                for glyphrange, entries in self.ranges
+                for name, entry_status, detail in entries
+                if status is None or entry_status == status]
+
+    def count(self, status):
+        return len(self.entries(status))
+
+
+def compile_dataset(ctx, sfx, glyphdata):
+    """Compiles new dataset for stylistic sets.
+
+    builds new names from defaults and suffix in config."""
+    new_data = {k + sfx: v + sfx if isinstance(v, str)
+                else [i + sfx for i in v] for k, v in glyphdata.iteritems()}
+    if sfx.endswith(ctx.config.get('Set Suffixes', 'short flags')):
+        # Pair dflt base flags uniE242 and uniE242 with short int. flags.
+        new_data = {k + '.' + sfx: [i + sfx if i == 'uniE242' or i == 'uniE243'
+                                    else i for i in v] for k, v in
+                    data.flags.iteritems()}
+
+    elif sfx.endswith(ctx.config.get('Set Suffixes', 'straight flags')):
+        new_data = {k + sfx: ['uniE240' + sfx if i == 'uniE250' or i == 'uniE242'
+                              else 'uniE241' + sfx for i in v] for k, v in
+                    glyphdata.iteritems()}
+        # Add keys for flag16thUpStraight and flag16thDownStraight.
+        new_data['uniE242' + sfx] = ['uniE240' + sfx]
+        new_data['uniE243' + sfx] = ['uniE241' + sfx]
+        # Add straight 8th flag (up/down) to each
+        # key to build from single character.
+        for k, v in new_data.iteritems():
+            v.append(('uniE240' + sfx) if 'uniE240' + sfx in v
+                     else v.append('uniE241' + sfx))
+    return new_data
+
+
+def main_jobs(ctx, key):
+    """Returns jobs for recommended characters of range key."""
+    glyphrange = data.ranges[key]
+    jobs = [Job(glyphrange, builder, glyphdata)
+            for range_key, builder, glyphdata in RANGES if range_key == key]
+    # Execute extra builder (fractions) for Time Signatures.
+    if key == 'time':
+        jobs.append(Job(glyphrange, builders.fraction_time,
+                        data.time_fractions))
+    return jobs
+
+
+def alternate_jobs(ctx, key):
+    """Returns jobs for add. datasets, alts, sets and ligas of range key."""
+    glyphrange = data.ranges[key]
+    include = ctx.config.getboolean
+    jobs = []
+    if key == 'repeats':
+        if include('Include', 'alternates'):
+            jobs.append(Job(glyphrange, builders.barlines,
+                            data.repeat_barlines_alt))
+
+    elif key in {'time', 'time sup'}:
+        if key == 'time' and include('Include', 'ligatures'):
+            jobs.append(Job(glyphrange, builders.time_ligatures,
+                            data.time_ligatures))
+
+        stylesets = ('large time signatures', 'large narrow time signatures')
+        for styleset in stylesets:
+            if include('Include', styleset):
+                suffix = '.' + ctx.config.get('Set Suffixes', styleset)
+                jobs.append(Job(glyphrange, builders.cut_time, compile_dataset(
+                    ctx, suffix, data.cut_time_common)))
+                jobs.append(Job(glyphrange, builders.fraction_time,
+                                compile_dataset(ctx, suffix,
+                                                data.time_fractions)))
+
+    elif key == 'flags':
+        stylesets = ('small staff', 'short flags', 'straight flags')
+        for styleset in stylesets:
+            if include('Include', styleset):
+                suffix = '.' + ctx.config.get('Set Suffixes', styleset)
+                jobs.append(Job(glyphrange, builders.flags,
+                                compile_dataset(ctx, suffix, data.flags)))
+
+    elif key == 'indv notes':
+        if include('Include', 'alternates'):
+            jobs.append(Job(glyphrange, builders.indv_notes,
+                            data.indv_notes_alt))
+
+    elif key == 'octaves':
+        if include('Include', 'alternates'):
+            jobs.append(Job(glyphrange, builders.octaves, data.octaves_alt))
+    return jobs
+
+
+def range_jobs(ctx, key):
+    """Returns main and alternate jobs of range key according to [Include].
+
+    Alternate jobs are only returned for ranges in HAS_ALTERNATES, if any of
+    ALTERNATE_TYPES is included.
+    """
+    include = ctx.config.getboolean
+    main = []
+    if include('Include', 'characters'):
+        main = main_jobs(ctx, key)
+    alternates = []
+    if key in HAS_ALTERNATES and any(include('Include', alttype)
+                                     for alttype in ALTERNATE_TYPES):
+        alternates = alternate_jobs(ctx, key)
+    return main, alternates
+
+
+def create(ctx, keys=None):
+    """Plans included ranges (or range keys) and returns Plan.
+
+    Decides replace actions for targets in font up front and stores those of
+    glyphs to build in context (see helpers.check_replaced()). Glyphs
+    planned to be built or drawn count as present for later ranges.
+    """
+    if keys is None:
+        keys = [key for key, builder, glyphdata in RANGES
+                if ctx.config.getboolean('Include', data.ranges[key])]
+    plan = Plan()
+    present = {glyph.name for glyph in ctx.font.glyphs}
+    planned = set()  # Targets planned earlier in build.
+    draw_missing = ctx.config.draw_missing
+    for key in keys:
+        entries = []
+        reported = set()  # Missing parents reported in range.
+        main, alternates = plan.jobs[key] = range_jobs(ctx, key)
+        for job in main + alternates:
+            drawn = builders.DRAWN.get(job.builder, set())
+            partial = (job.builder in builders.PARTIAL or draw_missing and
+                       job.builder in builders.PARTIAL_DRAWING)
+            stopping = job.builder in builders.STOPPING
+            stopped = None  # Missing parent stopping job.
+            for child, parents in builders.targets(
+                    ctx, job.builder, job.glyphdata):
+                if stopped is not None:
+                    if child is not None:
+                        entries.append((child, INCOMPLETE, stopped))
+                    continue
+                if child is not None:
+                    if child.lower() in ctx.config.excluded:
+                        entries.append((child, SKIP, 'excluded'))
+                        continue
+                    action = helpers.replace_action(ctx, child,
+                                                    child in present)
+                    if action == helpers.SKIP:
+                        entries.append((child, SKIP, 'preexisting'))
+                        continue
+                    if (action != helpers.NEW and ctx.cache is not None and
+                            ctx.cache.is_current(ctx, child) and
+                            not planned.intersection(ctx.cache.inputs(child))):
+                        entries.append((child, SKIP, 'unchanged'))
+                        continue
+                complete, missing = True, None
+                for i, parent in enumerate(parents):
+                    if partial:
+                        complete, missing = True, None
+                    if parent in present:
+                        continue
+                    if stopping and i == 0:
+                        stopped = parent
+                    if (parent is not None and draw_missing and
+                            (drawn is None or parent in drawn)):
+                        entries.append((parent, DRAW, child))
+                        present.add(parent)
+                    else:
+                        complete = False
+                        # None parents are never present, nor reported.
+                        if parent is not None:
+                            missing = missing or parent
+                            if parent not in reported:
+                                entries.append((parent, MISSING, child))
+                                reported.add(parent)
+                    if stopped is not None or not (complete or partial):
+                        break
+                if child is None:
+                    continue
+                if stopped is not None:
+                    entries.append((child, INCOMPLETE, stopped))
+                elif not complete:
+                    entries.append((child, INCOMPLETE, missing))
+                else:
+                    entries.append((child, BUILD, action))
+                    # Leave decision on glyphs built earlier to builder.
+                    if child not in planned:
+                        ctx.replacing[child] = action
+                    present.add(child)
+                    planned.add(child)
+        plan.ranges.append((data.ranges[key], entries))
+    return plan
+
+
+def report(plan):
+    """Returns plan as printable text, one glyph per line."""
+    lines = []
+    for glyphrange, entries in plan.ranges:
+        lines.append('\n{}:'.format(glyphrange))
+        for name, status, detail in entries:
+            lines.append('  {:<12}{:<24}{}'.format(status, name, detail or ''))
+    lines.append('\nPlanned: {} to build, {} to skip, {} to draw, '
+                 '{} incomplete, {} missing parents.'.format(
+                     plan.count(BUILD), plan.count(SKIP), plan.count(DRAW),
+                     plan.count(INCOMPLETE), plan.count(MISSING)))
+    return '\n'.join(lines)
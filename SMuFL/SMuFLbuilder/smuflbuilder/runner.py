@@ -0,0 +1,134 @@
+"""Runner module for SMuFLbuilder.
+
+This module contains main and alternate builder executions, according to the
+plan made by .planner and the order given by .scheduler. It is executed by the
+top level script in FontLab, or from the command line through
+smuflbuilder.__main__.
+
+Functions:
+
+exe_builder() -- executes range builders and commits batch
+exe_range() -- executes main and alternate jobs of range
+main() -- plans and executes script or prints plan
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+import multiprocessing
+
+from smuflbuilder import cache
+from smuflbuilder import data
+from smuflbuilder import helpers
+from smuflbuilder import log
+from smuflbuilder import planner
+from smuflbuilder import scheduler
+from smuflbuilder.backend import *
+
+
+def exe_builder(ctx, key):
+    """Executes range builders in a single batch.
+
+    Commits glyphs staged by builders to font when range is complete. Rolls
+    back batch if range fails, leaving font as it was before range. Time and
+    counters are recorded under range key (see .stats). Messages of range
+    are printed when range is done (see .log).
+    """
+    glyphrange = data.ranges[key]
+    if not ctx.config.getboolean('Include', glyphrange):
+        return
+    ctx.log.info('\nGenerating {} ...', glyphrange)
+    try:
+        with ctx.stats.range(key):
+            try:
+                exe_range(ctx, key)
+            except Exception:
+                ctx.batch.rollback()
+                ctx.log.error('\nFailed to build {}. Font is unchanged by '
+                              'range.', glyphrange)
+                raise
+            ctx.batch.commit()
+        ctx.log.info(log.range_summary(ctx.stats.ranges[key]['counters']))
+    finally:
+        ctx.log.flush()
+
+
+def exe_range(ctx, key):
+    """Executes main and alternate jobs planned for range key."""
+    main, alternates = ctx.plan.jobs[key]
+    if ctx.config.getboolean('Include', 'characters'):
+        for job in main:
+            with ctx.stats.builder(job.builder.__name__):
+                job.builder(ctx, job.glyphdata)
+    else:
+        ctx.log.info('Skipping recommended characters ...')
+
+    # Execute alternate jobs, log message if none.
+    if key not in planner.HAS_ALTERNATES:
+        ctx.log.detail('\nNo supported alternates in included range(s).')
+    elif alternates:
+        for job in alternates:
+            with ctx.stats.builder(job.builder.__name__):
+                job.builder(ctx, job.glyphdata)
+    else:
+        ctx.log.info('Skipping alternate glyphs ...')
+
+
+def main(ctx, dry_run=False, processes=None, rebuild=False, report=None):
+    """Creates list of booleans in config('Include').
+
+    Plans and executes script if settings found and anything is True.
+    Informs if not. If dry_run, prints plan without touching font.
+
+    Included ranges are executed in order of dependency (see .scheduler).
+    Independent ranges are executed in up to processes processes when
+    headless, by default one per CPU.
+
+    Replaced glyphs unchanged since last build are skipped if
+    [Global][incremental build], unless rebuild (see .cache).
+
+    Prints summary of timings and counters when done, and writes full
+    report to file report as JSON if given (see .stats). Writes log file
+    if set (see .log).
+    """
+    if not ctx.config.has_section('Include'):
+        ctx.log.error('Unable to read settings: {}', ctx.config.filename)
+        ctx.log.flush()
+        return
+
+    booleans = [ctx.config.getboolean('Include', boolean)
+                for boolean in ctx.config.options('Include')]
+
+    if not any(booleans):
+        ctx.log.error('Please select a range to build in \n{} '
+                      '\nand try again!', ctx.config.filename)
+        ctx.log.flush()
+        return
+
+    if ctx.config.incremental:
+        ctx.cache = cache.load(ctx, rebuild)
+    dependencies = scheduler.graph(ctx)
+    keys = scheduler.order(ctx, dependencies)
+    ctx.plan = planner.create(ctx, keys)
+    if dry_run:
+        print(planner.report(ctx.plan))
+        return
+
+    ctx.log.info('Starting ...')
+    ctx.log.flush()
+    if processes is None:
+        processes = multiprocessing.cpu_count() if HEADLESS else 1
+    scheduler.run(ctx, scheduler.groups(ctx, keys, dependencies),
+                  exe_builder, processes)
+
+    helpers.print_decomposed(ctx)
+    if ctx.cache is not None:
+        ctx.cache.update(ctx)
+        ctx.cache.save()
+    fl.UpdateFont(fl.ifont)
+    ctx.log.info('\n' + ctx.stats.summary())
+    if report:
+        ctx.stats.save(report)
+    ctx.log.info('\nAll done!')
+    ctx.log.flush()
+    ctx.log.save()
+
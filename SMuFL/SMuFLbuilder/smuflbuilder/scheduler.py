@@ -0,0 +1,230 @@
+"""Scheduler module for SMuFLbuilder.
+
+This module orders the included ranges by their dependencies, rather than in
+the fixed order of planner.RANGES. The dependency graph is derived from the
+range jobs in .planner: a range depends on another if it uses any glyph the
+other builds or draws as parent. Ranges producing the same glyphs are kept in
+order of planner.RANGES, which also breaks any cycles.
+
+Ranges without dependencies between them form independent groups. With the
+headless backend (see .backend), groups are built in separate processes and
+merged into the font in group order, so that the result is the same as when
+building them one after another. Inside FontLab, groups are always built in
+the current process.
+
+Functions:
+
+graph() -- returns dependency graph of included ranges
+order() -- returns range keys in topological order
+groups() -- splits ordered range keys into independent groups
+run() -- executes groups, in parallel when headless
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from cStringIO import StringIO
+import multiprocessing
+import sys
+import traceback
+
+from smuflbuilder import builders
+from smuflbuilder import data
+from smuflbuilder import planner
+from smuflbuilder import stats
+from smuflbuilder.backend import *
+
+# Context and range executor for worker processes, inherited on fork.
+_worker = None
+
+
+def _glyphs(ctx, key):
+    """Returns (produced, used) glyphnames of range key.
+
+    produced holds children built and parents possibly drawn, used holds
+    parents of children.
+    """
+    produced, used = set(), set()
+    main, alternates = planner.range_jobs(ctx, key)
+    for job in main + alternates:
+        drawn = builders.DRAWN.get(job.builder, set())
+        for child, parents in builders.targets(ctx, job.builder,
+                                               job.glyphdata):
+            if child is not None:
+                produced.add(child)
+            used.update(parent for parent in parents if parent)
+            if ctx.config.draw_missing:
+                produced.update(parent for parent in parents
+                                if drawn is None or parent in drawn)
+    return produced, used
+
+
+def graph(ctx, keys=None):
+    """Returns dependency graph of included ranges (or range keys).
+
+    Returns dict of range key: set of range keys it depends on.
+    """
+    if keys is None:
+        keys = [key for key, builder, glyphdata in planner.RANGES
+                if ctx.config.getboolean('Include', data.ranges[key])]
+    glyphs = {key: _glyphs(ctx, key) for key in keys}
+    rank = {key: i for i, key in enumerate(keys)}
+    dependencies = {key: set() for key in keys}
+    for key, (produced, used) in glyphs.iteritems():
+        for other, (other_produced, other_used) in glyphs.iteritems():
+            if other == key:
+                continue
+            # Uses glyphs built or drawn by other range.
+            if other_produced & used:
+                dependencies[key].add(other)
+            # Builds or draws same glyphs as earlier range.
+            elif other_produced & produced and rank[other] < rank[key]:
+                dependencies[key].add(other)
+    return dependencies
+
+
+def order(ctx, dependencies=None):
+    """Returns range keys of dependency graph in topological order.
+
+    Ranges without remaining dependencies are taken in order of
+    planner.RANGES. On cycles, the first remaining range is taken regardless.
+    """
+    if dependencies is None:
+        dependencies = graph(ctx)
+    remaining = [key for key, builder, glyphdata in planner.RANGES
+                 if key in dependencies]
+    ordered = []
+    while remaining:
+        for key in remaining:
+            if not dependencies[key] - set(ordered):
+                break
+        else:
+            key = remaining[0]
+        remaining.remove(key)
+        ordered.append(key)
+    return ordered
+
+
+def groups(ctx, keys, dependencies=None):
+    """Splits range keys into groups of ranges depending on each other.
+
+    Keeps order of keys within and between groups (by first range).
+    """
+    if dependencies is None:
+        dependencies = graph(ctx, keys)
+    label = {key: key for key in keys}
+    for key in keys:
+        for other in dependencies.get(key, ()):
+            if other not in label or label[other] == label[key]:
+                continue
+            old, new = label[other], label[key]
+            for member in keys:
+                if label[member] == old:
+                    label[member] = new
+    result, position = [], {}
+    for key in keys:
+        if label[key] not in position:
+            position[label[key]] = len(result)
+            result.append([])
+        result[position[label[key]]].append(key)
+    return result
+
+
+def run(ctx, range_groups, execute, processes=1):
+    """Executes range groups with execute(ctx, key) for each range key.
+
+    Runs groups in up to processes worker processes with the headless
+    backend, and in the current process otherwise.
+    """
+    if HEADLESS and processes > 1 and len(range_groups) > 1:
+        _run_parallel(ctx, range_groups, execute, processes)
+        return
+    for group in range_groups:
+        for key in group:
+            execute(ctx, key)
+
+
+def _run_parallel(ctx, range_groups, execute, processes):
+    """Executes groups in worker processes and merges results into font."""
+    global _worker
+    _worker = (ctx, execute)
+    pool = multiprocessing.Pool(min(processes, len(range_groups)))
+    try:
+        results = pool.map(_execute_group, range_groups)
+    finally:
+        pool.close()
+        pool.join()
+        _worker = None
+    errors = []
+    for result in results:
+        _merge(ctx, result)
+        if result['error']:
+            errors.append(result['error'])
+    if errors:
+        raise RuntimeError('Failed to build range group:\n' + errors[0])
+
+
+def _execute_group(group):
+    """Executes range group in worker process and returns changes to font.
+
+    Returns dict of glyphs appended and preexisting glyphs changed, together
+    with printed output, per-build state, stats and log records of context.
+    """
+    ctx, execute = _worker
+    glyphs = ctx.font.glyphs
+    size = len(glyphs)
+    ctx.batch.begin()
+    ctx.touched = set()
+    ctx.stats = stats.Stats()
+    ctx.log.records = []
+    stdout, sys.stdout = sys.stdout, StringIO()
+    error = None
+    try:
+        for key in group:
+            execute(ctx, key)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        output, sys.stdout = sys.stdout.getvalue(), stdout
+    return {
+        'size': size,
+        'appended': [Glyph(glyph) for glyph in list(glyphs)[size:]],
+        'changed': [(index, Glyph(glyphs[index]))
+                    for index in sorted(ctx.touched) if index < size],
+        'output': output,
+        'error': error,
+        'checked': ctx.checked,
+        'flattened': ctx.flattened,
+        'decomposed': ctx.decomposed,
+        'built': ctx.cache.built if ctx.cache is not None else {},
+        'stats': (ctx.stats.order, ctx.stats.ranges),
+        'log': ctx.log.records,
+    }
+
+
+def _merge(ctx, result):
+    """Merges changes from worker into font, remapping component indexes."""
+    glyphs = ctx.font.glyphs
+    size, offset = result['size'], len(glyphs) - result['size']
+
+    def remap(glyph):
+        for component in glyph.components:
+            if component.index >= size:
+                component.index += offset
+        return glyph
+
+    for glyph in result['appended']:
+        glyphs.append(remap(glyph))
+    for index, glyph in result['changed']:
+        glyphs[index].Assign(remap(glyph))
+        ctx.touched.add(index)
+    ctx.checked |= result['checked']
+    ctx.flattened |= result['flattened']
+    ctx.decomposed |= result['decomposed']
+    if ctx.cache is not None:
+        ctx.cache.built.update(result['built'])
+    ctx.stats.merge(*result['stats'])
+    ctx.log.records.extend(result['log'])
+    ctx.geometry.clear()
+    ctx.glyph_index = None  # Rebuilt from font on next lookup.
+    ctx.kerning_index = None
+    sys.stdout.write(result['output'])
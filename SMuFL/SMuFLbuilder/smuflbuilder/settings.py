@@ -0,0 +1,172 @@
+"""Settings module for SMuFLbuilder.
+
+This module reads default and user settings once into an immutable snapshot,
+with all values converted up front. Numerical values are converted to font
+units from 'staff spaces' (upm/4) according to [Global][values in staff
+spaces], so that builders can look them up without parsing or arithmetic.
+Invalid [Global] settings are reported when settings are loaded, rather than
+when first used.
+
+Classes:
+
+Settings -- immutable snapshot of config values
+
+Functions:
+
+load() -- reads config files and returns Settings
+convert() -- converts raw config string to font units or str()
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from ConfigParser import (NoOptionError, NoSectionError, RawConfigParser,
+                          SafeConfigParser)
+import re
+
+TIMESTAMP_CHARS = {'Y', 'm', 'd', 'H', 'M', 'S', '.', ':', '-', '_'}
+
+
+class Settings(object):
+    """Immutable snapshot of config values.
+
+    Provides the read methods of SafeConfigParser used by SMuFLbuilder, in
+    addition to value(), which returns pre-converted values.
+    """
+
+    def __init__(self, sections, space, filename):
+        in_spaces = _to_boolean(
+            sections.get('Global', {}).get('values in staff spaces', '0'))
+        values = {}
+        for section, options in sections.items():
+            for option, raw in options.items():
+                values[(section, option)] = convert(raw, space, in_spaces)
+        excluded = frozenset(
+            option for option, raw in sections.get('Exclude', {}).items()
+            if _to_boolean(raw))
+        object.__setattr__(self, '_sections', sections)
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, 'space', space)
+        object.__setattr__(self, 'filename', filename)
+        object.__setattr__(self, 'excluded', excluded)
+        object.__setattr__(self, 'stampform', _compile_timestamp(self))
+        object.__setattr__(self, 'handle_replaced', _compile_handling(self))
+        object.__setattr__(self, 'mark_colour',
+                           self.getint('Global', 'mark colour'))
+        object.__setattr__(self, 'draw_missing',
+                           self.getboolean('Global', 'draw missing'))
+        object.__setattr__(self, 'incremental',
+                           self.has_option('Global', 'incremental build') and
+                           self.getboolean('Global', 'incremental build'))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Settings are read-only.')
+
+    def _raw(self, section, option):
+        try:
+            options = self._sections[section]
+        except KeyError:
+            raise NoSectionError(section)
+        try:
+            return options[option.lower()]
+        except KeyError:
+            raise NoOptionError(option, section)
+
+    def has_section(self, section):
+        return section in self._sections
+
+    def has_option(self, section, option):
+        return option.lower() in self._sections.get(section, {})
+
+    def options(self, section):
+        try:
+            return list(self._sections[section])
+        except KeyError:
+            raise NoSectionError(section)
+
+    def get(self, section, option):
+        return self._raw(section, option)
+
+    def getint(self, section, option):
+        return int(self._raw(section, option))
+
+    def getfloat(self, section, option):
+        return float(self._raw(section, option))
+
+    def getboolean(self, section, option):
+        return _to_boolean(self._raw(section, option), strict=True)
+
+    def value(self, section, option):
+        """Returns converted value (see convert())."""
+        key = (section, option.lower())
+        if key not in self._values:
+            self._raw(section, option)  # Raises NoSectionError/NoOptionError.
+        return self._values[key]
+
+
+def _to_boolean(raw, strict=False):
+    """Converts raw string to boolean like SafeConfigParser.getboolean()."""
+    state = RawConfigParser._boolean_states.get(raw.lower())
+    if state is None and strict:
+        raise ValueError('Not a boolean: {}'.format(raw))
+    return bool(state)
+
+
+def _compile_timestamp(settings):
+    """Returns strftime format of [Global][timestamp].
+
+    Restricts character usage to ensure correct formatting and raises
+    ValueError if invalid. Prepends each character in raw stamp with modulus
+    (%) to make readable by strftime.
+    """
+    raw = settings.get('Global', 'timestamp')
+    if not TIMESTAMP_CHARS.issuperset(raw):
+        raise ValueError('Please choose a valid setting for [Global]'
+                         '[timestamp] in file:\n{}!'.format(settings.filename))
+    return '%' + '%'.join(raw)
+
+
+def _compile_handling(settings):
+    """Returns [Global][handle replaced] or raises ValueError if invalid."""
+    try:
+        option = settings.getint('Global', 'handle replaced')
+    except ValueError:
+        option = -1
+    if option not in {0, 1, 2}:
+        raise ValueError('Please choose a valid setting for [Global]'
+                         '[handle replaced] in file:\n{}!'.format(
+                             settings.filename))
+    return option
+
+
+def convert(raw, space, in_spaces):
+    """Converts raw config string to 'staff spaces', font units or str().
+
+    If in_spaces, numbers are given in staff spaces and converted to font
+    units, otherwise as integer font units. Strings that are not numbers are
+    returned unchanged. Exceptions enclosed in parenthesis are stripped and
+    converted from the opposite unit.
+    """
+    try:
+        if in_spaces:
+            return int(float(raw) * space)
+        return int(raw)
+    except ValueError:
+        # Regex to search for numbers or period in parenthesis.
+        if not re.search(r'\([0-9]|[0-9][.]\)', raw):
+            return raw
+        if in_spaces:
+            return int(float(raw.strip('()')))
+        return int(float(raw.strip('()')) * space)
+
+
+def load(space, filenames):
+    """Reads config files and returns Settings.
+
+    Later files override earlier ones. The last filename is named in error
+    messages.
+    """
+    config = SafeConfigParser()
+    config.read(filenames)
+    sections = {section: dict(config.items(section))
+                for section in config.sections()}
+    return Settings(sections, space, filenames[-1])
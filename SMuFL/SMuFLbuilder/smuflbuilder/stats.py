@@ -0,0 +1,183 @@
+"""Statistics module for SMuFLbuilder.
+
+This module measures where build time goes. The Stats of the build context
+(ctx.stats) record for each range:
+
+time -- wall time of range, including commit of batch (see .batch)
+builders -- wall time of each builder function executed for range
+makers -- wall time spent drawing missing parents (see .makers), which is
+included in builder times
+counters -- glyph lookups, decompositions, overlap removals, appended,
+renamed, overwritten, skipped, excluded and incomplete glyphs
+
+Work outside ranges, such as planning and updating the build cache, is
+recorded as 'other'. A summary table is printed at the end of each build,
+and the full report may be written as JSON for comparison between builds:
+
+python -m smuflbuilder font.json --report report.json
+
+Classes:
+
+Stats -- timings and counters of build, per range
+
+Functions:
+
+maker() -- decorator recording time spent in maker function
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from contextlib import contextmanager
+import functools
+import json
+import time
+
+# Increased when report changes format.
+VERSION = 1
+
+# Counters in order of summary table.
+COUNTERS = ('lookups', 'decomposed', 'overlaps removed', 'appended',
+            'renamed', 'overwritten', 'skipped', 'excluded', 'incomplete')
+
+# Range key of work outside ranges.
+OTHER = 'other'
+
+
+class Stats(object):
+    """Timings and counters of build, per range key."""
+
+    def __init__(self):
+        self.start = time.time()
+        self.ranges = {}  # range key: record (see _record()).
+        self.order = []  # range keys in order of execution.
+        self.current = OTHER  # range key recorded.
+        self.drawing = False  # True while in maker function.
+
+    def _record(self, key):
+        """Returns record of range key, creating it on first use."""
+        if key not in self.ranges:
+            self.ranges[key] = {'time': 0.0, 'builders': {}, 'makers': 0.0,
+                                'counters': {}}
+            self.order.append(key)
+        return self.ranges[key]
+
+    @contextmanager
+    def range(self, key):
+        """Records time and counters of block under range key."""
+        previous, self.current = self.current, key
+        record = self._record(key)
+        start = time.time()
+        try:
+            yield
+        finally:
+            record['time'] += time.time() - start
+            self.current = previous
+
+    @contextmanager
+    def builder(self, name):
+        """Records time of block as builder function name of range."""
+        builders = self._record(self.current)['builders']
+        start = time.time()
+        try:
+            yield
+        finally:
+            builders[name] = builders.get(name, 0.0) + time.time() - start
+
+    def add_makers(self, seconds):
+        """Adds time spent in makers to range."""
+        self._record(self.current)['makers'] += seconds
+
+    def count(self, counter, number=1):
+        """Adds number to counter of range."""
+        counters = self._record(self.current)['counters']
+        counters[counter] = counters.get(counter, 0) + number
+
+    def merge(self, order, ranges):
+        """Adds records of ranges from another process, in order."""
+        for key in order:
+            record, other = self._record(key), ranges[key]
+            record['time'] += other['time']
+            record['makers'] += other['makers']
+            for name, seconds in other['builders'].iteritems():
+                record['builders'][name] = (
+                    record['builders'].get(name, 0.0) + seconds)
+            for counter, number in other['counters'].iteritems():
+                record['counters'][counter] = (
+                    record['counters'].get(counter, 0) + number)
+
+    def totals(self):
+        """Returns counters summed over all ranges."""
+        totals = {}
+        for record in self.ranges.itervalues():
+            for counter, number in record['counters'].iteritems():
+                totals[counter] = totals.get(counter, 0) + number
+        return totals
+
+    def report(self):
+        """Returns report of build as JSON-serializable dict."""
+        return {
+            'version': VERSION,
+            'time': time.time() - self.start,
+            'order': self.order,
+            'ranges': self.ranges,
+            'counters': self.totals(),
+        }
+
+    def save(self, path):
+        """Writes report to file as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, sort_keys=True, indent=1,
+                      separators=(',', ': '))
+            f.write('\n')
+
+    def summary(self):
+        """Returns summary table of ranges as printable text."""
+        columns = ('time', 'builders', 'makers') + COUNTERS
+        rows = []
+        keys = [key for key in self.order if key != OTHER]
+        if OTHER in self.ranges:
+            keys.append(OTHER)
+        for key in keys:
+            record = self.ranges[key]
+            rows.append([key, '{:.3f}'.format(record['time']),
+                         '{:.3f}'.format(sum(record['builders'].values())),
+                         '{:.3f}'.format(record['makers'])] +
+                        [str(record['counters'].get(counter, 0))
+                         for counter in COUNTERS])
+        totals = self.totals()
+        rows.append(['total', '{:.3f}'.format(time.time() - self.start),
+                     '{:.3f}'.format(sum(sum(record['builders'].values())
+                                         for record in self.ranges.values())),
+                     '{:.3f}'.format(sum(record['makers'] for record
+                                         in self.ranges.values()))] +
+                    [str(totals.get(counter, 0)) for counter in COUNTERS])
+        header = ['range'] + list(columns)
+        widths = [max(len(row[i]) for row in rows + [header])
+                  for i in range(len(header))]
+        lines = []
+        for row in [header] + rows:
+            cells = [row[0].ljust(widths[0])]
+            cells.extend(cell.rjust(width)
+                         for cell, width in zip(row[1:], widths[1:]))
+            lines.append('  '.join(cells))
+        return '\n'.join(lines)
+
+
+def maker(function):
+    """Decorates maker function(ctx, ...) to record its time in ctx.stats.
+
+    Makers called by other makers are included in the outer call.
+    """
+    @functools.wraps(function)
+    def timed(ctx, *args, **kwargs):
+        stats = ctx.stats
+        if stats.drawing:
+            return function(ctx, *args, **kwargs)
+        stats.drawing = True
+        start = time.time()
+        try:
+            return function(ctx, *args, **kwargs)
+        finally:
+            stats.drawing = False
+            stats.add_makers(time.time() - start)
+    return timed
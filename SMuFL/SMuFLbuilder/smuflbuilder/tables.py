@@ -0,0 +1,110 @@
+"""Tables module for SMuFLbuilder.
+
+This module compiles the static tables in .data into lookup tables of the
+structure builders would otherwise derive from them in every build:
+
+order -- position of child among children of its parent (Staves, Tremolos)
+counts -- number of each parent in child (Beamed groups of notes)
+ligatures -- parts of ligature name, with the role of each part: 'ctrl',
+'numerator' or 'denominator' (Time signature ligatures)
+ctrl_char -- control characters of ligatures
+
+Compiled tables are shipped in tables.json next to data.py, stamped with a
+hash of data.py, and read in one go once per build (see context.Context).
+Builds never write the file. If data.py has changed since, tables are
+compiled in memory instead. After editing data.py, the file is compiled
+again with:
+
+python -m smuflbuilder.tables
+
+Functions:
+
+compile_tables() -- compiles tables from .data
+load() -- returns tables, reading or compiling them
+save() -- writes tables to file
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+import hashlib
+import json
+import os
+
+from smuflbuilder import data
+
+# Increased when tables change format.
+VERSION = 1
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    'tables.json')
+
+
+def _stamp():
+    """Returns version and hash of data.py source the tables derive from."""
+    source = os.path.splitext(data.__file__)[0] + '.py'
+    with open(source, 'rb') as f:
+        return [VERSION, hashlib.md5(f.read()).hexdigest()]
+
+
+def compile_tables():
+    """Compiles tables from .data and returns them as dict."""
+    order = {}
+    for glyphdata in (data.staves, data.tremolos):
+        for parent, children in glyphdata.iteritems():
+            for i, child in enumerate(children or ()):
+                order[child] = i
+
+    counts = {}
+    for child, parents in data.beamed_notes.iteritems():
+        counts[child] = {parent: parents.count(parent)
+                         for parent in parents if parent}
+
+    ligatures = {}
+    for child in data.time_ligatures:
+        parts = child.split('_')
+        roles = []
+        for i, part in enumerate(parts):
+            if part in data.ctrl_char:
+                roles.append([part, 'ctrl'])
+            elif parts[i - 1] == 'uniE09F':
+                roles.append([part, 'denominator'])
+            else:
+                roles.append([part, 'numerator'])
+        ligatures[child] = roles
+
+    return {
+        'stamp': _stamp(),
+        'order': order,
+        'counts': counts,
+        'ligatures': ligatures,
+        'ctrl_char': sorted(data.ctrl_char),
+    }
+
+
+def save(tables, path=PATH):
+    """Writes tables to file."""
+    with open(path, 'w') as f:
+        json.dump(tables, f, sort_keys=True, indent=1, separators=(',', ': '))
+        f.write('\n')
+
+
+def load(path=PATH):
+    """Returns tables read from file.
+
+    Compiles tables without writing them if file is missing, unreadable or
+    stamped with another version of data.py.
+    """
+    tables = None
+    try:
+        with open(path) as f:
+            tables = json.load(f)
+    except (IOError, ValueError):
+        pass
+    if tables is None or tables.get('stamp') != _stamp():
+        tables = compile_tables()
+    return tables
+
+
+if __name__ == '__main__':
+    save(compile_tables())
+    print('Compiled {}'.format(PATH))
@@ -3,8 +3,17 @@
 This module provides basic drawing functions tools used by makers to create
 specific glyphs and components.
 
+Contours are drawn from templates: node types, alignments and point offsets
+from the registration point, computed once per shape and size and kept in
+_templates. Templates are added to glyphs as lists of nodes, one contour at a
+time, rather than node by node.
+
 Functions:
 
+rectangle_template() -- returns contour template of rectangle
+circle_template() -- returns contour template of circle
+slash_template() -- returns contour template of slash
+add_contour() -- adds contour template to glyph at point
 draw_rectangle() -- draws a rectangle
 draw_circle() -- draws a circle
 draw_slash() -- draws slash with vertical ends
@@ -15,65 +24,82 @@ draw_circle_frame() -- draws an outlined circle
 # (c) 2021 by Knut Nergaard.
 
 from smuflbuilder import helpers
-from FL import *
+from smuflbuilder.backend import *
+
+SHARP, FIXED = 0, 12288  # Node alignments.
+
+# (shape, dimensions): tuple of (type, alignment, point offsets) per node.
+_templates = {}
+
+
+def rectangle_template(width, height):
+    '''Returns template of rectangle of assigned width and height.'''
+    key = ('rectangle', width, height)
+    if key not in _templates:
+        _templates[key] = (
+            (nMOVE, SHARP, ((0, -height),)),
+            (nLINE, SHARP, ((width, -height),)),
+            (nLINE, SHARP, ((width, height),)),
+            (nLINE, SHARP, ((0, height),)),
+        )
+    return _templates[key]
+
+
+def circle_template(radius):
+    '''Returns template of circle of assigned radius.'''
+    key = ('circle', radius)
+    if key not in _templates:
+        degree = 0.5519
+        sd = radius * degree  # Sets basier length to 55.19% of radius.
+        _templates[key] = (
+            (nMOVE, FIXED, ((-radius, 0),)),
+            (nCURVE, FIXED, ((0, -radius), (-radius, -sd), (-sd, -radius))),
+            (nCURVE, FIXED, ((radius, 0), (sd, -radius), (radius, -sd))),
+            (nCURVE, FIXED, ((0, radius), (radius, sd), (sd, radius))),
+            (nCURVE, FIXED, ((-radius, 0), (-sd, radius), (-radius, sd))),
+        )
+    return _templates[key]
+
+
+def slash_template(width, left_height, right_height, thickness):
+    '''Returns template of slash with vertical ends.'''
+    key = ('slash', width, left_height, right_height, thickness)
+    if key not in _templates:
+        thickness /= 2
+        _templates[key] = (
+            (nMOVE, SHARP, ((0, left_height - thickness),)),
+            (nLINE, SHARP, ((width, right_height - thickness),)),
+            (nLINE, SHARP, ((width, right_height + thickness),)),
+            (nLINE, SHARP, ((0, left_height + thickness),)),
+        )
+    return _templates[key]
+
+
+def add_contour(glyph, p, template):
+    '''Adds contour template to glyph, with offsets from point p.'''
+    nodes = []
+    for node_type, alignment, offsets in template:
+        node = Node(node_type, Point(p.x + offsets[0][0], p.y + offsets[0][1]))
+        node.points = [Point(p.x + x, p.y + y) for x, y in offsets]
+        node.alignment = alignment
+        nodes.append(node)
+    glyph.Add(nodes)
 
 
 def draw_rectangle(glyph, p, width, height):
     '''Draws rectangle of assigned width and height.'''
-    node = Node(17, Point(p.x, p.y - height))  # 17 = Move
-    node.alignment = 0  # 0 = Sharp
-    glyph.Add(node)
-
-    node.type = 1  # 1 = Line
-    node.points = [Point(p.x + width, p.y - height)]
-    glyph.Add(node)
-
-    node.points = [Point(p.x + width, p.y + height)]
-    glyph.Add(node)
-
-    node.points = [Point(p.x, p.y + height)]
-    glyph.Add(node)
+    add_contour(glyph, p, rectangle_template(width, height))
 
 
 def draw_circle(glyph, p, radius):
     '''Draws circle of assigned radius.'''
-    degree = 0.5519
-    sd = radius * degree  # Sets basier length to 55.19% of radius for circle.
-    node = Node(17, Point(p.x - radius, p.y))  # 17 = Move
-    node.alignment = 12288  # Fixed
-    glyph.Add(node)  # Add starting point
-
-    node.type = 35  # Curve
-    node.points = [Point(p.x, p.y - radius), Point(p.x - radius, p.y - sd),
-                   Point(p.x - sd, p.y - radius)]
-    glyph.Add(node)
-    node.points = [Point(p.x + radius, p.y), Point(p.x + sd, p.y - radius),
-                   Point(p.x + radius, p.y - sd)]
-    glyph.Add(node)
-    node.points = [Point(p.x, p.y + radius), Point(p.x + radius, p.y + sd),
-                   Point(p.x + sd, p.y + radius)]
-    glyph.Add(node)
-    node.points = [Point(p.x - radius, p.y), Point(p.x - sd, p.y + radius),
-                   Point(p.x - radius, p.y + sd)]
-    glyph.Add(node)
+    add_contour(glyph, p, circle_template(radius))
 
 
 def draw_slash(glyph, p, width, left_height, right_height, thickness):
     '''Draws slash with vertical ends.'''
-    thickness /= 2
-    node = Node(17, Point(p.x, p.y + left_height - thickness))  # 17 = Move
-    node.alignment = 0  # 0 = Sharp
-    glyph.Add(node)
-
-    node.type = 1  # 1 = Line
-    node.points = [Point(p.x + width, p.y + right_height - thickness)]
-    glyph.Add(node)
-
-    node.points = [Point(p.x + width, p.y + right_height + thickness)]
-    glyph.Add(node)
-
-    node.points = [Point(p.x, p.y + left_height + thickness)]
-    glyph.Add(node)
+    add_contour(glyph, p, slash_template(width, left_height, right_height,
+                                         thickness))
 
 
 def draw_rect_frame(glyph, p, width, height, thickness):
@@ -0,0 +1,64 @@
+"""Tests of SMuFLbuilder, run outside FontLab with the in-memory font backend.
+
+From the folder containing the smuflbuilder module folder:
+
+python -m unittest discover tests
+
+Functions:
+
+create_font() -- returns in-memory font of glyphs with a square each
+create_settings() -- returns default settings with everything included
+create_context() -- returns build context of font with default settings
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+from ConfigParser import SafeConfigParser
+import os
+
+from smuflbuilder import context
+from smuflbuilder import filepaths
+from smuflbuilder import log
+from smuflbuilder import settings
+from smuflbuilder.memfont import *
+
+DEFAULTS = os.path.join(os.path.dirname(filepaths.__file__), 'defaults.ini')
+
+
+def create_font(names, upm=1000):
+    """Returns font of glyphnames, each with a square and a width of 100."""
+    font = Font('Test', upm)
+    for name in names:
+        glyph = Glyph()
+        glyph.name = name
+        glyph.width = 100
+        for x, y in ((0, 0), (100, 0), (100, 100), (0, 100)):
+            glyph.Add(Node(nLINE if glyph.nodes else nMOVE, Point(x, y)))
+        font.glyphs.append(glyph)
+    return font
+
+
+def create_settings(overrides=None, upm=1000):
+    """Returns Settings of defaults with all ranges and sets included.
+
+    Builds are quiet and not incremental. overrides is a dict of section:
+    dict of option: value.
+    """
+    parser = SafeConfigParser()
+    parser.read([DEFAULTS])
+    sections = {section: dict(parser.items(section))
+                for section in parser.sections()}
+    for option in sections['Include']:
+        sections['Include'][option] = '1'
+    sections['Global'].update({'incremental build': '0', 'messages': '0',
+                               'log file': ''})
+    for section, options in (overrides or {}).items():
+        sections.setdefault(section, {}).update(options)
+    return settings.Settings(sections, upm / 4, DEFAULTS)
+
+
+def create_context(font, overrides=None):
+    """Returns build context of font with settings of create_settings()."""
+    ctx = context.Context(font, create_settings(overrides, font.upm))
+    ctx.log.level = log.QUIET
+    return ctx
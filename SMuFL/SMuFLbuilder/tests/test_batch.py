@@ -0,0 +1,127 @@
+"""Tests of .batch: staged changes committed in order or rolled back."""
+
+# (c) 2021 by Knut Nergaard.
+
+import unittest
+
+from smuflbuilder import builders
+from smuflbuilder import data
+from smuflbuilder import helpers
+from smuflbuilder import planner
+from smuflbuilder import runner
+from smuflbuilder.memfont import *
+from tests import create_context, create_font
+
+
+def composite(name, *indexes):
+    """Returns glyph of name with components referring to glyph indexes."""
+    glyph = Glyph()
+    glyph.name = name
+    for i, index in enumerate(indexes):
+        glyph.components.append(Component(index, Point(i * 100, 0)))
+    return glyph
+
+
+class RollbackTest(unittest.TestCase):
+
+    def test_failing_builder(self):
+        # Staves parents are drawn, children staged and some of them
+        # flushed to font before the second builder fails.
+        ctx = create_context(create_font(['uniE000', 'uniE001']))
+        names = [glyph.name for glyph in ctx.font.glyphs]
+
+        def failing(ctx, glyphdata):
+            for children in data.staves.values():
+                for child in children or ():
+                    helpers.decompose(ctx, child)
+            self.assertGreater(len(ctx.font.glyphs), len(names))
+            raise RuntimeError('Builder failed.')
+
+        glyphrange = data.ranges['staves']
+        ctx.plan = planner.Plan()
+        ctx.plan.jobs['staves'] = (
+            [planner.Job(glyphrange, builders.staves, data.staves),
+             planner.Job(glyphrange, failing, None)], [])
+        self.assertRaises(RuntimeError, runner.exe_builder, ctx, 'staves')
+        self.assertEqual(len(ctx.font.glyphs), len(names))
+        self.assertEqual([glyph.name for glyph in ctx.font.glyphs], names)
+        self.assertEqual(helpers.lookup(ctx, 'uniE010'), (-1, None))
+        self.assertEqual(ctx.flattened, set())
+        self.assertEqual(ctx.decomposed, set())
+
+    def test_state_of_earlier_range(self):
+        ctx = create_context(create_font(['uniE000', 'uniE001']))
+        helpers.decompose(ctx, 'uniE000')
+        ctx.batch.commit()
+        ctx.batch.append(composite('uniE002', 0), 'uniE002')
+        helpers.decompose(ctx, 'uniE001')
+        ctx.batch.rollback()
+        self.assertEqual(ctx.flattened, {'uniE000'})
+
+
+class CommitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = create_context(create_font(['A', 'B', 'C', 'D']))
+        self.font = self.ctx.font
+
+    def test_staged_until_commit(self):
+        batch = self.ctx.batch
+        batch.rename(2, self.font.glyphs[2], 'C_old')
+        batch.overwrite(3, composite('D', 1), 'D')
+        self.assertEqual(batch.append(composite('E', 0), 'E'), 4)
+        self.assertEqual([glyph.name for glyph in self.font.glyphs],
+                         ['A', 'B', 'C', 'D'])
+        self.assertEqual(self.font.glyphs[3].components, [])
+
+    def test_rename_and_append(self):
+        # Renamed glyph makes way for new glyph of same name.
+        batch = self.ctx.batch
+        batch.rename(2, self.font.glyphs[2], 'C_old')
+        batch.append(composite('C', 0), 'C')
+        batch.commit()
+        self.assertEqual([glyph.name for glyph in self.font.glyphs],
+                         ['A', 'B', 'C_old', 'D', 'C'])
+        self.assertEqual(self.font.FindGlyph('C'), 4)
+
+    def test_overwrite_before_decompose(self):
+        # Overwritten glyph is decomposed with its new components.
+        batch = self.ctx.batch
+        batch.overwrite(3, composite('D', 0, 1), 'D')
+        batch.decompose(3, 'D')
+        batch.commit()
+        glyph = self.font.glyphs[3]
+        self.assertEqual(glyph.name, 'D')
+        self.assertEqual(glyph.components, [])
+        self.assertEqual(len(glyph.nodes), 8)
+
+    def test_append_before_decompose(self):
+        # Staged composite of staged glyph is flushed to be decomposed.
+        batch = self.ctx.batch
+        first = batch.append(composite('E', 0, 1), 'E')
+        second = batch.append(composite('F', first), 'F')
+        batch.decompose(second, 'F')
+        self.assertEqual(len(self.font.glyphs), 6)
+        batch.commit()
+        self.assertEqual([glyph.name for glyph in self.font.glyphs],
+                         ['A', 'B', 'C', 'D', 'E', 'F'])
+        self.assertEqual(len(self.font.glyphs[4].components), 2)
+        self.assertEqual(self.font.glyphs[5].components, [])
+        self.assertEqual(len(self.font.glyphs[5].nodes), 8)
+
+    def test_counters(self):
+        batch = self.ctx.batch
+        batch.rename(2, self.font.glyphs[2], 'C_old')
+        batch.overwrite(3, composite('D', 1), 'D')
+        batch.append(composite('E', 0), 'E')
+        batch.decompose(4, 'E')
+        with self.ctx.stats.range('test'):
+            batch.commit()
+        self.assertEqual(len(batch), 0)
+        counters = self.ctx.stats.ranges['test']['counters']
+        for counter in ('appended', 'renamed', 'overwritten', 'decomposed'):
+            self.assertEqual(counters[counter], 1, counter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests of .builders: composites built from parents in font."""
+
+# (c) 2021 by Knut Nergaard.
+
+import unittest
+
+from smuflbuilder import builders
+from smuflbuilder import data
+from tests import create_context, create_font
+
+
+def build(builder, glyphdata, names, overrides=None):
+    """Runs builder on glyphdata in font of glyphnames and returns font."""
+    font = create_font(names)
+    ctx = create_context(font, overrides)
+    builder(ctx, glyphdata)
+    ctx.batch.commit()
+    return font
+
+
+class StemsTest(unittest.TestCase):
+
+    # Parents of Stems composites, without the stem, and a glyph after them.
+    names = sorted(parent for child, parent in data.stems.items()
+                   if child) + ['.notdef']
+
+    def test_missing_stem(self):
+        font = build(builders.stems, data.stems, self.names,
+                     {'Global': {'draw missing': '0'}})
+        self.assertEqual([glyph.name for glyph in font.glyphs], self.names)
+
+    def test_drawn_stem(self):
+        font = build(builders.stems, data.stems, self.names,
+                     {'Global': {'draw missing': '1'}})
+        stem = font.FindGlyph('uniE210')
+        self.assertGreater(stem, -1)
+        built = [glyph for glyph in font.glyphs if glyph.components]
+        self.assertTrue(built)
+        for glyph in built:
+            self.assertEqual(glyph.components[0].index, stem, glyph.name)
+
+
+class IndvNotesTest(unittest.TestCase):
+
+    def test_alternate_notehead(self):
+        font = build(builders.indv_notes, data.indv_notes_alt,
+                     ['uniE0A0.salt01'], {'Global': {'draw missing': '0'}})
+        index = font.FindGlyph('uniE1D0.salt01')
+        self.assertGreater(index, -1)
+        glyph = font.glyphs[index]
+        self.assertEqual([component.index for component in glyph.components],
+                         [font.FindGlyph('uniE0A0.salt01')])
+        self.assertEqual(glyph.width, 100)
+
+
+class BeamedNotesTest(unittest.TestCase):
+
+    def test_beam_after_notes(self):
+        # Parents of uniE1F2 list the beam (uniE1F7) after the note.
+        glyphdata = {'uniE1F2': data.beamed_notes['uniE1F2']}
+        font = create_font(glyphdata['uniE1F2'])
+        font.glyphs[font.FindGlyph('uniE1F7')].width = 300
+        ctx = create_context(font, {'Global': {'draw missing': '0'}})
+        builders.beamed_notes(ctx, glyphdata)
+        ctx.batch.commit()
+        glyph = font.glyphs[font.FindGlyph('uniE1F2')]
+        # Note and stem are aligned with the end of the beam.
+        self.assertEqual([component.delta.x
+                          for component in glyph.components[:2]], [200, 200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""Tests of .cache: records of composites built and their inputs."""
+
+# (c) 2021 by Knut Nergaard.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from smuflbuilder import cache
+from smuflbuilder import helpers
+from smuflbuilder.memfont import *
+from tests import create_context, create_font
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.font = create_font(['uniE000', 'uniE001', 'uniE002'])
+        self.font.file_name = os.path.join(self.folder, 'font.json')
+        self.ctx = create_context(self.font)
+        self.path = cache.filename(self.font)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def build(self, ctx, name, parents, options=()):
+        """Records glyphname as built from parents, reading options."""
+        ctx.cache.begin(name)
+        for parent in parents:
+            helpers.lookup(ctx, parent)
+        for section, option in options:
+            helpers.configvalue(ctx, section, option)
+        ctx.cache.record(name)
+
+    def save(self):
+        """Records uniE002 as built from uniE000 and saves cache."""
+        self.ctx.cache = cache.load(self.ctx)
+        self.build(self.ctx, 'uniE002', ['uniE000'],
+                   [('Stems', 'stem thickness')])
+        self.ctx.cache.update(self.ctx)
+        self.ctx.cache.save()
+
+    def reload(self, overrides=None):
+        """Returns context of font with cache read from file."""
+        ctx = create_context(self.font, overrides)
+        ctx.cache = cache.load(ctx)
+        return ctx
+
+    def test_filename(self):
+        self.assertEqual(self.path,
+                         os.path.join(self.folder, 'font.smuflbuilder.json'))
+        self.font.file_name = None
+        self.assertIsNone(cache.filename(self.font))
+
+    def test_missing_file(self):
+        ctx = self.reload()
+        self.assertEqual(ctx.cache.records, {})
+        self.assertFalse(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_corrupt_file(self):
+        self.save()
+        with open(self.path, 'w') as f:
+            f.write('{"version": [1, ')
+        ctx = self.reload()
+        self.assertEqual(ctx.cache.records, {})
+        self.assertFalse(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_version_mismatch(self):
+        self.save()
+        with open(self.path) as f:
+            raw = json.load(f)
+        raw['version'][0] = cache.VERSION + 1
+        with open(self.path, 'w') as f:
+            json.dump(raw, f)
+        ctx = self.reload()
+        self.assertEqual(ctx.cache.records, {})
+        self.assertFalse(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_settings_mismatch(self):
+        self.save()
+        ctx = self.reload({'Global': {'mark colour': '175'}})
+        self.assertEqual(ctx.cache.records, {})
+
+    def test_rebuild(self):
+        self.save()
+        ctx = create_context(self.font)
+        ctx.cache = cache.load(ctx, rebuild=True)
+        self.assertEqual(ctx.cache.records, {})
+
+    def test_current(self):
+        self.save()
+        ctx = self.reload()
+        self.assertTrue(ctx.cache.is_current(ctx, 'uniE002'))
+        self.assertEqual(ctx.cache.inputs('uniE002'), ['uniE000'])
+        # Not an input of uniE002.
+        self.font.glyphs[1].width = 200
+        ctx = self.reload()
+        self.assertTrue(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_glyph_changed(self):
+        self.save()
+        self.font.glyphs[2].width = 200
+        ctx = self.reload()
+        self.assertFalse(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_parent_changed(self):
+        self.save()
+        self.font.glyphs[0].Shift(Point(10, 0))
+        ctx = self.reload()
+        self.assertFalse(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_parent_missing(self):
+        self.save()
+        self.font.glyphs[0].name = 'uniE000.old'
+        ctx = self.reload()
+        self.assertFalse(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_option_changed(self):
+        self.save()
+        ctx = self.reload({'Stems': {'stem thickness': '0.1'}})
+        self.assertFalse(ctx.cache.is_current(ctx, 'uniE002'))
+
+    def test_update_keeps_other_records(self):
+        self.save()
+        ctx = self.reload()
+        self.build(ctx, 'uniE001', ['uniE000'])
+        ctx.cache.update(ctx)
+        self.assertEqual(sorted(ctx.cache.records), ['uniE001', 'uniE002'])
+        self.assertEqual(ctx.cache.built, {})
+
+    def test_update_drops_removed_glyph(self):
+        self.save()
+        ctx = self.reload()
+        self.build(ctx, 'uniE002', ['uniE000'])
+        del self.font.glyphs[2]
+        ctx.glyph_index = None
+        ctx.cache.update(ctx)
+        self.assertNotIn('uniE002', ctx.cache.records)
+
+    def test_untracked_glyph(self):
+        ctx = self.reload()
+        self.build(ctx, 'uniE002', ['uniE000'])
+        # Only the tracked glyph is recorded.
+        ctx.cache.begin('uniE001')
+        ctx.cache.record('uniE002')
+        self.assertEqual(ctx.cache.target, 'uniE001')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Tests of .helpers: replacing preexisting glyphs and the replace actions
+left in context."""
+
+# (c) 2021 by Knut Nergaard.
+
+import unittest
+
+from smuflbuilder import benchmark
+from smuflbuilder import context
+from smuflbuilder import helpers
+from smuflbuilder import log
+from smuflbuilder import planner
+from smuflbuilder import runner
+from smuflbuilder import scheduler
+from smuflbuilder.memfont import *
+from tests import create_context, create_font, create_settings
+
+
+class ReplaceTest(unittest.TestCase):
+
+    def replace(self, handling):
+        """Builds uniE001 over preexisting one and returns font."""
+        font = create_font(['uniE000', 'uniE001', 'uniE002'])
+        ctx = create_context(font, {'Global': {'handle replaced': handling}})
+        glyph = Glyph()
+        glyph.components.append(Component(0, Point(0, 0)))
+        if not helpers.check_replaced(ctx, 'uniE001'):
+            helpers.append_glyph(ctx, glyph, 'uniE001', Point(300, 0))
+        ctx.batch.commit()
+        return font
+
+    def test_skip(self):
+        font = self.replace('0')
+        self.assertEqual([glyph.name for glyph in font.glyphs],
+                         ['uniE000', 'uniE001', 'uniE002'])
+        self.assertEqual(font.glyphs[1].components, [])
+
+    def test_rename(self):
+        font = self.replace('1')
+        self.assertEqual(len(font.glyphs), 4)
+        self.assertTrue(font.glyphs[1].name.startswith('uniE001_'))
+        self.assertEqual(font.glyphs[1].unicode, 0)
+        self.assertEqual(font.glyphs[3].name, 'uniE001')
+        self.assertEqual(font.glyphs[3].unicode, 0xE001)
+
+    def test_overwrite(self):
+        font = self.replace('2')
+        self.assertEqual([glyph.name for glyph in font.glyphs],
+                         ['uniE000', 'uniE001', 'uniE002'])
+        self.assertEqual(len(font.glyphs[1].components), 1)
+        self.assertEqual(font.glyphs[1].width, 300)
+        self.assertEqual(font.glyphs[1].unicode, 0xE001)
+
+
+
+class ActionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = create_context(create_font(['uniE000', 'uniE001']),
+                                  {'Global': {'handle replaced': '2'}})
+        self.glyph = Glyph()
+        self.glyph.components.append(Component(0, Point(0, 0)))
+
+    def test_incomplete(self):
+        # Glyph checked, but not appended, as if parents were missing.
+        self.assertFalse(helpers.check_replaced(self.ctx, 'uniE001'))
+        self.assertIn('uniE001', self.ctx.replacing)
+        self.ctx.batch.commit()
+        self.assertEqual(self.ctx.replacing, {})
+
+    def test_appended(self):
+        self.assertFalse(helpers.check_replaced(self.ctx, 'uniE002'))
+        helpers.append_glyph(self.ctx, self.glyph, 'uniE002', Point(100, 0))
+        self.assertEqual(self.ctx.replacing, {})
+        self.assertEqual(self.ctx.batch.pending, set())
+
+    def test_rollback(self):
+        # Actions planned for glyphs of later ranges are kept.
+        self.ctx.replacing.update({'uniE001': helpers.OVERWRITE,
+                                   'uniE003': helpers.NEW})
+        self.assertFalse(helpers.check_replaced(self.ctx, 'uniE001'))
+        self.assertFalse(helpers.check_replaced(self.ctx, 'uniE002'))
+        helpers.append_glyph(self.ctx, self.glyph, 'uniE002', Point(100, 0))
+        self.ctx.batch.rollback()
+        self.assertEqual(self.ctx.replacing, {'uniE003': helpers.NEW})
+        self.assertEqual(self.ctx.batch.pending, set())
+
+    def test_build(self):
+        # Every third parent missing, leaving composites incomplete.
+        config = create_settings({'Global': {'draw missing': '0',
+                                             'handle replaced': '2'}})
+        font = benchmark.synthetic_font(0, config)
+        for name in sorted(glyph.name for glyph in font.glyphs)[::3]:
+            del font.glyphs[font.FindGlyph(name)]
+        ctx = context.Context(font, config)
+        ctx.log.level = log.QUIET
+        keys = scheduler.order(ctx, scheduler.graph(ctx))
+        ctx.plan = planner.create(ctx, keys)
+        self.assertTrue(ctx.replacing)
+        for key in keys:
+            runner.exe_builder(ctx, key)
+        self.assertTrue(ctx.stats.ranges[keys[0]]['counters'])
+        self.assertEqual(ctx.replacing, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Tests of .layout: layouts match the placement of earlier builders."""
+
+# (c) 2021 by Knut Nergaard.
+
+from collections import namedtuple
+import unittest
+
+from smuflbuilder import layout
+
+Box = namedtuple('Box', 'width height')
+
+# Divisors of parent bounding box (x, y) placing registration dots in
+# accordion_reg() of version 0.2, 2 being the center.
+BASELINE_DIVISORS = {
+    'stop4': (2, 1.219),
+    'upper8': (1.3, 2),
+    'master': (1.3, 2),
+    'lower8': (4.333, 2),
+    'stop16': (2, 5.571),
+    'soprano': (2, 1.1624),
+    'alto': (2, 1.612),
+    'tenor': (2, 2.635),
+    'bass': (2, 7.156),
+    'stop8b': (2, 1.352),
+    'stop16b': (2, 3.842),
+    'stop8c': (2, 5.555),
+    'left8stop': (2, 5.555),
+    'right8stop': (2, 5.555),
+    'stop2': (2, 1.22),
+}
+
+
+class FlagStackTest(unittest.TestCase):
+
+    def baseline(self, spacings, downs):
+        """Returns flag offsets as computed by flags() of version 0.2."""
+        offsets = []
+        for i, (spacing, down) in enumerate(zip(spacings, downs)):
+            for n, dy in enumerate(range(-spacing, spacing * len(spacings),
+                                         spacing)):
+                if down:
+                    dy = -dy
+                if i == n:
+                    offsets.append(dy)
+        return offsets
+
+    def test_up(self):
+        spacings, downs = [60] * 4, [False] * 4
+        self.assertEqual([dy for dx, dy, sx, sy
+                          in layout.flag_stack(spacings, downs)],
+                         self.baseline(spacings, downs))
+
+    def test_down(self):
+        spacings, downs = [60] * 4, [True] * 4
+        self.assertEqual([dy for dx, dy, sx, sy
+                          in layout.flag_stack(spacings, downs)],
+                         [60, 0, -60, -120])
+        self.assertEqual([dy for dx, dy, sx, sy
+                          in layout.flag_stack(spacings, downs)],
+                         self.baseline(spacings, downs))
+
+    def test_mixed(self):
+        # Straight flags have a spacing of their own.
+        spacings, downs = [60, 75, 60, 75], [False, True, False, True]
+        self.assertEqual(layout.flag_stack(spacings, downs),
+                         [(0, dy, 1, 1) for dy
+                          in self.baseline(spacings, downs)])
+
+
+class RegistrationTest(unittest.TestCase):
+
+    def test_divisors(self):
+        self.assertEqual(
+            {value: (x or 2, y or 2) for value, (x, y)
+             in layout.REGISTRATION_DIVISORS.items()}, BASELINE_DIVISORS)
+
+    def test_dots(self):
+        parent, dot = Box(780.0, 780.0), Box(100.0, 100.0)
+        for value, (x, y) in sorted(BASELINE_DIVISORS.items()):
+            self.assertEqual(
+                layout.registration_dots([value], parent, dot, 10),
+                [(780.0 / x - 50, 780.0 / y - 50 + 10, 1, 1)], value)
+
+    def test_unknown_value(self):
+        self.assertEqual(layout.registration_dots(
+            ['unknown'], Box(780.0, 600.0), Box(100.0, 100.0)),
+            [(340.0, 250.0, 1, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""Tests of .planner: range jobs, the datasets of stylistic sets and plans
+matching the glyphs built."""
+
+# (c) 2021 by Knut Nergaard.
+
+import unittest
+
+from smuflbuilder import benchmark
+from smuflbuilder import builders
+from smuflbuilder import context
+from smuflbuilder import data
+from smuflbuilder import log
+from smuflbuilder import planner
+from smuflbuilder import runner
+from tests import create_context, create_font, create_settings
+from smuflbuilder.memfont import *
+
+
+class DatasetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = create_context(create_font([]))
+
+    def test_single_child_names(self):
+        # Cut time datasets map each parent to a single child name.
+        dataset = planner.compile_dataset(self.ctx, '.ss04',
+                                          data.cut_time_common)
+        self.assertEqual(dataset, {'uniE08A.ss04': 'uniE08B.ss04'})
+
+    def test_parent_lists(self):
+        dataset = planner.compile_dataset(self.ctx, '.ss04',
+                                          data.time_fractions)
+        for child, parents in dataset.items():
+            self.assertTrue(child.endswith('.ss04'))
+            self.assertTrue(all(parent.endswith('.ss04')
+                                for parent in parents))
+        self.assertEqual(len(dataset), len(data.time_fractions))
+
+
+class JobsTest(unittest.TestCase):
+
+    def test_octaves_alternates(self):
+        names = sorted({parent for parents in data.octaves_alt.values()
+                        for parent in parents} | {'uniE510'})
+        ctx = create_context(create_font(names))
+        jobs = planner.alternate_jobs(ctx, 'octaves')
+        self.assertEqual([(job.builder, job.glyphdata) for job in jobs],
+                         [(builders.octaves, data.octaves_alt)])
+        jobs[0].builder(ctx, jobs[0].glyphdata)
+        ctx.batch.commit()
+        for child, parents in data.octaves_alt.items():
+            glyph = ctx.font.glyphs[ctx.font.FindGlyph(child)]
+            self.assertEqual(len(glyph.components), len(parents), child)
+
+
+
+class PlanTest(unittest.TestCase):
+
+    longMessage = True
+
+    def check(self, key, overrides, without=(), preexisting=()):
+        """Plans and builds range key in synthetic font and asserts that the
+        glyphs planned to be built or drawn are those appended to font.
+
+        Parents without are removed from font, glyphs preexisting added.
+        """
+        config = create_settings(overrides)
+        font = benchmark.synthetic_font(0, config)
+        for name in without:
+            index = font.FindGlyph(name)
+            if index > -1:
+                del font.glyphs[index]
+        for name in preexisting:
+            glyph = Glyph()
+            glyph.name = name
+            font.glyphs.append(glyph)
+        ctx = context.Context(font, config)
+        ctx.log.level = log.QUIET
+        ctx.plan = planner.create(ctx, [key])
+        planned = {name for glyphrange, name, detail
+                   in ctx.plan.entries(planner.BUILD) +
+                   ctx.plan.entries(planner.DRAW)}
+        runner.exe_builder(ctx, key)
+        built = {glyph.name for glyph in font.glyphs
+                 if glyph.mark == config.mark_colour}
+        self.assertEqual(sorted(planned - built), [], key)
+        self.assertEqual(sorted(built - planned), [], key)
+        return planned
+
+    def children(self, key):
+        """Returns sorted children of all jobs of range key."""
+        ctx = create_context(create_font([]))
+        main, alternates = planner.range_jobs(ctx, key)
+        return sorted({child for job in main + alternates
+                       for child, parents in builders.targets(
+                           ctx, job.builder, job.glyphdata) if child})
+
+    def test_ranges(self):
+        stroke = {'Time Signatures': {
+            'cut time stroke': benchmark.CUT_TIME_STROKE}}
+        for key in sorted(data.ranges):
+            self.assertTrue(self.check(key, stroke), key)
+
+    def test_ranges_without_drawing(self):
+        for key in sorted(data.ranges):
+            self.check(key, {'Global': {'draw missing': '0'}})
+
+    def test_ranges_with_missing_parents(self):
+        # Every third parent, in name order.
+        font = benchmark.synthetic_font(0, create_settings())
+        without = sorted(glyph.name for glyph in font.glyphs)[::3]
+        for key in sorted(data.ranges):
+            for draw_missing in ('0', '1'):
+                self.check(key, {'Global': {'draw missing': draw_missing}},
+                           without)
+
+    def test_ranges_with_skipped_children(self):
+        # Every third child excluded, every other preexisting and kept.
+        for key in sorted(data.ranges):
+            children = self.children(key)
+            excluded = {name.lower(): '1' for name in children[::3]}
+            for draw_missing in ('0', '1'):
+                self.check(key, {'Global': {'draw missing': draw_missing,
+                                            'handle replaced': '0'},
+                                 'Exclude': excluded},
+                           preexisting=children[1::2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Tests of .scheduler: ranges ordered by dependency and built in parallel
+with the same result as one after another."""
+
+# (c) 2021 by Knut Nergaard.
+
+import unittest
+
+from smuflbuilder import benchmark
+from smuflbuilder import context
+from smuflbuilder import data
+from smuflbuilder import log
+from smuflbuilder import planner
+from smuflbuilder import runner
+from smuflbuilder import scheduler
+from smuflbuilder.memfont import *
+from tests import create_context, create_font, create_settings
+
+STROKE = {'Time Signatures': {'cut time stroke': benchmark.CUT_TIME_STROKE}}
+# Children of Staves, Individual notes and Turned time signatures, which are
+# not parents of other ranges.
+PREEXISTING = ['uniE014', 'uniE1D5', 'uniECE0']
+
+
+def dump(font):
+    """Returns glyphs of font as comparable tuples, components by index."""
+    return [(glyph.name, glyph.unicode, glyph.mark, glyph.width,
+             [(component.index, component.delta.x, component.delta.y,
+               component.scale.x, component.scale.y)
+              for component in glyph.components],
+             [(node.type, [(point.x, point.y) for point in node.points])
+              for node in glyph.nodes])
+            for glyph in font.glyphs]
+
+
+class GraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = create_context(create_font([]), STROKE)
+        self.dependencies = scheduler.graph(self.ctx)
+        self.keys = scheduler.order(self.ctx, self.dependencies)
+
+    def test_dependencies(self):
+        self.assertEqual(sorted(self.dependencies), sorted(data.ranges))
+        # Cut time glyphs are mirrored, stems drawn for notes.
+        self.assertIn('time', self.dependencies['turned time'])
+        self.assertIn('time', self.dependencies['reversed time'])
+        self.assertIn('stems', self.dependencies['indv notes'])
+        self.assertEqual(self.dependencies['staves'], set())
+
+    def test_order(self):
+        self.assertEqual(sorted(self.keys), sorted(data.ranges))
+        for i, key in enumerate(self.keys):
+            # Cycles are broken in order of planner.RANGES.
+            for other in self.dependencies[key] - set(self.keys[:i]):
+                self.assertIn(key, self.dependencies[other], key)
+
+    def test_groups(self):
+        groups = scheduler.groups(self.ctx, self.keys, self.dependencies)
+        self.assertEqual(sorted(key for group in groups for key in group),
+                         sorted(self.keys))
+        for group in groups:
+            self.assertEqual(group, [key for key in self.keys
+                                     if key in group])
+        group_of = {key: i for i, group in enumerate(groups) for key in group}
+        for key, others in self.dependencies.items():
+            for other in others:
+                self.assertEqual(group_of[key], group_of[other], key)
+        self.assertIn(['time', 'turned time', 'reversed time'], groups)
+        self.assertIn(['staves'], groups)
+
+
+class ParallelTest(unittest.TestCase):
+
+    def build(self, overrides, processes, preexisting=()):
+        """Builds all ranges in synthetic font, with glyphs preexisting, in
+        processes and returns font and its number of glyphs before build."""
+        config = create_settings(dict(STROKE, **overrides))
+        font = benchmark.synthetic_font(0, config)
+        for name in preexisting:
+            glyph = Glyph()
+            glyph.name = name
+            glyph.width = 100
+            font.glyphs.append(glyph)
+        size = len(font.glyphs)
+        ctx = context.Context(font, config)
+        ctx.log.level = log.QUIET
+        dependencies = scheduler.graph(ctx)
+        keys = scheduler.order(ctx, dependencies)
+        ctx.plan = planner.create(ctx, keys)
+        range_groups = scheduler.groups(ctx, keys, dependencies)
+        self.assertGreater(len(range_groups), 1)
+        scheduler.run(ctx, range_groups, runner.exe_builder, processes)
+        return font, size
+
+    def check(self, overrides, preexisting=()):
+        """Asserts that builds in one and several processes are equal, and
+        returns font and its number of glyphs before build."""
+        serial, size = self.build(overrides, 1, preexisting)
+        parallel = self.build(overrides, 4, preexisting)[0]
+        self.assertEqual(dump(parallel), dump(serial))
+        return serial, size
+
+    def test_drawing(self):
+        font, size = self.check({'Global': {'draw missing': '1'}})
+        # Composites refer to parents drawn in their range group, whose
+        # indexes are remapped when merged.
+        self.assertTrue(any(component.index >= size
+                            for glyph in font.glyphs[size:]
+                            for component in glyph.components))
+
+    def test_without_drawing(self):
+        self.check({'Global': {'draw missing': '0'}})
+
+    def test_overwrite(self):
+        # Preexisting glyphs are changed in place.
+        font, size = self.check({'Global': {'handle replaced': '2'}},
+                                PREEXISTING)
+        for name in PREEXISTING:
+            glyph = font.glyphs[font.FindGlyph(name)]
+            self.assertTrue(glyph.components, name)
+
+    def test_rename(self):
+        # Preexisting glyphs are renamed, new ones appended. Timestamps of
+        # years are the same in both builds.
+        font, size = self.check({'Global': {'handle replaced': '1',
+                                            'timestamp': 'Y'}}, PREEXISTING)
+        for name in PREEXISTING:
+            renamed = font.glyphs[size - len(PREEXISTING) +
+                                  PREEXISTING.index(name)]
+            self.assertTrue(renamed.name.startswith(name + '_'), name)
+            glyph = font.glyphs[font.FindGlyph(name)]
+            self.assertTrue(glyph.components, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Tests of .tables: shipped tables match .data and are never rewritten."""
+
+# (c) 2021 by Knut Nergaard.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from smuflbuilder import tables
+from tests import create_context, create_font
+
+
+class LoadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'tables.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_shipped_file(self):
+        # Compile with python -m smuflbuilder.tables after editing data.py.
+        with open(tables.PATH) as f:
+            self.assertEqual(json.load(f),
+                             json.loads(json.dumps(tables.compile_tables())))
+
+    def test_stale_file(self):
+        stale = tables.compile_tables()
+        stale['stamp'] = [tables.VERSION, 'stale']
+        stale['order'] = {}
+        tables.save(stale, self.path)
+        with open(self.path) as f:
+            content = f.read()
+        loaded = tables.load(self.path)
+        self.assertEqual(loaded['stamp'], tables.compile_tables()['stamp'])
+        self.assertTrue(loaded['order'])
+        with open(self.path) as f:
+            self.assertEqual(f.read(), content)
+
+    def test_missing_file(self):
+        self.assertTrue(tables.load(self.path)['ligatures'])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_context(self):
+        ctx = create_context(create_font([]))
+        self.assertEqual(ctx.tables['ctrl_char'],
+                         tables.compile_tables()['ctrl_char'])
+
+
+if __name__ == '__main__':
+    unittest.main()
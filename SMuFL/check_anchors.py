@@ -4,8 +4,8 @@
 # Version 1.1
 
 # Description:
-# Compares font anchors to latest Bravura metadata file (published at
-# https://github.com/steinbergmedia/bravura) to find missing or superfluous
+# Compares font anchors to the pinned Bravura metadata file (published at
+# https://github.com/steinbergmedia/bravura, see smufl_metadata.py) to find missing or superfluous
 # glyph anchors according to the SMuFL standard. Script will print any findings
 # and mark glyphs with discrepancies unless colour value is set to 0.
 
@@ -16,25 +16,12 @@
 # Use, modify and distribute as desired.
 
 import os
-import contextlib
-import urllib2
-import json
+import smufl_metadata
 
 
 f = fl.font
 
 
-def get_json(url):
-    ''''gets json source files from repository url.'''
-    try:
-        with contextlib.closing(urllib2.urlopen(url)) as raw:
-            source = raw.read()
-    except urllib2.URLError:
-        return('URLError: Unable to connect with online source')
-    data = json.loads(source)
-    return data
-
-
 def compare_anchors(dict_1, dict_2, colour):
     '''compares font vs. metadata anchors, and marks glyphs with discrepancies'''
     seen = set()
@@ -59,9 +46,6 @@ def compare_anchors(dict_1, dict_2, colour):
             print('Glyph not in metadata "glyphsWithAnchors".')
 
 
-# Get raw data.
-b = get_json('https://raw.githubusercontent.com/steinbergmedia/bravura/master/redist/bravura_metadata.json')
-
 f_dict = {}
 name_dict = {}
 b_dict = {}
@@ -76,9 +60,9 @@ for g in f.glyphs:
 
 
 # Build dict of Bravura anchors.
-for name, anchors in b['glyphsWithAnchors'].iteritems():
+for name, anchors in smufl_metadata.bravura_anchors().iteritems():
     if name in f_dict:
-        b_dict[name] = anchors.keys()
+        b_dict[name] = anchors
 
 # Compare Bravura anchors to font anchors to get missing font anchors.
 if not f_dict[None]:
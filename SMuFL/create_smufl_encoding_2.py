@@ -5,7 +5,8 @@
 
 # Description:
 # Generates FontLab encoding file (.enc) for the SMuFL PUA range,
-# based on latest metadata release @ https://github.com/w3c/smufl.
+# based on the pinned metadata release of https://github.com/w3c/smufl
+# (see smufl_metadata.py).
 
 # Naming Scheme:
 # By default, glyph names are formatted uniXXXX (UV with 'uni' prefix),
@@ -27,50 +28,22 @@
 
 
 import os
-import contextlib
-import urllib2
-import json
 from datetime import date
+import smufl_metadata
 
 
-def get_json(url):
-    ''''gets json source files from repository url.'''
-    try:
-        with contextlib.closing(urllib2.urlopen(url)) as raw:
-            source = raw.read()
-    except urllib2.URLError:
-        return('URLError: Unable to connect with online source')
-    data = json.loads(source)
-    return data
+# sorted list of ranges.json.
+r_sorted = smufl_metadata.sorted_ranges()
 
-
-# converts ranges.json to sorted list.
-r = get_json('https://raw.githubusercontent.com/w3c/smufl/gh-pages/metadata/ranges.json')
-r_list = []
-
-for key, value in r.iteritems():
-    values = value['range_start'], value['range_end'], value['description']
-    r_list.append(values)
-
-r_sorted = sorted(r_list)
-
-# converts glyphnames.json to sorted list.
-g = get_json('https://raw.githubusercontent.com/w3c/smufl/gh-pages/metadata/glyphnames.json')
-g_list = []
-
-for key, value in g.items():
-    if type(value) is dict:
-        values = value['codepoint'], value['description'.encode('utf-8')], key
-        g_list.append(values)
-
-g_sorted = sorted(g_list)
+# sorted list of glyphnames.json.
+g_sorted = smufl_metadata.sorted_glyphnames()
 
 # SETTINGS:
 #---------------------
 date = date.today()     # defaults to today's date.
 enc_vector = '10001'    # must be unique to encoding file!
 enc_name = 'SMuFL Complete OT Encoding'  # name in FontLab encoding menu.
-smufl_version = '1.3'
+smufl_version = smufl_metadata.SMUFL_VERSION
 file_path = '/Users/User_name/Library/Application Support/FontLab/Studio 5/Encoding/SMuFL.enc'
 # path and name of encoding file, e.g.:
 # /Users/User_name/Library/Application Support/FontLab/Studio 5/Encoding/SMuFL.enc
@@ -0,0 +1,354 @@
+"""Font reader for the SMuFL scripts outside FontLab.
+
+Reads glyph names, unicodes, notes, advance widths, outlines and anchors of
+a UFO font or a compiled font (.otf, .ttf) into objects offering the subset
+of the FontLab Studio 5 API used by generate_smufl_metadata.py, so that
+metadata can be generated on build machines without FontLab.
+
+UFO fonts are read with the standard library. Notes are taken from the
+<note> element of each glyph, as exported by FontLab, with their lines
+joined by the value separator of the metadata generator. Compiled fonts are
+read with fontTools (https://github.com/fonttools/fonttools), which must be
+installed separately. They have neither notes nor anchors, so notes are
+taken from a name map of glyph name: note, if given, or left empty.
+
+Classes:
+
+Point -- 2D coordinate
+Rect -- bounding rectangle
+Node -- outline segment of points
+Component -- reference to another glyph in font
+Anchor -- named attachment point
+Glyph -- glyph as read from font file
+Font -- container of glyphs
+
+Functions:
+
+read_ufo() -- reads UFO font folder
+read_otf() -- reads compiled font with fontTools
+read_font() -- reads font of any supported format and applies name map
+"""
+
+# (c) 2021 by Knut Nergaard.
+# Use, modify and distribute as desired.
+
+import os
+import plistlib
+import xml.etree.ElementTree as ElementTree
+
+
+class Point(object):
+    """2D coordinate."""
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+
+class Rect(object):
+    """Bounding rectangle of lower left and upper right points."""
+
+    def __init__(self, ll=None, ur=None):
+        self.ll = ll or Point()
+        self.ur = ur or Point(self.ll.x, self.ll.y)
+
+
+class Node(object):
+    """Outline segment: segment type and its points."""
+
+    def __init__(self, type, points):
+        self.type = type
+        self.points = points
+
+
+class Component(object):
+    """Reference to glyph at index, offset by delta and scaled by scale."""
+
+    def __init__(self, index, delta, scale):
+        self.index = index
+        self.delta = delta
+        self.scale = scale
+
+
+class Anchor(object):
+    """Named attachment point."""
+
+    def __init__(self, name, x, y):
+        self.name = name
+        self.x = x
+        self.y = y
+
+
+class Glyph(object):
+    """Glyph as read from font file, with its bounding rectangle."""
+
+    def __init__(self, name):
+        self.name = name
+        self.unicode = 0
+        self.note = None
+        self.width = 0
+        self.nodes = []
+        self.components = []
+        self.anchors = []
+        self.bounds = Rect()
+
+    @property
+    def nodes_number(self):
+        return len(self.nodes)
+
+    def GetBoundingRect(self):
+        """Returns bounding rectangle of outline, including components."""
+        return self.bounds
+
+
+class Font(object):
+    """Container of glyphs, in glyph order."""
+
+    def __init__(self, font_name, upm):
+        self.font_name = font_name
+        self.upm = upm
+        self.glyphs = []
+
+
+def _read_plist(path):
+    """Returns contents of property list file, or empty dict if missing."""
+    if not os.path.exists(path):
+        return {}
+    if hasattr(plistlib, 'load'):
+        with open(path, 'rb') as f:
+            return plistlib.load(f)
+    return plistlib.readPlist(path)
+
+
+def _quadratic_extrema(p0, p1, p2):
+    """Returns end point and extrema of quadratic bezier segment."""
+    points = [p2]
+    for i in (0, 1):
+        denominator = p0[i] - 2 * p1[i] + p2[i]
+        if abs(denominator) > 1e-12:
+            t = (p0[i] - p1[i]) / float(denominator)
+            if 0 < t < 1:
+                points.append(tuple((1 - t) ** 2 * p0[k] + 2 * (1 - t) * t * p1[k] +
+                                    t ** 2 * p2[k] for k in (0, 1)))
+    return points
+
+
+def _cubic_extrema(p0, p1, p2, p3):
+    """Returns end point and extrema of cubic bezier segment."""
+    points = [p3]
+    for i in (0, 1):
+        # Coefficients of derivative a*t^2 + b*t + c.
+        a = -p0[i] + 3 * p1[i] - 3 * p2[i] + p3[i]
+        b = 2 * (p0[i] - 2 * p1[i] + p2[i])
+        c = p1[i] - p0[i]
+        if abs(a) < 1e-12:
+            roots = [-c / float(b)] if abs(b) > 1e-12 else []
+        else:
+            discriminant = b * b - 4 * a * c
+            if discriminant < 0:
+                continue
+            root = discriminant ** 0.5
+            roots = [(-b + root) / (2.0 * a), (-b - root) / (2.0 * a)]
+        for t in roots:
+            if 0 < t < 1:
+                mt = 1 - t
+                points.append(tuple(mt ** 3 * p0[k] + 3 * mt ** 2 * t * p1[k] +
+                                    3 * mt * t ** 2 * p2[k] + t ** 3 * p3[k]
+                                    for k in (0, 1)))
+    return points
+
+
+def _contour_extrema(contour):
+    """Returns on-curve points and curve extrema of UFO contour.
+
+    Contour is a list of (x, y, segment type), with type None for off-curve
+    points.
+    """
+    if contour[0][2] == 'move':
+        current, points = contour[0], contour[1:]
+    else:
+        on_curve = [i for i, point in enumerate(contour) if point[2]]
+        if not on_curve:
+            # Quadratic contour without on-curve points: start at implied one.
+            first = contour[-1]
+            start = ((first[0] + contour[0][0]) / 2.0,
+                     (first[1] + contour[0][1]) / 2.0, 'qcurve')
+            contour = contour + [start]
+            on_curve = [len(contour) - 1]
+        last = on_curve[-1]
+        points = contour[last + 1:] + contour[:last + 1]
+        current = contour[last]
+    extrema = [current[:2]]
+    off_curve = []
+    for point in points:
+        if point[2] is None:
+            off_curve.append(point[:2])
+            continue
+        if point[2] == 'curve' and len(off_curve) == 2:
+            extrema.extend(_cubic_extrema(current[:2], off_curve[0], off_curve[1], point[:2]))
+        elif point[2] in ('curve', 'qcurve') and off_curve:
+            # Quadratic spline, with implied on-curve points between off-curve points.
+            start = current[:2]
+            for i, control in enumerate(off_curve):
+                if i + 1 < len(off_curve):
+                    end = ((control[0] + off_curve[i + 1][0]) / 2.0,
+                           (control[1] + off_curve[i + 1][1]) / 2.0)
+                else:
+                    end = point[:2]
+                extrema.extend(_quadratic_extrema(start, control, end))
+                start = end
+        else:
+            extrema.append(point[:2])
+        off_curve = []
+        current = point
+    return extrema
+
+
+def _transform(contour, transformation):
+    """Returns contour with points transformed by affine transformation."""
+    xx, xy, yx, yy, dx, dy = transformation
+    return [(x * xx + y * yx + dx, x * xy + y * yy + dy, segment)
+            for x, y, segment in contour]
+
+
+def _point_type(point):
+    """Returns segment type of UFO point element, or None if off-curve."""
+    segment_type = point.get('type')
+    return None if segment_type == 'offcurve' else segment_type
+
+
+def _read_glif(path, name, separator):
+    """Returns Glyph, its contours and components (base, transformation)
+    from .glif file. Lines of note are joined by separator."""
+    glyph = Glyph(name)
+    contours = []
+    components = []
+    root = ElementTree.parse(path).getroot()
+    for element in root:
+        if element.tag == 'advance':
+            glyph.width = float(element.get('width', 0))
+        elif element.tag == 'unicode' and not glyph.unicode:
+            glyph.unicode = int(element.get('hex'), 16)
+        elif element.tag == 'note':
+            lines = (element.text or '').strip().splitlines()
+            glyph.note = separator.join(line.strip() for line in lines)
+        elif element.tag == 'anchor':
+            glyph.anchors.append(Anchor(element.get('name'), float(element.get('x')),
+                                        float(element.get('y'))))
+        elif element.tag == 'outline':
+            for item in element:
+                if item.tag == 'component':
+                    components.append((item.get('base'), tuple(
+                        float(item.get(key, default)) for key, default in (
+                            ('xScale', 1), ('xyScale', 0), ('yxScale', 0), ('yScale', 1),
+                            ('xOffset', 0), ('yOffset', 0)))))
+                    continue
+                points = [(float(point.get('x')), float(point.get('y')), _point_type(point))
+                          for point in item if point.tag == 'point']
+                names = [point.get('name') for point in item if point.tag == 'point']
+                if len(points) == 1 and points[0][2] == 'move' and names[0]:
+                    # Anchor of format 1.
+                    glyph.anchors.append(Anchor(names[0], points[0][0], points[0][1]))
+                elif points:
+                    contours.append(points)
+                    glyph.nodes.extend(Node(point[2], [Point(point[0], point[1])])
+                                       for point in points)
+    return glyph, contours, components
+
+
+def read_ufo(path, separator='\n'):
+    """Reads UFO font folder and returns Font.
+
+    Lines of notes are joined by separator.
+    """
+    info = _read_plist(os.path.join(path, 'fontinfo.plist'))
+    lib = _read_plist(os.path.join(path, 'lib.plist'))
+    name = info.get('postscriptFontName')
+    if not name and info.get('familyName'):
+        name = '-'.join(part.replace(' ', '') for part in (info['familyName'],
+                                                            info.get('styleName')) if part)
+    font = Font(name or os.path.splitext(os.path.basename(path.rstrip(os.sep)))[0],
+                info.get('unitsPerEm', 1000))
+
+    glyphs_dir = os.path.join(path, 'glyphs')
+    contents = _read_plist(os.path.join(glyphs_dir, 'contents.plist'))
+    order = [glyph for glyph in lib.get('public.glyphOrder', []) if glyph in contents]
+    order.extend(sorted(set(contents) - set(order)))
+
+    outlines = {}
+    for glyph_name in order:
+        glyph, contours, components = _read_glif(
+            os.path.join(glyphs_dir, contents[glyph_name]), glyph_name, separator)
+        outlines[glyph_name] = (contours, components)
+        font.glyphs.append(glyph)
+    index = dict((glyph.name, i) for i, glyph in enumerate(font.glyphs))
+
+    def decomposed(glyph_name, seen=()):
+        """Returns contours of glyph including those of its components."""
+        contours, components = outlines[glyph_name]
+        result = list(contours)
+        for base, transformation in components:
+            if base in outlines and base not in seen:
+                result.extend(_transform(contour, transformation)
+                              for contour in decomposed(base, seen + (glyph_name,)))
+        return result
+
+    for glyph in font.glyphs:
+        glyph.components = [Component(index[base], Point(t[4], t[5]), Point(t[0], t[3]))
+                            for base, t in outlines[glyph.name][1] if base in index]
+        extrema = [point for contour in decomposed(glyph.name)
+                   for point in _contour_extrema(contour)]
+        if extrema:
+            glyph.bounds = Rect(Point(min(p[0] for p in extrema), min(p[1] for p in extrema)),
+                                Point(max(p[0] for p in extrema), max(p[1] for p in extrema)))
+    return font
+
+
+def read_otf(path):
+    """Reads compiled font (.otf, .ttf) with fontTools and returns Font."""
+    try:
+        from fontTools.ttLib import TTFont
+        from fontTools.pens.boundsPen import BoundsPen
+        from fontTools.pens.recordingPen import DecomposingRecordingPen
+    except ImportError:
+        raise Exception('Please install fontTools to read {}!'.format(path))
+    source = TTFont(path)
+    glyph_set = source.getGlyphSet()
+    unicodes = {}
+    for codepoint, glyph_name in sorted(source.getBestCmap().items()):
+        unicodes.setdefault(glyph_name, codepoint)
+    font = Font(source['name'].getDebugName(6) or
+                os.path.splitext(os.path.basename(path))[0],
+                source['head'].unitsPerEm)
+    for glyph_name in source.getGlyphOrder():
+        glyph = Glyph(glyph_name)
+        glyph.unicode = unicodes.get(glyph_name, 0)
+        glyph.width = source['hmtx'][glyph_name][0]
+        pen = DecomposingRecordingPen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        glyph.nodes = [Node(operator, [Point(*point) for point in points])
+                       for operator, points in pen.value]
+        bounds_pen = BoundsPen(glyph_set)
+        glyph_set[glyph_name].draw(bounds_pen)
+        if bounds_pen.bounds is not None:
+            x_min, y_min, x_max, y_max = bounds_pen.bounds
+            glyph.bounds = Rect(Point(x_min, y_min), Point(x_max, y_max))
+        font.glyphs.append(glyph)
+    source.close()
+    return font
+
+
+def read_font(path, names=None, separator='\n'):
+    """Reads UFO or compiled font and returns Font.
+
+    Lines of notes in UFO are joined by separator. Glyphs without notes take
+    their note from names, a dict of glyph name: note, if given.
+    """
+    if os.path.isdir(path):
+        font = read_ufo(path, separator)
+    else:
+        font = read_otf(path)
+    for glyph in font.glyphs:
+        if not glyph.note and names and glyph.name in names:
+            glyph.note = names[glyph.name]
+    return font
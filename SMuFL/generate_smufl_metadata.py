@@ -1,6 +1,6 @@
 #FLM: Generate SMuFL Metadata
 
-# Version 1.1
+# Version 1.5
 
 # Description:
 # Generates JSON metadata file for SMuFL fonts.
@@ -31,6 +31,27 @@
 # VALUE_SEPARATOR (carriage return (\r) by default) should be the same as in Notes and as specified
 # in Set Optional Descriptions.
 
+# With INCREMENTAL set to True, the metadata file is saved without timestamp, along with a file of
+# fingerprints of glyph outlines, widths, anchors and notes ('_metadata.fingerprints.json'). In
+# later runs, bounding boxes, advance widths and anchors are only recomputed for glyphs changed
+# since, and taken from the previous metadata file otherwise. All glyphs are recomputed when the
+# font's UPM or PRECISION has changed.
+
+# The metadata file is written section by section, sorted and indented by 4 spaces. With COMPACT
+# set to True, it is written without any whitespace instead. Values in staff spaces are rounded
+# to PRECISION decimals, so that files of unchanged fonts are identical byte for byte.
+
+# Outside FontLab, the script generates metadata of UFO fonts or compiled fonts (.otf, .ttf) read
+# by font_reader.py, in parallel processes, one per font. Reading compiled fonts requires
+# fontTools. From the folder containing the script:
+
+# python generate_smufl_metadata.py font.ufo [font.otf ...] [-o folder] [-n names.json]
+#                                   [-j jobs] [--incremental] [--compact]
+
+# Metadata files are saved to the folder of each font unless another is given with -o. Glyphs
+# without notes, e.g. all glyphs of compiled fonts, take their note from a JSON name map of glyph
+# name: note given with -n, or the SMuFL name of their codepoint.
+
 # This script is based on Ben Timms's metadata generator for SMuFL fonts, which is available at
 # the SMuFL repository on GitHub (https://github.com/w3c/smufl).
 
@@ -40,24 +61,37 @@
 
 
 import os
+import sys
+import copy
+import hashlib
+import argparse
+import multiprocessing
+import traceback
 from time import localtime, strftime
-import contextlib
-import urllib2
 import json
-from FL import *
-f = fl.font
+try:
+    from FL import *
+except ImportError:  # Command line, see main().
+    fl = None
+try:
+    from cStringIO import StringIO
+except ImportError:  # Python 3.
+    from io import StringIO
+import smufl_metadata
+f = None  # Font metadata is generated for, see generate().
 
 OUTPUT_DIR = os.path.join(os.path.expanduser('~'), 'Desktop')
 VALUE_SEPARATOR = '\r'
-FILENAME = os.path.join(OUTPUT_DIR, '{}_metadata_{}.json'.format(f.font_name,
-                                                                 strftime("%Y%m%d_%H%M%S", localtime())))
-
-if f is None:
-    raise Exception('Please open a font first!')
+INCREMENTAL = False
+COMPACT = False
+# Decimals of values in staff spaces.
+PRECISION = 3
+# Increased when fingerprints change format.
+FINGERPRINTS_VERSION = 1
 
 # Edit the following dictionaries manually as needed.
 FONT_METADATA = {
-    "fontName": f.font_name,
+    "fontName": None,  # Set to name of font.
     "fontVersion": 1.12,
     "engravingDefaults": {
         "arrowShaftThickness": 0.16,
@@ -149,8 +183,8 @@ SET_INFO = {
 
 def to_cartesian(val):
     ''' Converts font units to staff spaces based on font UPM. '''
-    space = f.upm / 4
-    return round(float(val) / space, 3)
+    space = f.upm // 4
+    return round(float(val) / space, PRECISION)
 
 
 def format_codepoint(val):
@@ -176,133 +210,371 @@ def get_alt_description(note):
     return description
 
 
-def note_for_name(glyphname):
-    ''' Returns note for specified glyph by name. '''
-    index = f.FindGlyph(glyphname)
-    return f.glyphs[index].note
-
-
-def get_json(url):
-    ''''gets json source files from repository url.'''
+def scan_glyphs(glyphs):
+    ''' Indexes glyphs in one pass and returns dicts of name: note, name: glyph and
+    base name: alternate names, and list of glyphs to build metadata for. '''
+    notes = {}
+    glyph_dict = {}
+    alt_dict = {}
+    valid = []
+    for g in glyphs:
+        notes[g.name] = g.note
+        glyph_dict[g.name] = g
+        if '.salt' in g.name or '.ss' in g.name:
+            alt_dict.setdefault(g.name[:7], []).append(g.name)
+
+        # Validate glyphs.
+        if g.note is None or len(g.note) == 0:
+            print('Skipping glyph with empty note: {}'.format(g.name))
+        elif g.nodes_number == 0 and len(g.components) == 0:
+            print('Skipping glyph with no nodes: {}'.format(g.name))
+        else:
+            valid.append(g)
+    return notes, glyph_dict, alt_dict, valid
+
+
+def outline_fingerprint(g, outlines):
+    ''' Returns hash of glyph nodes and components, including outlines of component glyphs.
+    Hashes are memoized in outlines by glyph name. '''
+    if g.name not in outlines:
+        parts = [repr([(n.type, [(p.x, p.y) for p in n.points]) for n in g.nodes])]
+        for c in g.components:
+            parts.append(repr((outline_fingerprint(f.glyphs[c.index], outlines),
+                               c.delta.x, c.delta.y, c.scale.x, c.scale.y)))
+        outlines[g.name] = hashlib.md5(''.join(parts).encode('utf-8')).hexdigest()
+    return outlines[g.name]
+
+
+def glyph_fingerprint(g, outlines):
+    ''' Returns hash of glyph outline, width, anchors and note. '''
+    anchors = [(a.name, a.x, a.y) for a in g.anchors]
+    return hashlib.md5(repr((outline_fingerprint(g, outlines), g.width, anchors,
+                             g.note)).encode('utf-8')).hexdigest()
+
+
+def metadata_filename(font, folder=OUTPUT_DIR):
+    ''' Returns path of metadata file of font in folder, timestamped unless INCREMENTAL. '''
+    if INCREMENTAL:
+        return os.path.join(folder, '{}_metadata.json'.format(font.font_name))
+    return os.path.join(folder, '{}_metadata_{}.json'.format(
+        font.font_name, strftime("%Y%m%d_%H%M%S", localtime())))
+
+
+def fingerprints_filename(filename):
+    ''' Returns path of fingerprints file of metadata file. '''
+    return os.path.splitext(filename)[0] + '.fingerprints.json'
+
+
+def load_previous(filename):
+    ''' Returns previous metadata and fingerprints by glyph name, or None if either file is
+    missing, or fingerprints are of another version, UPM or PRECISION. '''
     try:
-        with contextlib.closing(urllib2.urlopen(url)) as raw:
-            source = raw.read()
-    except urllib2.URLError:
-        return('URLError: Unable to connect with online source')
-    data = json.loads(source)
-    return data
-
-
-# progaram:
-print('Starting ...')
-
-# Build dict of classes from classes.json and map keys to alternates.
-class_dict = {}
-classes_data = get_json('https://raw.githubusercontent.com/w3c/smufl/gh-pages/metadata/classes.json')
-for classes, smufl_names in classes_data.iteritems():
-    for name in smufl_names:
-        class_dict.setdefault(name, []).append(classes)
-
-# Build dict of alternates
-alt_dict = {}
-for g in f.glyphs:
-    if '.salt' in g.name or '.ss' in g.name:
-        alt_dict.setdefault(g.name[:7], []).append(g.name)
-
-set_glyphs = []
-
-# Build file.
-print('Building metadata ...')
-for g in f.glyphs:
-
-    # Validate glyphs.
-    if g.note is None or len(g.note) == 0:
-        print 'Skipping glyph with empty note: {}'.format(g.name)
-        continue
-
-    if g.nodes_number == 0 and len(g.components) == 0:
-        print 'Skipping glyph with no nodes: {}'.format(g.name)
-        continue
-
-    smufl_name = get_smufl_name(g.note)
-    alt_description = get_alt_description(g.note)
-
-    # Set glyph advace widths.
-    advance_wdth = float(g.width)
-    FONT_METADATA["glyphAdvanceWidths"][smufl_name] = \
-        to_cartesian(advance_wdth)
-
-    # Set glyph bounding boxes.
-    bounding_box = g.GetBoundingRect()
-    FONT_METADATA["glyphBBoxes"][smufl_name] = \
-        {"bBoxSW":
-         [to_cartesian(bounding_box.ll.x),
-          to_cartesian(bounding_box.ll.y)],
-         "bBoxNE":
-         [to_cartesian(bounding_box.ur.x),
-          to_cartesian(bounding_box.ur.y)]}
-
-    # Set glyphs with alternates.
-    if g.name in alt_dict:
-        FONT_METADATA["glyphsWithAlternates"][smufl_name] = {}
-        FONT_METADATA["glyphsWithAlternates"][smufl_name]["alternates"] = []
-
-        for alternate in alt_dict[g.name]:
-            alt_note = note_for_name(alternate)
-            FONT_METADATA["glyphsWithAlternates"][smufl_name]["alternates"].append({
-                "codepoint": "U+{}".format(alternate[3:7]),
-                "name": get_smufl_name(alt_note)})
-
-    # Set glyphs with anchors.
-    if len(g.anchors) > 0:
-        FONT_METADATA["glyphsWithAnchors"][smufl_name] = {}
-
-        for anchor in g.anchors:
-            FONT_METADATA["glyphsWithAnchors"][smufl_name][anchor.name] = \
-                [to_cartesian(anchor.x), to_cartesian(anchor.y)]
-
-    # Set ligatures.
-    if g.unicode >= 0xF400:
-        if g.name.count('uni') >= 2 and '_' in g.name:
-            FONT_METADATA["ligatures"][smufl_name] = {}
-            FONT_METADATA["ligatures"][smufl_name]["codepoint"] = format_codepoint(g.unicode)
-            FONT_METADATA["ligatures"][smufl_name]["description"] = alt_description
-
-            # Get component names from ligature names.
-            component_names = g.name.split('_')
-            component_notes = []
-
-            for c_name in component_names:
-                c_note = note_for_name(c_name)
-                component_notes.append(c_note)
-                FONT_METADATA["ligatures"][smufl_name]["componentGlyphs"] = component_notes
-
-        # Set optional glyphs.
-        FONT_METADATA["optionalGlyphs"][smufl_name] = {"classes": []}
-        FONT_METADATA["optionalGlyphs"][smufl_name]["codepoint"] = format_codepoint(g.unicode)
-        if g.name.endswith(('.salt', '.ss'), 7, -2):
-            alt_name = g.name[:7]
-            smufl_alt = note_for_name(alt_name)
-            if smufl_alt in class_dict:
-                for value in class_dict[smufl_alt]:
-                    FONT_METADATA["optionalGlyphs"][smufl_name]["classes"].append(value)
-                
-        # Set sets.
-        if g.name.endswith('.ss', 7, -2):
-            FONT_METADATA["sets"] = SET_INFO
+        with open(filename) as infile:
+            metadata = json.load(infile)
+        with open(fingerprints_filename(filename)) as infile:
+            fingerprints = json.load(infile)
+    except (IOError, ValueError):
+        return None
+    if (fingerprints.get('version') != FINGERPRINTS_VERSION or
+            fingerprints.get('upm') != f.upm or fingerprints.get('precision') != PRECISION):
+        return None
+    return metadata, fingerprints['glyphs']
+
+
+def compare_fingerprints(glyphs, previous):
+    ''' Returns fingerprints of glyphs by name, and set of SMuFL names of glyphs unchanged since
+    previous metadata. '''
+    fingerprints = {}
+    outlines = {}
+    unchanged = set()
+    for smufl_name, g in glyphs:
+        fingerprints[g.name] = glyph_fingerprint(g, outlines)
+        if (previous is not None and previous[1].get(g.name) == fingerprints[g.name] and
+                smufl_name in previous[0]["glyphBBoxes"]):
+            unchanged.add(smufl_name)
+    if previous is not None:
+        print('Reused {} unchanged glyphs, recomputed {}.'.format(len(unchanged),
+                                                                  len(glyphs) - len(unchanged)))
+    return fingerprints, unchanged
+
+
+def advance_widths(glyphs, previous, unchanged):
+    ''' Yields SMuFL names and advance widths of glyphs. '''
+    for smufl_name, g in glyphs:
+        if smufl_name in unchanged:
+            yield smufl_name, previous[0]["glyphAdvanceWidths"][smufl_name]
+        else:
+            yield smufl_name, to_cartesian(float(g.width))
+
+
+def bounding_boxes(glyphs, previous, unchanged):
+    ''' Yields SMuFL names and bounding boxes of glyphs. '''
+    for smufl_name, g in glyphs:
+        if smufl_name in unchanged:
+            yield smufl_name, previous[0]["glyphBBoxes"][smufl_name]
+            continue
+        bounding_box = g.GetBoundingRect()
+        yield smufl_name, {"bBoxSW":
+                           [to_cartesian(bounding_box.ll.x),
+                            to_cartesian(bounding_box.ll.y)],
+                           "bBoxNE":
+                           [to_cartesian(bounding_box.ur.x),
+                            to_cartesian(bounding_box.ur.y)]}
+
+
+def glyphs_with_anchors(glyphs, previous, unchanged):
+    ''' Yields SMuFL names and anchors of glyphs with anchors. '''
+    for smufl_name, g in glyphs:
+        if smufl_name in unchanged:
+            if smufl_name in previous[0]["glyphsWithAnchors"]:
+                yield smufl_name, previous[0]["glyphsWithAnchors"][smufl_name]
+        elif len(g.anchors) > 0:
+            yield smufl_name, dict((anchor.name, [to_cartesian(anchor.x), to_cartesian(anchor.y)])
+                                   for anchor in g.anchors)
+
+
+def glyphs_with_alternates(glyphs, notes, alt_dict):
+    ''' Yields SMuFL names and alternates of glyphs with alternates. '''
+    for smufl_name, g in glyphs:
+        if g.name in alt_dict:
+            yield smufl_name, {"alternates": [
+                {"codepoint": "U+{}".format(alternate[3:7]),
+                 "name": get_smufl_name(notes[alternate])}
+                for alternate in alt_dict[g.name]]}
+
+
+def ligatures(glyphs, notes):
+    ''' Yields SMuFL names and ligature entries of ligatures. '''
+    for smufl_name, g in glyphs:
+        if g.unicode >= 0xF400 and g.name.count('uni') >= 2 and '_' in g.name:
+            # Get component notes from ligature names.
+            yield smufl_name, {
+                "codepoint": format_codepoint(g.unicode),
+                "description": get_alt_description(g.note),
+                "componentGlyphs": [notes.get(c_name) for c_name in g.name.split('_')]}
+
+
+def optional_glyphs(glyphs, notes, class_dict):
+    ''' Yields SMuFL names and optional glyph entries of optional glyphs. '''
+    for smufl_name, g in glyphs:
+        if g.unicode >= 0xF400:
+            classes = []
+            if g.name.endswith(('.salt', '.ss'), 7, -2):
+                classes.extend(class_dict.get(notes.get(g.name[:7]), []))
+            yield smufl_name, {"classes": classes, "codepoint": format_codepoint(g.unicode)}
+
+
+def sets(valid, notes):
+    ''' Returns sets section of glyphs in stylistic sets, in glyph order. '''
+    section = {}
+    set_glyphs = []
+    for g in valid:
+        if g.unicode >= 0xF400 and g.name.endswith('.ss', 7, -2):
+            if not section:
+                section = copy.deepcopy(SET_INFO)
             glyph_info = {
-                "alternateFor": smufl_alt,
+                "alternateFor": notes.get(g.name[:7]),
                 "codepoint": format_codepoint(g.unicode),
                 "description": get_alt_description(g.note),
-                "name": smufl_name}
+                "name": get_smufl_name(g.note)}
             suffix = g.name[8:]
-            if suffix in FONT_METADATA["sets"]:
+            if suffix in section:
                 set_glyphs.append(glyph_info)
-                FONT_METADATA["sets"][suffix]["glyphs"] = set_glyphs
-
-# Write to file.
-print 'Writing metadata to: {}'.format(FILENAME)
-with open(FILENAME, 'w') as outfile:
-    json.dump(FONT_METADATA, outfile, indent=4, sort_keys=True)
-
-print 'All done!'
+                section[suffix]["glyphs"] = set_glyphs
+    return section
+
+
+class MetadataWriter(object):
+    ''' Writes metadata to file section by section, as json.dump(..., sort_keys=True) would,
+    indented by 4 spaces, or without whitespace if compact. '''
+
+    def __init__(self, outfile, compact=False):
+        self.outfile = outfile
+        self.compact = compact
+        if compact:
+            self.separators = (',', ':')
+        else:
+            self.separators = (', ', ': ')
+        self.first = True
+        outfile.write('{')
+
+    def newline(self, depth):
+        ''' Returns line break and indentation of depth. '''
+        if self.compact:
+            return ''
+        return '\n' + ' ' * 4 * depth
+
+    def dumps(self, value, depth):
+        ''' Returns value as JSON, indented to depth. '''
+        text = json.dumps(value, indent=None if self.compact else 4, sort_keys=True,
+                          separators=self.separators)
+        return text.replace('\n', self.newline(depth))
+
+    def key(self, key):
+        ''' Writes key of next section. '''
+        if not self.first:
+            self.outfile.write(self.separators[0])
+        self.first = False
+        self.outfile.write(self.newline(1) + json.dumps(key) + self.separators[1])
+
+    def write_section(self, key, value):
+        ''' Writes section key with value. '''
+        self.key(key)
+        self.outfile.write(self.dumps(value, 1))
+
+    def write_entries(self, key, entries):
+        ''' Writes section key as object of (name, value) entries, sorted by name. '''
+        self.key(key)
+        self.outfile.write('{')
+        empty = True
+        for name, value in entries:
+            if not empty:
+                self.outfile.write(self.separators[0])
+            empty = False
+            self.outfile.write(self.newline(2) + json.dumps(name) + self.separators[1] +
+                               self.dumps(value, 2))
+        if not empty:
+            self.outfile.write(self.newline(1))
+        self.outfile.write('}')
+
+    def close(self):
+        ''' Ends metadata. '''
+        self.outfile.write(self.newline(0) + '}')
+
+
+def write_metadata(outfile, valid, notes, alt_dict, class_dict, previous=None):
+    ''' Writes FONT_METADATA to file, streaming the sections generated from glyph indexes, and
+    returns fingerprints of glyphs. Bounding boxes, advance widths and anchors of glyphs unchanged
+    since previous metadata are copied from it. '''
+    # Glyphs by SMuFL name, sorted as in file. Of glyphs sharing a name, the last one is kept.
+    glyphs = sorted(dict((get_smufl_name(g.note), g) for g in valid).items())
+    fingerprints, unchanged = compare_fingerprints(glyphs, previous)
+    sections = {
+        "glyphAdvanceWidths": lambda: advance_widths(glyphs, previous, unchanged),
+        "glyphBBoxes": lambda: bounding_boxes(glyphs, previous, unchanged),
+        "glyphsWithAlternates": lambda: glyphs_with_alternates(glyphs, notes, alt_dict),
+        "glyphsWithAnchors": lambda: glyphs_with_anchors(glyphs, previous, unchanged),
+        "ligatures": lambda: ligatures(glyphs, notes),
+        "optionalGlyphs": lambda: optional_glyphs(glyphs, notes, class_dict),
+    }
+    writer = MetadataWriter(outfile, COMPACT)
+    for key in sorted(FONT_METADATA):
+        if key in sections:
+            writer.write_entries(key, sections[key]())
+        elif key == "sets":
+            writer.write_section(key, sets(valid, notes))
+        else:
+            writer.write_section(key, FONT_METADATA[key])
+    writer.close()
+    return fingerprints
+
+
+def generate(font, filename):
+    ''' Writes metadata of font to filename, along with fingerprints if INCREMENTAL. '''
+    global f
+    f = font
+    FONT_METADATA["fontName"] = font.font_name
+
+    # Dict of classes from classes.json, mapped to SMuFL names.
+    class_dict = smufl_metadata.classes_for_glyph()
+
+    # Index glyphs in one pass, then build file from indexes.
+    notes, glyph_dict, alt_dict, valid = scan_glyphs(font.glyphs)
+
+    previous = load_previous(filename) if INCREMENTAL else None
+
+    # Build and write file section by section.
+    print('Writing metadata to: {}'.format(filename))
+    with open(filename, 'w') as outfile:
+        fingerprints = write_metadata(outfile, valid, notes, alt_dict, class_dict, previous)
+
+    if INCREMENTAL:
+        with open(fingerprints_filename(filename), 'w') as outfile:
+            json.dump({"version": FINGERPRINTS_VERSION, "upm": font.upm, "precision": PRECISION,
+                       "glyphs": fingerprints}, outfile, indent=0, sort_keys=True)
+
+
+def generate_file(path, names=None, folder=None, incremental=False, compact=False):
+    ''' Reads font file with font_reader and writes its metadata to folder (defaults to folder of
+    font). Returns dict of font, metadata filename, printed output and any error. '''
+    global INCREMENTAL, COMPACT
+    INCREMENTAL, COMPACT = incremental, compact
+    import font_reader
+    stdout, sys.stdout = sys.stdout, StringIO()
+    filename, error = None, None
+    try:
+        font = font_reader.read_font(path, names, VALUE_SEPARATOR)
+        unnamed = [g for g in font.glyphs if not g.note and g.unicode]
+        if unnamed:
+            codepoints = smufl_metadata.glyphnames_for_codepoint()
+            for g in unnamed:
+                if g.unicode in codepoints:
+                    g.note = str(codepoints[g.unicode])
+        filename = metadata_filename(font, folder or os.path.dirname(os.path.abspath(path)))
+        generate(font, filename)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        printed, sys.stdout = sys.stdout.getvalue(), stdout
+    return {'font': path, 'metadata': filename, 'printed': printed, 'error': error}
+
+
+def _generate_job(args):
+    ''' Runs generate_file() in worker process. '''
+    return generate_file(*args)
+
+
+def parse_args():
+    ''' Returns parsed command line arguments. '''
+    parser = argparse.ArgumentParser(prog='generate_smufl_metadata.py')
+    parser.add_argument('fonts', nargs='+', help='UFO font folders or compiled fonts (.otf, .ttf)')
+    parser.add_argument('-o', '--output', help='output folder (defaults to folder of each font)')
+    parser.add_argument('-n', '--names', help='JSON name map of glyph name: note')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='number of processes (defaults to CPU count)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only recompute changed glyphs, see INCREMENTAL')
+    parser.add_argument('--compact', action='store_true',
+                        help='write metadata without whitespace, see COMPACT')
+    return parser.parse_args()
+
+
+def main():
+    ''' Generates metadata of fonts in process pool and prints results. Exits with status 1 if
+    any font failed. '''
+    args = parse_args()
+    names = None
+    if args.names:
+        with open(args.names) as infile:
+            names = json.load(infile)
+    jobs = [(path, names, args.output, args.incremental, args.compact) for path in args.fonts]
+
+    processes = min(args.jobs or multiprocessing.cpu_count(), len(jobs))
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_generate_job, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_generate_job(job) for job in jobs]
+
+    for result in results:
+        print('\n=== {} ==='.format(result['font']))
+        sys.stdout.write(result['printed'])
+        if result['error']:
+            print(result['error'])
+    if any(result['error'] for result in results):
+        sys.exit(1)
+    print('All done!')
+
+
+if fl is not None:
+    if fl.font is None:
+        raise Exception('Please open a font first!')
+    print('Starting ...')
+    generate(fl.font, metadata_filename(fl.font))
+    print('All done!')
+elif __name__ == '__main__':
+    main()
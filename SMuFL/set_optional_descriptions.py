@@ -1,7 +1,7 @@
 #FLM: Set Optional Descriptions
 
 # Description:
-# Retrieves glyph descriptions for optional glyphs from the latest bravura metadata JSON file
+# Retrieves glyph descriptions for optional glyphs from the pinned bravura metadata JSON file
 # published at https://github.com/steinbergmedia/bravura, and appends them to the Note field of
 # glyphs at the corresponding codepoints, along with the value separator of your choice.
 
@@ -15,20 +15,7 @@
 
 
 import os
-import contextlib
-import urllib2
-import json
-
-
-def get_json(url):
-    ''''gets json source files from repository url.'''
-    try:
-        with contextlib.closing(urllib2.urlopen(url)) as raw:
-            source = raw.read()
-    except urllib2.URLError:
-        return('URLError: Unable to connect with online source')
-    data = json.loads(source)
-    return data
+import smufl_metadata
 
 
 def set_description(glyph):
@@ -51,16 +38,8 @@ VALUE_SEPARATOR = '\r'
 if fl.font is None:
     raise Exception('Please open a font first!')
 
-metadata = get_json('https://raw.githubusercontent.com/steinbergmedia/bravura/master/redist/bravura_metadata.json')
-
-descriptions = {}
-
-# Build dictionary of smufl names : descriptions.
-for structure, smufl_names in metadata.iteritems():
-    if structure in ['ligatures', 'optionalGlyphs', 'sets']:
-        for smufl_name, values in smufl_names.iteritems():
-            if values.has_key('description'):
-                descriptions[smufl_name] = values['description']
+# Dictionary of smufl names : descriptions.
+descriptions = smufl_metadata.bravura_descriptions()
 
 for g in fl.font.glyphs:
     set_description(g)
@@ -1,7 +1,7 @@
 #FLM: Set SMuFL Names
 
 # Description:
-# This script retrieves discriptive SMuFL names from the latest published glyphnames.json metadata
+# This script retrieves discriptive SMuFL names from the pinned glyphnames.json metadata
 # file published at https://github.com/w3c/smufl, and adds them to the Note field of the glyphs at
 # the corresponding codepoint.
 
@@ -15,20 +15,7 @@
 
 
 import os
-import contextlib
-import urllib2
-import json
-
-
-def get_json(url):
-    ''''gets json source files from repository url.'''
-    try:
-        with contextlib.closing(urllib2.urlopen(url)) as raw:
-            source = raw.read()
-    except urllib2.URLError:
-        return('URLError: Unable to connect with online source')
-    data = json.loads(source)
-    return data
+import smufl_metadata
 
 
 def set_glyph_note_to_smufl_name(glyph):
@@ -44,13 +31,8 @@ def set_glyph_note_to_smufl_name(glyph):
 if fl.font is None:
     raise Exception('Please open a font first!')
 
-glyphnames_data = get_json('https://raw.githubusercontent.com/w3c/smufl/gh-pages/metadata/glyphnames.json')
-
-glyphnames_for_codepoint = {}
-
-# Build a map of glyph names indexed on codepoint
-for glyphname, glyphdata in glyphnames_data.iteritems():
-    glyphnames_for_codepoint[int(glyphdata['codepoint'][2:], 16)] = glyphname
+# Map of glyph names indexed on codepoint.
+glyphnames_for_codepoint = smufl_metadata.glyphnames_for_codepoint()
 
 for glyph in fl.font.glyphs:
     set_glyph_note_to_smufl_name(glyph)
@@ -0,0 +1,259 @@
+"""Shared store of SMuFL and Bravura metadata for the SMuFL scripts.
+
+The metadata documents published at https://github.com/w3c/smufl
+(classes.json, glyphnames.json, ranges.json) and
+https://github.com/steinbergmedia/bravura (bravura_metadata.json) are read
+from a local cache folder, one subfolder per repository and pinned git ref:
+
+~/.smufl_metadata/smufl/v1.4/glyphnames.json
+~/.smufl_metadata/bravura/bravura-1.392/bravura_metadata.json
+
+Documents missing from the cache are downloaded once and kept. Scripts never
+go online otherwise, so they run offline once the cache is filled, e.g. with:
+
+python smufl_metadata.py [--update]
+
+On machines without network access, the JSON files may simply be copied into
+the ref folders. The cache folder may be moved by setting the
+SMUFL_METADATA environment variable.
+
+Each document is parsed once into the indexes used by the scripts, which are
+pickled next to it, stamped with a hash of the document, and reloaded from
+the pickle in later runs. Runs with Python 2 (FontLab) and Python 3.
+
+Classes:
+
+MetadataError -- raised if a document is neither cached nor downloadable
+
+Functions:
+
+load() -- returns index of document, reading or compiling it once
+update() -- downloads documents of pinned versions into cache
+glyphnames_for_codepoint() -- returns dict of codepoint: SMuFL name
+sorted_glyphnames() -- returns sorted list of (codepoint, description, name)
+sorted_ranges() -- returns sorted list of (start, end, description)
+classes_for_glyph() -- returns dict of SMuFL name: list of classes
+bravura_anchors() -- returns dict of SMuFL name: list of anchor names
+bravura_descriptions() -- returns dict of SMuFL name: description
+"""
+
+# (c) 2021 by Knut Nergaard.
+# Use, modify and distribute as desired.
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+try:
+    from urllib2 import urlopen, URLError
+except ImportError:  # Python 3.
+    from urllib.request import urlopen
+    from urllib.error import URLError
+
+# Pinned versions and the release tags (or commit SHAs) they are fetched
+# from. Documents are cached per ref, so that a changed ref is never served
+# from the cache of another. Branch names (e.g. 'gh-pages') work too, but are
+# then cached as downloaded and only refreshed with --update.
+SMUFL_VERSION = '1.4'
+SMUFL_REF = 'v1.4'
+BRAVURA_VERSION = '1.392'
+BRAVURA_REF = 'bravura-1.392'
+
+SMUFL_URL = 'https://raw.githubusercontent.com/w3c/smufl/{}/metadata/{}'
+BRAVURA_URL = ('https://raw.githubusercontent.com/steinbergmedia/bravura/'
+               '{}/redist/{}')
+
+CACHE_DIR = os.environ.get(
+    'SMUFL_METADATA', os.path.join(os.path.expanduser('~'), '.smufl_metadata'))
+
+# Increased when indexes change format.
+VERSION = 1
+
+# Indexes of process, once read or compiled.
+_indexes = {}
+
+
+class MetadataError(Exception):
+    """Document is neither cached nor downloadable."""
+
+
+def _index_glyphnames(document):
+    """Returns codepoints and sorted glyph entries of glyphnames.json."""
+    codepoints = {}
+    entries = []
+    for name, values in document.items():
+        if not isinstance(values, dict):
+            continue
+        codepoints[int(values['codepoint'][2:], 16)] = name
+        entries.append((values['codepoint'], values['description'], name))
+    return {'codepoints': codepoints, 'sorted': sorted(entries)}
+
+
+def _index_ranges(document):
+    """Returns sorted list of (start, end, description) of ranges.json."""
+    return sorted((values['range_start'], values['range_end'],
+                   values['description']) for values in document.values())
+
+
+def _index_classes(document):
+    """Returns dict of SMuFL name: list of classes of classes.json."""
+    classes = {}
+    for class_name, names in sorted(document.items()):
+        for name in names:
+            classes.setdefault(name, []).append(class_name)
+    return classes
+
+
+def _index_bravura(document):
+    """Returns anchor names and descriptions of bravura_metadata.json."""
+    anchors = {}
+    for name, values in document['glyphsWithAnchors'].items():
+        anchors[name] = list(values.keys())
+    descriptions = {}
+    for structure in ('ligatures', 'optionalGlyphs', 'sets'):
+        for name, values in document.get(structure, {}).items():
+            if 'description' in values:
+                descriptions[name] = values['description']
+    return {'anchors': anchors, 'descriptions': descriptions}
+
+
+# Document key: (source, filename, index function).
+DOCUMENTS = {
+    'glyphnames': ('smufl', 'glyphnames.json', _index_glyphnames),
+    'ranges': ('smufl', 'ranges.json', _index_ranges),
+    'classes': ('smufl', 'classes.json', _index_classes),
+    'bravura': ('bravura', 'bravura_metadata.json', _index_bravura),
+}
+
+
+def _folder(source):
+    """Returns cache folder of pinned ref of source."""
+    ref = SMUFL_REF if source == 'smufl' else BRAVURA_REF
+    return os.path.join(CACHE_DIR, source, ref.replace('/', '_'))
+
+
+def _url(source, filename):
+    """Returns download url of document."""
+    if source == 'smufl':
+        return SMUFL_URL.format(SMUFL_REF, filename)
+    return BRAVURA_URL.format(BRAVURA_REF, filename)
+
+
+def _download(source, filename):
+    """Downloads document into cache folder and returns its path."""
+    folder = _folder(source)
+    path = os.path.join(folder, filename)
+    url = _url(source, filename)
+    try:
+        raw = urlopen(url)
+        try:
+            content = raw.read()
+        finally:
+            raw.close()
+        json.loads(content.decode('utf-8'))
+    except (URLError, IOError, ValueError) as e:
+        raise MetadataError(
+            'Unable to download {} ({}). Please copy it into {} or connect '
+            'to the internet once.'.format(url, e, folder))
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    # Written under another name first, so that the cache never holds
+    # partial documents.
+    with open(path + '.part', 'wb') as f:
+        f.write(content)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(path + '.part', path)
+    return path
+
+
+def load(key):
+    """Returns index of document key, reading it once per process.
+
+    Index is read from its pickle if stamped with the cached document, and
+    compiled and pickled otherwise. Missing documents are downloaded.
+    """
+    if key in _indexes:
+        return _indexes[key]
+    source, filename, compile_index = DOCUMENTS[key]
+    path = os.path.join(_folder(source), filename)
+    if not os.path.exists(path):
+        path = _download(source, filename)
+    with open(path, 'rb') as f:
+        content = f.read()
+    stamp = [VERSION, hashlib.md5(content).hexdigest()]
+    # Pickles of Python 2 and 3 differ in their strings.
+    pickled = '{}.py{}.pickle'.format(os.path.splitext(path)[0],
+                                      sys.version_info[0])
+    index = None
+    try:
+        with open(pickled, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['stamp'] == stamp:
+            index = cached['index']
+    except Exception:
+        pass
+    if index is None:
+        index = compile_index(json.loads(content.decode('utf-8')))
+        try:
+            with open(pickled, 'wb') as f:
+                pickle.dump({'stamp': stamp, 'index': index}, f, 2)
+        except (IOError, OSError):
+            pass
+    _indexes[key] = index
+    return index
+
+
+def update(keys=None):
+    """Downloads documents keys (defaults to all) of pinned versions.
+
+    Replaces cached documents, whose indexes are compiled again on next load.
+    """
+    for key in keys or sorted(DOCUMENTS):
+        source, filename, _ = DOCUMENTS[key]
+        print('Downloading {} ...'.format(_url(source, filename)))
+        _download(source, filename)
+        _indexes.pop(key, None)
+
+
+def glyphnames_for_codepoint():
+    """Returns dict of codepoint (int): SMuFL name, from glyphnames.json."""
+    return load('glyphnames')['codepoints']
+
+
+def sorted_glyphnames():
+    """Returns list of (codepoint, description, SMuFL name), sorted by
+    codepoint ('U+E000'), from glyphnames.json."""
+    return load('glyphnames')['sorted']
+
+
+def sorted_ranges():
+    """Returns list of (start, end, description), sorted by start, from
+    ranges.json."""
+    return load('ranges')
+
+
+def classes_for_glyph():
+    """Returns dict of SMuFL name: list of classes, from classes.json."""
+    return load('classes')
+
+
+def bravura_anchors():
+    """Returns dict of SMuFL name: list of anchor names, from Bravura."""
+    return load('bravura')['anchors']
+
+
+def bravura_descriptions():
+    """Returns dict of SMuFL name: description of ligatures, optional
+    glyphs and sets, from Bravura."""
+    return load('bravura')['descriptions']
+
+
+if __name__ == '__main__':
+    if '--update' in sys.argv[1:]:
+        update()
+    for key in sorted(DOCUMENTS):
+        load(key)
+    print('Metadata cached in {}'.format(CACHE_DIR))
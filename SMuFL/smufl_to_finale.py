@@ -238,15 +238,18 @@ def unicode_index(os_name):
         return mac_ui
 
 
-def genarate_glyphs(os_name):
+def measure_source(glyph):
+    ''' Returns bounding box and metrics of source glyph, measured once for both OS glyphs. '''
+    return glyph.GetBoundingRect(), glyph.GetMetrics()
+
+
+def genarate_glyphs(os_name, smufl_indx, bbox, smufl_metrics):
     '''' Main process '''
-    smufl_indx = f.FindGlyph(smufl_name)
     smufl_glyph = f.glyphs[smufl_indx]
     new_glyph = Glyph()
     new_glyph.name = os_name
     new_glyph.unicode = unicode_index(os_name)
     new_glyph.mark = 120
-    bbox = smufl_glyph.GetBoundingRect()
     bbox_bottom = bbox.ll.y
     bbox_top = bbox.ur.y
     bbox_center = (bbox_bottom + bbox_top) / 2
@@ -269,8 +272,8 @@ def genarate_glyphs(os_name):
     else:
         new_glyph.components.append(Component(smufl_indx, Point(x, y)))
 
-        # Sets metrics.
-        metrics = smufl_glyph.GetMetrics()
+        # Sets metrics (copied, as source metrics are shared by both glyphs).
+        metrics = Point(smufl_metrics)
         if metrics_mod == 'zero_wdth':
             metrics.x = bbox.width
         new_glyph.SetMetrics(metrics)
@@ -285,8 +288,10 @@ print('Creating glyphs ...')
 for smufl_name, (win_name, mac_name, mac_ui, metrics_mod) in gen_dict.iteritems():
     check_sources(smufl_name)
     if f.has_key(smufl_name):
-        genarate_glyphs(mac_name)
-        genarate_glyphs(win_name)
+        smufl_indx = f.FindGlyph(smufl_name)
+        bbox, smufl_metrics = measure_source(f.glyphs[smufl_indx])
+        genarate_glyphs(mac_name, smufl_indx, bbox, smufl_metrics)
+        genarate_glyphs(win_name, smufl_indx, bbox, smufl_metrics)
 
 fl.UpdateFont(fl.ifont)
 print('All done!')
@@ -0,0 +1,68 @@
+"""Tests of the SMuFL scripts that run outside FontLab. From the SMuFL folder:
+
+python -m unittest discover tests
+
+Runs with Python 2 and 3.
+
+Functions:
+
+write_ufo() -- writes UFO font folder of glyphs
+"""
+
+# (c) 2021 by Knut Nergaard.
+
+import os
+import plistlib
+from xml.sax.saxutils import escape
+
+
+def _write_plist(path, value):
+    """Writes value to property list file."""
+    if hasattr(plistlib, 'dump'):
+        with open(path, 'wb') as f:
+            plistlib.dump(value, f)
+    else:
+        plistlib.writePlist(value, path)
+
+
+def write_ufo(path, glyphs, upm=1000, name='Test'):
+    """Writes UFO font folder of glyphs and returns path.
+
+    glyphs is a list of dicts with keys name, and optionally unicode, note,
+    width, contours (lists of (x, y, type) points, type None for off-curve
+    points without type attribute) and anchors ((name, x, y) tuples).
+    """
+    glyphs_dir = os.path.join(path, 'glyphs')
+    os.makedirs(glyphs_dir)
+    _write_plist(os.path.join(path, 'metainfo.plist'),
+                 {'creator': 'tests', 'formatVersion': 3})
+    _write_plist(os.path.join(path, 'fontinfo.plist'),
+                 {'postscriptFontName': name, 'unitsPerEm': upm})
+    _write_plist(os.path.join(path, 'lib.plist'),
+                 {'public.glyphOrder': [glyph['name'] for glyph in glyphs]})
+    contents = {}
+    for glyph in glyphs:
+        filename = glyph['name'] + '.glif'
+        contents[glyph['name']] = filename
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<glyph name="{}" format="2">'.format(glyph['name']),
+                 '  <advance width="{}"/>'.format(glyph.get('width', 0))]
+        if glyph.get('unicode'):
+            lines.append('  <unicode hex="{:04X}"/>'.format(glyph['unicode']))
+        for anchor in glyph.get('anchors', ()):
+            lines.append('  <anchor name="{}" x="{}" y="{}"/>'.format(*anchor))
+        lines.append('  <outline>')
+        for contour in glyph.get('contours', ()):
+            lines.append('    <contour>')
+            for x, y, point_type in contour:
+                attributes = ' type="{}"'.format(point_type) if point_type else ''
+                lines.append('      <point x="{}" y="{}"{}/>'.format(x, y, attributes))
+            lines.append('    </contour>')
+        lines.append('  </outline>')
+        if glyph.get('note'):
+            lines.append('  <note>{}</note>'.format(escape(glyph['note'])))
+        lines.append('</glyph>')
+        with open(os.path.join(glyphs_dir, filename), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    _write_plist(os.path.join(glyphs_dir, 'contents.plist'), contents)
+    return path
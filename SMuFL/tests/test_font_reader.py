@@ -0,0 +1,58 @@
+"""Tests of font_reader: glyphs and bounding boxes read from UFO fonts."""
+
+# (c) 2021 by Knut Nergaard.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import font_reader
+from tests import write_ufo
+
+# Cubic from (0, 0) to (300, 0) with control points at y = -200, closed by
+# a line through (150, 100). Its lowest point is at y = -150.
+CUBIC = [(0, 0, 'line'), (100, -200, 'offcurve'), (200, -200, 'offcurve'),
+         (300, 0, 'curve'), (150, 100, 'line')]
+
+
+class ReadUfoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def read(self, contour):
+        """Returns glyph of contour read from UFO."""
+        path = write_ufo(os.path.join(self.folder, 'Test.ufo'), [
+            {'name': 'uniE050', 'unicode': 0xE050, 'note': 'gClef', 'width': 300,
+             'contours': [contour], 'anchors': [('cutOutNE', 10, 20)]}])
+        return font_reader.read_ufo(path).glyphs[0]
+
+    def bounds(self, glyph):
+        bounds = glyph.GetBoundingRect()
+        return bounds.ll.x, bounds.ll.y, bounds.ur.x, bounds.ur.y
+
+    def test_explicit_off_curve_points(self):
+        glyph = self.read(CUBIC)
+        self.assertEqual(self.bounds(glyph), (0, -150, 300, 100))
+        self.assertEqual([node.type for node in glyph.nodes],
+                         ['line', None, None, 'curve', 'line'])
+
+    def test_implicit_off_curve_points(self):
+        glyph = self.read([(x, y, None if point_type == 'offcurve' else point_type)
+                           for x, y, point_type in CUBIC])
+        self.assertEqual(self.bounds(glyph), (0, -150, 300, 100))
+
+    def test_glyph(self):
+        glyph = self.read(CUBIC)
+        self.assertEqual((glyph.name, glyph.unicode, glyph.note, glyph.width),
+                         ('uniE050', 0xE050, 'gClef', 300))
+        self.assertEqual([(anchor.name, anchor.x, anchor.y) for anchor in glyph.anchors],
+                         [('cutOutNE', 10, 20)])
+
+
+if __name__ == '__main__':
+    unittest.main()
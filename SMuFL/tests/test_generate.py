@@ -0,0 +1,156 @@
+"""Tests of generate_smufl_metadata: metadata files of UFO fonts, written in
+full, incrementally and compact."""
+
+# (c) 2021 by Knut Nergaard.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import generate_smufl_metadata as generator
+import smufl_metadata
+from tests import write_ufo
+
+SQUARE = [(0, 0, 'line'), (0, 250, 'line'), (250, 250, 'line'),
+          (250, 0, 'line')]
+
+
+def glyphs(flat_width=300):
+    """Returns glyphs of test font, with flat of flat_width."""
+    return [
+        {'name': 'uniE260', 'unicode': 0xE260, 'note': 'accidentalFlat',
+         'width': flat_width, 'contours': [SQUARE],
+         'anchors': [('cutOutNE', 250, 250)]},
+        {'name': 'uniE262', 'unicode': 0xE262, 'note': 'accidentalSharp',
+         'width': 333, 'contours': [SQUARE]},
+        {'name': 'uniE260.salt01', 'unicode': 0xF400,
+         'note': 'accidentalFlatSmall\nSmall flat', 'width': 250,
+         'contours': [SQUARE]},
+        {'name': 'uniE260.ss01', 'unicode': 0xF401,
+         'note': 'accidentalFlatOpticalSmall\nFlat for small staves',
+         'width': 200, 'contours': [SQUARE]},
+        {'name': 'uniE263', 'unicode': 0xE263,
+         'note': 'accidentalDoubleSharp'},
+    ]
+
+
+class GenerateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.settings = (generator.INCREMENTAL, generator.COMPACT,
+                         generator.PRECISION)
+        self.classes = smufl_metadata._indexes.get('classes')
+        smufl_metadata._indexes['classes'] = {
+            'accidentalFlat': ['accidentals', 'accidentalsStandard']}
+        self.ufo = self.write(glyphs())
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        (generator.INCREMENTAL, generator.COMPACT,
+         generator.PRECISION) = self.settings
+        if self.classes is None:
+            del smufl_metadata._indexes['classes']
+        else:
+            smufl_metadata._indexes['classes'] = self.classes
+
+    def write(self, font_glyphs):
+        """Writes UFO of glyphs, replacing any earlier one, and returns
+        path."""
+        path = os.path.join(self.folder, 'Test.ufo')
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        return write_ufo(path, font_glyphs)
+
+    def generate(self, folder, **options):
+        """Generates metadata of test font to folder and returns result."""
+        folder = os.path.join(self.folder, folder)
+        if not os.path.exists(folder):
+            os.mkdir(folder)
+        result = generator.generate_file(self.ufo, folder=folder, **options)
+        self.assertIsNone(result['error'], result['error'])
+        return result
+
+    def read(self, result):
+        """Returns content of metadata file of result."""
+        with open(result['metadata']) as f:
+            return f.read()
+
+    def test_metadata(self):
+        metadata = json.loads(self.read(self.generate('full')))
+        self.assertEqual(metadata['fontName'], 'Test')
+        self.assertEqual(metadata['glyphAdvanceWidths']['accidentalFlat'], 1.2)
+        self.assertEqual(metadata['glyphBBoxes']['accidentalSharp'],
+                         {'bBoxSW': [0.0, 0.0], 'bBoxNE': [1.0, 1.0]})
+        self.assertEqual(metadata['glyphsWithAnchors'],
+                         {'accidentalFlat': {'cutOutNE': [1.0, 1.0]}})
+        alternates = metadata['glyphsWithAlternates']['accidentalFlat']
+        self.assertEqual([alternate['name']
+                          for alternate in alternates['alternates']],
+                         ['accidentalFlatSmall', 'accidentalFlatOpticalSmall'])
+        self.assertEqual(
+            metadata['optionalGlyphs']['accidentalFlatOpticalSmall'],
+            {'classes': ['accidentals', 'accidentalsStandard'],
+             'codepoint': 'U+F401'})
+        self.assertEqual(metadata['sets']['ss01']['glyphs'][0]['alternateFor'],
+                         'accidentalFlat')
+        # Glyph without nodes is skipped.
+        self.assertNotIn('accidentalDoubleSharp', metadata['glyphBBoxes'])
+
+    def test_as_json_dump(self):
+        # Streamed file is identical to json.dump of the whole metadata, as
+        # written by Python 2 (and FontLab) with its item separator ', '.
+        text = self.read(self.generate('full'))
+        self.assertEqual(text, json.dumps(json.loads(text), indent=4,
+                                          sort_keys=True,
+                                          separators=(', ', ': ')))
+
+    def test_compact(self):
+        first = self.read(self.generate('first', compact=True))
+        second = self.read(self.generate('second', compact=True))
+        self.assertEqual(first, second)
+        self.assertEqual(first, json.dumps(json.loads(first), sort_keys=True,
+                                           separators=(',', ':')))
+        full = self.read(self.generate('full'))
+        self.assertEqual(json.loads(first), json.loads(full))
+
+    def test_incremental(self):
+        first = self.generate('incremental', incremental=True)
+        self.assertNotIn('Reused', first['printed'])
+        second = self.generate('incremental', incremental=True)
+        self.assertIn('Reused 4 unchanged glyphs, recomputed 0.',
+                      second['printed'])
+        self.assertEqual(second['metadata'], first['metadata'])
+        self.assertEqual(self.read(second), self.read(self.generate('full')))
+
+    def test_incremental_change(self):
+        self.generate('incremental', incremental=True)
+        self.ufo = self.write(glyphs(flat_width=350))
+        result = self.generate('incremental', incremental=True)
+        self.assertIn('Reused 3 unchanged glyphs, recomputed 1.',
+                      result['printed'])
+        metadata = json.loads(self.read(result))
+        self.assertEqual(metadata['glyphAdvanceWidths']['accidentalFlat'], 1.4)
+        # Reused values are those of a full run.
+        self.assertEqual(self.read(result), self.read(self.generate('full')))
+
+    def test_missing_fingerprints(self):
+        result = self.generate('incremental', incremental=True)
+        os.remove(generator.fingerprints_filename(result['metadata']))
+        result = self.generate('incremental', incremental=True)
+        self.assertNotIn('Reused', result['printed'])
+
+    def test_precision_changed(self):
+        self.generate('incremental', incremental=True)
+        generator.PRECISION = 1
+        result = self.generate('incremental', incremental=True)
+        self.assertNotIn('Reused', result['printed'])
+        metadata = json.loads(self.read(result))
+        self.assertEqual(metadata['glyphAdvanceWidths']['accidentalSharp'],
+                         1.3)
+
+
+if __name__ == '__main__':
+    unittest.main()